@@ -0,0 +1,5 @@
+""" Benchmarks for bioplotlib.
+
+The benchmarks follow the conventions of airspeed velocity (asv), so they
+can be run with `asv run`, or offline with `python -m benchmarks.run`.
+"""
@@ -0,0 +1,325 @@
+""" Benchmarks of features, feature groups and rendering. """
+
+from io import BytesIO
+
+import numpy as np
+
+from .common import figure
+from .common import genes
+from .common import intervals
+
+from bioplotlib.collections import Feature
+from bioplotlib.collections import FeatureGroup
+from bioplotlib.collections import build_tracks
+from bioplotlib.collections import layout_blocks
+from bioplotlib.collections import new_shape
+from bioplotlib.feature_shapes import Arrow
+from bioplotlib.feature_shapes import OpenTriangle
+from bioplotlib.feature_shapes import Rectangle
+from bioplotlib.feature_shapes import Triangle
+from bioplotlib.intervals import pack_intervals
+
+
+class FeatureDrawPatches(object):
+
+    """ Lay out the blocks of features. """
+
+    params = [1000, 10000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        self.genes = genes(n)
+        self.features = [self.feature(blocks) for blocks in self.genes[:100]]
+        self.blocks = np.concatenate(self.genes)
+        self.groups = np.repeat(
+            np.arange(len(self.genes)),
+            [len(blocks) for blocks in self.genes]
+            )
+        return
+
+    @staticmethod
+    def feature(blocks):
+        return Feature(
+            blocks,
+            shape=[new_shape(Rectangle), new_shape(Arrow, head_length=50)],
+            between_shape=new_shape(OpenTriangle, width=0.5)
+            )
+
+    def time_features(self, n):
+        for blocks in self.genes:
+            self.feature(blocks)
+
+    def time_draw_patches(self, n):
+        for feature in self.features:
+            feature._draw_patches()
+
+    def time_layout_blocks(self, n):
+        layout_blocks(
+            self.blocks,
+            [new_shape(Rectangle), new_shape(Arrow, head_length=50)],
+            between_shape=new_shape(OpenTriangle, width=0.5),
+            groups=self.groups
+            )
+
+
+class FeatureGroupAssembly(object):
+
+    """ Join features into a track. """
+
+    params = [1000, 50000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        self.features = [
+            FeatureDrawPatches.feature(blocks) for blocks in genes(n)
+            ]
+        return
+
+    def time_feature_group(self, n):
+        FeatureGroup(self.features)
+
+    def time_paths(self, n):
+        FeatureGroup(self.features).get_paths()
+
+    def time_bytes(self, n):
+        FeatureGroup.frombytes(FeatureGroup(self.features).tobytes())
+
+
+class Stacking(object):
+
+    """ Pack overlapping features into rows. """
+
+    params = [1000, 50000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        features = [FeatureDrawPatches.feature(b) for b in genes(n)]
+        self.group = FeatureGroup(features, stack="expanded")
+        # Reads at about 10x coverage, 20 for each feature, and as many
+        # gene length intervals, at about 100x.
+        self.starts, self.ends, _ = intervals(20 * n, mean=100)
+        self.gene_starts, self.gene_ends, _ = intervals(20 * n)
+        return
+
+    def time_pack_intervals(self, n):
+        pack_intervals(self.starts, self.ends)
+
+    def time_pack_genes(self, n):
+        pack_intervals(self.gene_starts, self.gene_ends)
+
+    def time_restack(self, n):
+        self.group.max_rows = 1 if self.group.max_rows is None else None
+
+    def time_stack_range(self, n):
+        self.group.stack_range = (0, 100000)
+
+
+class Editing(object):
+
+    """ Add, remove and update features of a track. """
+
+    params = [1000, 50000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        features = [FeatureDrawPatches.feature(b) for b in genes(n)]
+        self.group = FeatureGroup(features[:-10])
+        self.new = features[-10:]
+        return
+
+    def time_add_remove(self, n):
+        self.group.remove(self.group.add(self.new))
+
+    def time_update(self, n):
+        self.group.update_feature(n // 2, offset=1)
+
+    def time_update_paths(self, n):
+        self.group.update_feature(n // 2, offset=1)
+        self.group.get_paths()
+
+    def time_rebuild(self, n):
+        self.group.features = self.group.features
+
+
+class SceneGraph(object):
+
+    """ Edit one gene of a nested genome, chromosome, locus, gene tree. """
+
+    params = [1000, 10000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        features = [FeatureDrawPatches.feature(b) for b in genes(n)]
+        loci = [
+            FeatureGroup(features[i:i + 10])
+            for i in range(0, len(features), 10)
+            ]
+        chromosomes = [
+            FeatureGroup(loci[i:i + 10]) for i in range(0, len(loci), 10)
+            ]
+        self.genome = FeatureGroup(chromosomes)
+        self.gene = features[n // 2]
+        return
+
+    def time_edit_gene(self, n):
+        self.gene.offset = 1 - self.gene.offset
+        self.genome.shape_array
+
+    def time_rebuild(self, n):
+        for chromosome in self.genome.features:
+            for locus in chromosome.features:
+                locus.features = locus.features
+            chromosome.features = chromosome.features
+        self.genome.features = self.genome.features
+
+
+class BuildTracks(object):
+
+    """ Build the feature tracks of 8 chromosomes. """
+
+    params = [1000, 20000]
+    param_names = ["n"]
+    repeat = 1
+
+    def setup(self, n):
+        self.tracks = {
+            "chr{}".format(i): [list(map(tuple, b)) for b in genes(n, seed=i)]
+            for i in range(8)
+            }
+        return
+
+    def time_serial(self, n):
+        for features in self.tracks.values():
+            FeatureGroup([FeatureDrawPatches.feature(b) for b in features])
+
+    def time_in_process(self, n):
+        self._build(0)
+
+    def time_process_pool(self, n):
+        self._build(None)
+
+    def _build(self, processes):
+        build_tracks(
+            self.tracks,
+            [new_shape(Rectangle), new_shape(Arrow, head_length=50)],
+            between_shape=new_shape(OpenTriangle, width=0.5),
+            processes=processes
+            )
+
+
+class Render(object):
+
+    """ Draw a track with Agg and save it to a PNG buffer. """
+
+    params = [1000, 50000]
+    param_names = ["n"]
+    timeout = 300
+
+    def setup(self, n):
+        features = [FeatureDrawPatches.feature(b) for b in genes(n)]
+        self.group = FeatureGroup(features)
+        self.fig, (self.ax, ) = figure()
+        self.ax.add_collection(self.group)
+        self.ax.autoscale_view()
+        return
+
+    def time_png(self, n):
+        self.fig.savefig(BytesIO(), format="png")
+
+    def time_png_zoomed(self, n):
+        xmin, xmax = self.ax.get_xlim()
+        self.ax.set_xlim(xmin, xmin + (xmax - xmin) / 100)
+        try:
+            self.fig.savefig(BytesIO(), format="png")
+        finally:
+            self.ax.set_xlim(xmin, xmax)
+
+    def time_png_lod(self, n):
+        self.group.set_lod(True)
+        try:
+            self.fig.savefig(BytesIO(), format="png")
+        finally:
+            self.group.set_lod(False)
+
+
+class RenderGlyphs(object):
+
+    """ Draw a track of fixed size SNP ticks, per shape or instanced. """
+
+    params = [[10000, 200000], [False, True]]
+    param_names = ["n", "instanced"]
+    timeout = 300
+
+    def setup(self, n, instanced):
+        starts, _, strands = intervals(n)
+        blocks = list(zip(starts, starts + 100, strands))
+        self.feature = Feature(
+            blocks,
+            shape=new_shape(Triangle),
+            instanced=instanced,
+            cull=False
+            )
+        self.fig, (self.ax, ) = figure()
+        self.ax.add_collection(self.feature)
+        self.ax.autoscale_view()
+        return
+
+    def time_png(self, n, instanced):
+        self.fig.savefig(BytesIO(), format="png")
+
+    def time_png_zoomed(self, n, instanced):
+        xmin, xmax = self.ax.get_xlim()
+        self.ax.set_xlim(xmin, xmin + (xmax - xmin) / 100)
+        try:
+            self.fig.savefig(BytesIO(), format="png")
+        finally:
+            self.ax.set_xlim(xmin, xmax)
+
+
+class Density(object):
+
+    """ Draw a zoomed out track as the density of its features. """
+
+    params = [1000, 50000]
+    param_names = ["n"]
+    timeout = 300
+
+    def setup(self, n):
+        features = [FeatureDrawPatches.feature(b) for b in genes(n)]
+        self.group = FeatureGroup(features, density=1e6)
+        self.fig, (self.ax, ) = figure()
+        self.ax.add_collection(self.group)
+        self.ax.autoscale_view()
+        self.group.density_pyramid()
+        return
+
+    def time_pyramid(self, n):
+        self.group.density = self.group.density
+        self.group.density_pyramid()
+
+    def time_png(self, n):
+        self.fig.savefig(BytesIO(), format="png")
+
+
+class Picking(object):
+
+    """ Find the features under a point. """
+
+    params = [1000, 50000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        features = [FeatureDrawPatches.feature(b) for b in genes(n)]
+        self.group = FeatureGroup(features)
+        self.group.features_at(0, 0.5)
+        starts = [blocks[0][0] for blocks in genes(n)]
+        self.points = starts[::max(1, n // 100)]
+        return
+
+    def time_features_at(self, n):
+        for x in self.points:
+            self.group.features_at(x, 0.5)
+
+    def time_index(self, n):
+        self.group._invalidate()
+        self.group.features_at(0, 0.5)
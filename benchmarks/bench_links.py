@@ -0,0 +1,132 @@
+""" Benchmarks of links between axes. """
+
+from functools import partial
+from io import BytesIO
+
+import numpy as np
+
+from .common import figure
+from .common import intervals
+from .common import GENOME_LENGTH
+
+from bioplotlib.collections import LinkCollection
+from bioplotlib.links import CrossLink
+from bioplotlib.links import link_paths
+
+
+class Links(object):
+
+    """ Compute and draw the links between two axes. """
+
+    params = [100, 10000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        self.fig, (ax1, ax2) = figure(nrows=2)
+        for ax in (ax1, ax2):
+            ax.set_xlim(0, GENOME_LENGTH)
+
+        starts1, ends1, _ = intervals(n, seed=1)
+        starts2, ends2, _ = intervals(n, seed=2)
+        self.blocks = [
+            [[[s1, e1], [0, 1]], [[s2, e2], [0, 1]]]
+            for s1, e1, s2, e2 in zip(starts1, ends1, starts2, ends2)
+            ]
+
+        self.links = [
+            CrossLink(ax1, ax2, ax1_xrange=b[0][0], ax2_xrange=b[1][0])
+            for b in self.blocks
+            ]
+        self.axes = (ax1, ax2)
+        self.ranges = (
+            np.stack([starts1, ends1], axis=1),
+            np.stack([starts2, ends2], axis=1),
+            )
+        self.collection = LinkCollection(
+            partial(CrossLink, ax1, ax2),
+            add_to_fig=True
+            )
+        self.collection.add(self.blocks)
+        return
+
+    def time_crosslink_draw(self, n):
+        for link in self.links:
+            link.draw()
+
+    def time_link_collection_add(self, n):
+        collection = LinkCollection(self.collection.obj)
+        collection.add(self.blocks)
+
+    def time_link_collection_png(self, n):
+        self.fig.savefig(BytesIO(), format="png")
+
+    def time_link_paths(self, n):
+        link_paths(*(self.axes + self.ranges))
+
+
+class LinkView(object):
+
+    """ Find the links in view after panning. """
+
+    params = [10000, 100000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        self.fig, (ax1, ax2) = figure(nrows=2)
+        starts1, ends1, _ = intervals(n, seed=1)
+        starts2, ends2, _ = intervals(n, seed=2)
+        self.collection = LinkCollection(partial(CrossLink, ax1, ax2))
+        self.collection.add(np.stack([
+            np.stack([starts1, ends1], axis=1),
+            np.stack([starts2, ends2], axis=1),
+            ], axis=1))
+        self.links = self.collection.links
+        self.axes = (ax1, ax2)
+        self.view = 0
+        return
+
+    def pan(self):
+        self.view = (self.view + 1) % 10
+        low = self.view * GENOME_LENGTH / 10
+        for ax in self.axes:
+            ax.set_xlim(low, low + GENOME_LENGTH / 5)
+
+    def time_in_view(self, n):
+        self.pan()
+        self.collection._links_in_view()
+
+    def time_in_limits(self, n):
+        self.pan()
+        [link for link in self.links if link.in_limits()]
+
+
+class LinkStream(object):
+
+    """ Stream whole genome alignments from show-coords text. """
+
+    params = [100000, 1000000]
+    param_names = ["n"]
+    repeat = 1
+
+    def setup(self, n):
+        self.fig, (ax1, ax2) = figure(nrows=2)
+        self.obj = partial(CrossLink, ax1, ax2)
+
+        starts1, ends1, _ = intervals(n, seed=1)
+        starts2, ends2, _ = intervals(n, seed=2)
+        identity = np.random.RandomState(0).uniform(70, 100, size=n)
+        line = "{:.0f}\t{:.0f}\t{:.0f}\t{:.0f}\t0\t0\t{:.2f}\tchr1\tchr2\n"
+        self.lines = [
+            line.format(*record)
+            for record in zip(starts1, ends1, starts2, ends2, identity)
+            ]
+        return
+
+    def time_add_stream(self, n):
+        collection = LinkCollection(self.obj)
+        collection.add_stream(
+            iter(self.lines),
+            identity=6,
+            min_identity=85,
+            values="identity"
+            )
@@ -0,0 +1,133 @@
+""" Benchmarks of building and changing shapes. """
+
+from .common import figure
+from .common import intervals
+
+import numpy as np
+
+from bioplotlib.feature_shapes import Arrow
+from bioplotlib.feature_shapes import Rectangle
+from bioplotlib.feature_shapes import Helix
+from bioplotlib.feature_shapes import ShapeArray
+
+
+class ShapeConstruction(object):
+
+    """ Create one Shape object per interval. """
+
+    params = [1000, 100000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        self.starts, self.ends, self.strands = intervals(n)
+        self.starts = self.starts.tolist()
+        self.ends = self.ends.tolist()
+        self.strands = self.strands.tolist()
+        return
+
+    def time_arrow(self, n):
+        for start, end, strand in zip(self.starts, self.ends, self.strands):
+            Arrow(start, end, strand, head_length=100)
+
+    def time_arrow_path(self, n):
+        for start, end, strand in zip(self.starts, self.ends, self.strands):
+            Arrow(start, end, strand, head_length=100).get_path()
+
+
+class BatchConstruction(object):
+
+    """ Compute the vertices of many shapes at once. """
+
+    params = [10000, 1000000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        self.starts, self.ends, self.strands = intervals(n)
+        return
+
+    def time_arrow_batch(self, n):
+        Arrow.batch(self.starts, self.ends, self.strands, head_length=100)
+
+    def time_shape_array(self, n):
+        shapes = ShapeArray()
+        shapes.extend(
+            self.starts,
+            self.ends,
+            self.strands,
+            shape=Arrow,
+            head_length=100
+            )
+
+    def time_shape_array_paths(self, n):
+        shapes = ShapeArray()
+        shapes.extend(self.starts, self.ends, self.strands, shape=Arrow)
+        shapes.get_paths()
+
+    def time_helix_paths(self, n):
+        shapes = ShapeArray()
+        shapes.extend(self.starts, self.ends, shape=Helix, period=360)
+        shapes.get_paths()
+
+
+class ShapeMutation(object):
+
+    """ Move shapes with setters, as when dragging or animating. """
+
+    params = [1000, 100000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        self.shapes = [Rectangle(0, 10) for _ in range(n)]
+        self.moves = np.arange(n, dtype=float).tolist()
+        return
+
+    def time_setters(self, n):
+        for shape, move in zip(self.shapes, self.moves):
+            shape.start = move
+            shape.end = move + 10
+            shape.offset = 1
+            shape.get_path()
+
+    def time_update(self, n):
+        for shape, move in zip(self.shapes, self.moves):
+            shape.update(start=move, end=move + 10, offset=1)
+            shape.get_path()
+
+    def time_vertices(self, n):
+        for shape, move in zip(self.shapes, self.moves):
+            shape.start = move
+            shape.vertices
+
+
+class AxesShapeMutation(object):
+
+    """ Move shapes in an axes, whose every change marks the figure stale. """
+
+    params = [1000, 100000]
+    param_names = ["n"]
+
+    def setup(self, n):
+        self.fig, (ax,) = figure()
+        self.shapes = [ax.add_artist(Rectangle(0, 10)) for _ in range(n)]
+        self.moves = np.arange(n, dtype=float).tolist()
+        return
+
+    def time_setters(self, n):
+        for shape, move in zip(self.shapes, self.moves):
+            shape.start = move
+            shape.end = move + 10
+            shape.strand = -1
+            shape.offset = 1
+            shape.width = 2
+            shape.get_path()
+
+    def time_update(self, n):
+        for shape, move in zip(self.shapes, self.moves):
+            shape.update(
+                start=move,
+                end=move + 10,
+                strand=-1,
+                offset=1,
+                width=2
+                )
+            shape.get_path()
@@ -0,0 +1,61 @@
+""" Synthetic genome scale workloads shared by the benchmarks. """
+
+# Import the figure before bioplotlib, whose Rectangle shares a name with
+# matplotlib's and confuses its docstring interpolation.
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import numpy as np
+
+
+GENOME_LENGTH = 10000000
+
+
+def intervals(n, length=GENOME_LENGTH, mean=1000, seed=0):
+    """ Random sorted intervals along a genome.
+
+    Keyword arguments:
+    n -- number of intervals.
+    length -- length of the genome.
+    mean -- mean length of the intervals.
+    seed -- seed of the random number generator.
+
+    Returns:
+    starts, ends, strands -- arrays of n values.
+    """
+    random = np.random.RandomState(seed)
+    starts = np.sort(random.randint(0, length, size=n)).astype(float)
+    ends = starts + random.exponential(mean, size=n) + 1
+    strands = random.choice([-1, 1], size=n)
+    return starts, ends, strands
+
+
+def genes(n, exons=5, length=GENOME_LENGTH, seed=0):
+    """ Block lists of random genes, as passed to `Feature`.
+
+    Keyword arguments:
+    n -- number of genes.
+    exons -- number of exons per gene.
+
+    Returns:
+    list -- n lists of (start, end, strand) tuples.
+    """
+    random = np.random.RandomState(seed)
+    starts = np.sort(random.randint(0, length, size=n))
+    strands = random.choice([-1, 1], size=n)
+
+    # Alternate exons and introns of random lengths.
+    lengths = random.randint(50, 500, size=(n, 2 * exons))
+    positions = starts[:, None] + np.cumsum(lengths, axis=1)
+    return [
+        [(s, e, int(strand)) for s, e in zip(p[0::2], p[1::2])]
+        for p, strand in zip(positions.tolist(), strands)
+        ]
+
+
+def figure(nrows=1):
+    """ A new figure with an Agg canvas and `nrows` axes. """
+    fig = Figure(figsize=(10, 2 * nrows))
+    FigureCanvasAgg(fig)
+    axes = [fig.add_subplot(nrows, 1, i + 1) for i in range(nrows)]
+    return fig, axes
@@ -0,0 +1,262 @@
+""" Run the benchmarks without asv, and store or compare the results.
+
+Benchmarks are the `time_*` methods of classes in the `bench_*` modules,
+following asv conventions: `setup` and `teardown` methods, and optional
+`params`, `param_names`, `number` and `repeat` attributes.
+
+Usage:
+    python -m benchmarks.run [--bench REGEX] [--quick] [--compare OLD.json]
+
+Results are written as JSON to benchmarks/results/, one file per run, named
+by date and git commit.
+"""
+
+import argparse
+from datetime import datetime
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import re
+import subprocess
+import sys
+import timeit
+
+import numpy as np
+import matplotlib
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS = os.path.join(HERE, "results")
+
+# Repeat a benchmark until a sample takes at least this long, in seconds.
+MIN_SAMPLE_TIME = 0.1
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE,
+            stderr=subprocess.DEVNULL
+            ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _machine():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        }
+
+
+def _param_sets(cls):
+    """ All combinations of the params of a benchmark class. """
+    params = getattr(cls, "params", None)
+    if not params:
+        return [()]
+    # A flat list is the values of a single parameter.
+    if not all(isinstance(p, (list, tuple)) for p in params):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def discover(pattern=None):
+    """ Yield (name, class, method name) of each benchmark.
+
+    Keyword arguments:
+    pattern -- None or regular expression searched for in the names,
+        e.g. "bench_shapes.ShapeMutation".
+    """
+    for module_info in pkgutil.iter_modules([HERE]):
+        if not module_info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(
+            "benchmarks." + module_info.name
+            )
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for method in sorted(vars(cls)):
+                if not method.startswith("time_"):
+                    continue
+                name = "{}.{}.{}".format(
+                    module_info.name,
+                    cls.__name__,
+                    method
+                    )
+                if pattern is None or re.search(pattern, name):
+                    yield name, cls, method
+
+
+def run_one(cls, method, params, repeat=None):
+    """ Time a benchmark method with one set of params.
+
+    Returns:
+    list -- seconds per call for each repeat, or None if `setup` raised
+        NotImplementedError to skip the benchmark.
+    """
+    bench = cls()
+    try:
+        if hasattr(bench, "setup"):
+            bench.setup(*params)
+    except NotImplementedError:
+        return None
+
+    try:
+        function = getattr(bench, method)
+        timer = timeit.Timer(lambda: function(*params))
+
+        number = getattr(bench, "number", 0)
+        if number <= 0:
+            number = 1
+            elapsed = timer.timeit(number)
+            if elapsed < MIN_SAMPLE_TIME:
+                number = int(np.ceil(MIN_SAMPLE_TIME / max(elapsed, 1e-9)))
+
+        if repeat is None:
+            repeat = getattr(bench, "repeat", 3)
+        return [t / number for t in timer.repeat(repeat, number)]
+    finally:
+        if hasattr(bench, "teardown"):
+            bench.teardown(*params)
+
+
+def run(pattern=None, quick=False):
+    """ Run the benchmarks and return the results as a dict. """
+    results = dict()
+    for name, cls, method in discover(pattern):
+        param_sets = _param_sets(cls)
+        if quick:
+            param_sets = param_sets[:1]
+
+        results[name] = list()
+        for params in param_sets:
+            samples = run_one(cls, method, params, 1 if quick else None)
+            if samples is None:
+                continue
+            result = {
+                "params": list(params),
+                "min": min(samples),
+                "median": float(np.median(samples)),
+                "samples": samples,
+                }
+            results[name].append(result)
+            print("{:<60} {:<12} {:>10.3g} s".format(
+                name,
+                ", ".join(str(p) for p in params),
+                result["min"]
+                ))
+            sys.stdout.flush()
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "machine": _machine(),
+        "results": results,
+        }
+
+
+def save(results, directory=RESULTS):
+    """ Write results to a new JSON file in `directory`. """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    filename = "{}-{}.json".format(
+        results["date"].replace(":", ""),
+        results["commit"]
+        )
+    path = os.path.join(directory, filename)
+    with open(path, "w") as handle:
+        json.dump(results, handle, indent=2)
+    return path
+
+
+def compare(old, new, factor=1.2):
+    """ Print the change in the minimum time of each benchmark.
+
+    Keyword arguments:
+    old, new -- results dicts, as returned by `run`.
+    factor -- ratio of new to old time counted as a regression.
+
+    Returns:
+    list -- (name, params, ratio) of each regression.
+    """
+    regressions = list()
+    for name, new_results in sorted(new["results"].items()):
+        old_results = {
+            tuple(r["params"]): r
+            for r in old["results"].get(name, list())
+            }
+        for result in new_results:
+            params = tuple(result["params"])
+            if params not in old_results:
+                continue
+            ratio = result["min"] / old_results[params]["min"]
+            if ratio > factor:
+                flag = "slower"
+                regressions.append((name, params, ratio))
+            elif ratio < 1 / factor:
+                flag = "faster"
+            else:
+                flag = ""
+            print("{:<60} {:<12} {:>8.2f}x {}".format(
+                name,
+                ", ".join(str(p) for p in params),
+                ratio,
+                flag
+                ))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Run the bioplotlib benchmarks."
+        )
+    parser.add_argument(
+        "-b", "--bench",
+        default=None,
+        help="Only run benchmarks whose names match this regular expression."
+        )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Run each benchmark once, with its first params only."
+        )
+    parser.add_argument(
+        "--compare",
+        default=None,
+        help="A previous results file to compare against."
+        )
+    parser.add_argument(
+        "--factor",
+        type=float,
+        default=1.2,
+        help="Slow down counted as a regression by --compare."
+        )
+    parser.add_argument(
+        "--no-save",
+        action="store_true",
+        help="Don't write the results to benchmarks/results/."
+        )
+    args = parser.parse_args(args)
+
+    results = run(args.bench, args.quick)
+    if not args.no_save:
+        print("Results written to {}".format(save(results)))
+
+    if args.compare is not None:
+        with open(args.compare) as handle:
+            old = json.load(handle)
+        if compare(old, results, args.factor):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
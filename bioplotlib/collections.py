@@ -15,39 +15,1506 @@ line segemnts)
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from copy import copy
+from functools import partial
 from collections import defaultdict
+from itertools import islice
+from numbers import Number
+import warnings
+from weakref import WeakSet
 
 import numpy as np
 import matplotlib.transforms as transforms
+from matplotlib.transforms import Affine2D
+from matplotlib.transforms import TransformedPath
 from matplotlib.path import Path
 from matplotlib.patches import PathPatch
-from matplotlib.patches import Patch
 
 from matplotlib.collections import Collection
+from matplotlib.artist import allow_rasterization
 
 import bioplotlib.feature_shapes
+from bioplotlib.feature_shapes import Shape
+from bioplotlib.feature_shapes import ShapeArray
 from bioplotlib.feature_shapes import Triangle
 from bioplotlib.feature_shapes import OpenTriangle
+from bioplotlib.feature_shapes import _freeze
+from bioplotlib.feature_shapes import _style_palette
+from bioplotlib.intervals import DensityPyramid
+from bioplotlib.intervals import IntervalIndex
+from bioplotlib.intervals import pack_intervals
+from bioplotlib.links import CrossLink
+from bioplotlib.links import link_paths
 
 
 __contributors = [
     "Darcy Jones <darcy.ab.jones@gmail.com>"
     ]
 
+# CrossLink properties drawn per link by a LinkCollection.
+LINK_STYLE_KEYS = (
+    "alpha", "antialiased", "color", "ec", "edgecolor", "facecolor", "fc",
+    "fill", "linestyle", "linewidth",
+    )
+
+# Alignments read at a time by LinkCollection.add_stream.
+LINK_CHUNK = 65536
+
+# Rows of a LinkCollection: the group of links sharing axes and settings,
+# the ranges along and across each axes, as passed to `links.link_paths`,
+# NaN for default control points, and the style and value of each link.
+LINK_DTYPE = np.dtype([
+    ("group", np.int64),
+    ("along1", float, (2, )),
+    ("along2", float, (2, )),
+    ("across1", float, (2, )),
+    ("across2", float, (2, )),
+    ("cpoint1", float),
+    ("cpoint2", float),
+    ("style", np.int64),
+    ("value", float),
+    ])
+
+# Ways to stack the features of a FeatureGroup, see FeatureGroup.stack.
+STACK_MODES = (None, "expanded", "squished", "collapsed")
+
+# Fraction of the row width taken by squished rows.
+SQUISHED = 0.25
+
+# Length either side of the view also drawn by a culled ShapeCollection,
+# as a fraction of the view, so that short pans don't cull again.
+CULL_MARGIN = 1.
+
+# Cull again when zoomed in this many times within the culled range.
+CULL_ZOOM = 8.
+
+# Ways to draw the density of a zoomed out FeatureGroup, see
+# FeatureGroup.density_style.
+DENSITY_STYLES = ("bars", "heat")
+
+# Bins of the finest level of the density pyramid of a FeatureGroup, in a
+# view as wide as FeatureGroup.density, more than any screen has pixels.
+DENSITY_BINS = 4096
+
+# Most template paths drawn by an instanced ShapeCollection, see
+# `ShapeCollection.set_instanced`, before drawing each shape instead.
+INSTANCE_TEMPLATES = 16
+
+class _ShapeFactory(object):
+
+    """ Shape factory made by `new_shape`.
+
+    The shape and kwargs are exposed so that collections can fill a
+    ShapeArray without creating a Shape object per block. Unlike a closure
+    it can be pickled, e.g. to lay out tracks in other processes.
+    """
+
+    def __init__(self, shape, kwargs):
+        self.shape = shape
+        self.kwargs = kwargs
+        return
+
+    def __call__(self, *a, **k):
+        return self.shape(*a, **dict(self.kwargs, **k))
+
+
+class _TrackFeature(object):
+
+    """ A feature laid out by `build_tracks`, held as a view of the rows of
+    its track until its Feature is needed, e.g. by `FeatureGroup.features`
+    or picking, so that building a track doesn't create a Collection per
+    feature.
+    """
+
+    __slots__ = (
+        "blocks", "shape", "between_shape", "rows", "kinds", "styles",
+        "feature",
+        )
+
+    def __init__(self, blocks, shape, between_shape, rows, kinds, styles):
+        """
+        Keyword arguments:
+        blocks -- the blocks of the feature, as for `Feature`.
+        shape, between_shape -- shape factories, as for `Feature`.
+        rows -- structured array of the rows of the feature, a view of the
+            rows of the track.
+        kinds, styles -- the kinds and styles of the track, see
+            `ShapeArray`.
+        """
+        self.blocks = blocks
+        self.shape = shape
+        self.between_shape = between_shape
+        self.rows = rows
+        self.kinds = kinds
+        self.styles = styles
+        self.feature = None
+        return
+
+    def shape_array(self):
+        """ A ShapeArray of the rows of the feature. """
+        return ShapeArray(self.rows, kinds=self.kinds, styles=self.styles)
+
+    def make_feature(self):
+        """ The Feature of the rows, made when first needed. """
+        if self.feature is None:
+            self.feature = Feature(
+                self.blocks,
+                shape=self.shape,
+                between_shape=self.between_shape,
+                shapes=self.shape_array()
+                )
+        return self.feature
+
+
 def new_shape(c, **kwargs):
      """ . """
-     def callable(*a, **k):
-         kwargs.update(k)
-         return c(*a, **kwargs)
-     return callable
+     return _ShapeFactory(c, kwargs)
+
+
+def _append_shape(shapes, factory, start, end, strand):
+    """ Add a block drawn by a shape factory to a ShapeArray.
+
+    Factories made with `new_shape` and Shape subclasses are added directly.
+    Any other callable is called and the returned Shape object is added.
+    """
+    if hasattr(factory, "shape"):
+        shapes.append(start, end, strand, factory.shape, **factory.kwargs)
+    elif isinstance(factory, type) and issubclass(factory, Shape):
+        shapes.append(start, end, strand, factory)
+    else:
+        shapes.append_shape(factory(start=start, end=end, strand=strand))
+    return
+
+
+def _factory_row(shapes, factory):
+    """ Kind, style, width and offset that a shape factory adds to shapes.
+
+    Returns None for plain callables, which must be called per block.
+    """
+    if hasattr(factory, "shape"):
+        shape, kwargs = factory.shape, factory.kwargs
+    elif isinstance(factory, type) and issubclass(factory, Shape):
+        shape, kwargs = factory, dict()
+    else:
+        return None
+    geometry, params, style = ShapeArray._split_kwargs(shape, kwargs)
+    return (
+        shapes.add_kind(shape, **params),
+        shapes.add_style(**style),
+        geometry["width"],
+        geometry["offset"]
+        )
+
+
+def _block_columns(blocks):
+    """ Starts, ends and strands of an (N, 2) or (N, 3) array of blocks.
+
+    Missing or None strands are 0.
+    """
+    try:
+        array = np.asarray(blocks, dtype=float)
+    except ValueError:
+        # Blocks with and without strands.
+        array = np.array(
+            [list(b[:3]) + [None] * (3 - len(b)) for b in blocks],
+            dtype=float
+            )
+    if array.ndim != 2:
+        array = array.reshape(len(array), 2)
+
+    if array.shape[1] > 2:
+        strands = np.nan_to_num(array[:, 2]).astype(np.int8)
+    else:
+        strands = np.zeros(len(array), dtype=np.int8)
+    return array[:, 0], array[:, 1], strands
+
+
+def _choose_shapes(groups, count):
+    """ Index of the shape to draw each span with.
+
+    With several shapes, the last span of each group uses the last shape.
+    With more than two, spans between the first and last use the second.
+
+    Keyword arguments:
+    groups -- int array, the group of each span, with groups contiguous.
+    count -- number of shapes to choose from.
+    """
+    n = len(groups)
+    new = np.ones(n, dtype=bool)
+    new[1:] = groups[1:] != groups[:-1]
+    last = np.ones(n, dtype=bool)
+    last[:-1] = new[1:]
+
+    choice = np.zeros(n, dtype=np.intp)
+    if count > 2:
+        choice[~new] = 1
+    if count > 1:
+        choice[last] = count - 1
+    return choice
+
+
+def _between_spans(starts, ends, strands, groups):
+    """ Spans joining the nearest ends of consecutive blocks in a group.
+
+    Returns:
+    starts, ends, strands, groups -- of the spans. Strands are kept where
+        both blocks agree and are 0 otherwise.
+    """
+    pairs = np.flatnonzero(groups[1:] == groups[:-1])
+    first = pairs
+    second = pairs + 1
+
+    # The candidate ends, in the order ties are broken.
+    candidates = np.column_stack([
+        starts[first], ends[first], starts[first], ends[first]
+        ])
+    others = np.column_stack([
+        starts[second], starts[second], ends[second], ends[second]
+        ])
+    nearest = np.argmin(np.abs(others - candidates), axis=1)
+    rows = np.arange(len(pairs))
+
+    agree = strands[first] == strands[second]
+    return (
+        candidates[rows, nearest],
+        others[rows, nearest],
+        np.where(agree, strands[first], 0).astype(np.int8),
+        groups[first]
+        )
+
+
+def layout_blocks(blocks, shape, between_shape=None, groups=None):
+    """ Lay out the blocks of one or many features as a ShapeArray.
+
+    All of the spans are computed with array operations. Blocks are only
+    drawn one at a time by shapes that are plain callables, rather than
+    Shape classes or made with `new_shape`.
+
+    Keyword arguments:
+    blocks -- (N, 2) or (N, 3) array of (start, end[, strand]) blocks.
+    shape -- a shape factory, or list of them for the first, middle and
+        last blocks, as for `Feature`.
+    between_shape -- None, or shape factory or list of them, to draw
+        between consecutive blocks of a feature.
+    groups -- None or int array with the feature of each block, with the
+        blocks of each feature contiguous. Default is a single feature.
+
+    Returns:
+    ShapeArray -- the shapes between blocks, then the blocks, in order.
+    """
+    if not isinstance(shape, (tuple, list)):
+        shape = [shape]
+    if between_shape is not None and \
+            not isinstance(between_shape, (tuple, list)):
+        between_shape = [between_shape]
+
+    starts, ends, strands = _block_columns(blocks)
+    if groups is None:
+        groups = np.zeros(len(starts), dtype=np.intp)
+    groups = np.asarray(groups)
+
+    spans = list()
+    if between_shape is not None and len(starts) > 1:
+        between = _between_spans(starts, ends, strands, groups)
+        spans.append(between[:3] + (between_shape, between[3]))
+    spans.append((starts, ends, strands, shape, groups))
+
+    shapes = ShapeArray()
+    for span_starts, span_ends, span_strands, factories, span_groups in spans:
+        choice = _choose_shapes(span_groups, len(factories))
+        rows = [_factory_row(shapes, f) for f in factories]
+
+        if any(rows[i] is None for i in np.unique(choice)):
+            for s, e, strand, i in zip(span_starts, span_ends,
+                                       span_strands.tolist(), choice):
+                _append_shape(shapes, factories[i], s, e, strand or None)
+            continue
+
+        table = np.array(
+            [r if r is not None else (0, 0, 0, 0) for r in rows],
+            dtype=float
+            )[choice]
+        new = np.zeros(len(choice), dtype=ShapeArray.dtype)
+        new["start"] = span_starts
+        new["end"] = span_ends
+        new["strand"] = span_strands
+        new["kind"] = table[:, 0]
+        new["style"] = table[:, 1]
+        new["width"] = table[:, 2]
+        new["offset"] = table[:, 3]
+        shapes._append_rows(new)
+    return shapes
+
+
+def _layout_track(features, shape, between_shape=None):
+    """ Lay out all of the features of a track at once, see `build_tracks`.
+
+    Returns:
+    bytes -- `ShapeArray.tobytes` of the rows, with the rows of each
+        feature together, the shapes between blocks first, as for `Feature`.
+    lengths -- int array, the number of rows of each feature.
+    """
+    counts = np.array([len(blocks) for blocks in features], dtype=np.intp)
+    groups = np.repeat(np.arange(len(features)), counts)
+    blocks = [block for blocks in features for block in blocks]
+    shapes = layout_blocks(blocks, shape, between_shape, groups=groups)
+
+    # Each feature has a span between each pair of consecutive blocks.
+    between = np.zeros(len(features), dtype=np.intp)
+    if between_shape is not None and len(blocks) > 1:
+        between = np.maximum(counts - 1, 0)
+    row_groups = np.concatenate([
+        np.repeat(np.arange(len(features)), between),
+        groups
+        ])
+    order = np.argsort(row_groups, kind="stable")
+    return shapes.take(order).tobytes(), counts + between
+
+
+def build_tracks(
+        tracks,
+        shape=new_shape(Triangle),
+        between_shape=None,
+        processes=None,
+        **kwargs
+        ):
+    """ Build a FeatureGroup for each of many tracks, e.g. the chromosomes
+    of several genomes, laying them out in a pool of processes.
+
+    Each worker lays out every feature of a track at once, see
+    `layout_blocks`, and returns the rows of the track as bytes, with the
+    number of rows of each feature, rather than Patch or Feature objects.
+    Each FeatureGroup is then made directly from the rows of its track.
+    The Feature of each set of blocks is only created when it is needed,
+    e.g. by `FeatureGroup.features`, picking or `update_feature`, from
+    its rows, without laying out its blocks again.
+
+    Keyword arguments:
+    tracks -- dict of the name of each track to a list of features, each
+        a list of blocks as for `Feature`.
+    shape, between_shape -- shape factories as for `Feature`, picklable,
+        e.g. made with `new_shape`.
+    processes -- None or the number of worker processes, default is the
+        number of CPUs. 0 lays out the tracks in this process, which is
+        faster unless the tracks are large and there are several CPUs.
+    kwargs -- passed to each FeatureGroup, e.g. stack.
+
+    Returns:
+    dict -- the name of each track to its FeatureGroup, in order.
+    """
+    names = list(tracks)
+    features = [tracks[name] for name in names]
+    if processes == 0 or len(names) == 0:
+        results = [_layout_track(f, shape, between_shape) for f in features]
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(
+                _layout_track,
+                features,
+                [shape] * len(names),
+                [between_shape] * len(names)
+                ))
+
+    groups = dict()
+    for name, track, (buffer, lengths) in zip(names, features, results):
+        # The rows are a read only view of the buffer, so the features
+        # keep their rows when the group edits its own.
+        shapes = ShapeArray.frombytes(buffer)
+        kinds = list(shapes.kinds)
+        styles = list(shapes.styles)
+        bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+        children = [
+            _TrackFeature(
+                blocks,
+                shape,
+                between_shape,
+                shapes.data[first:last],
+                kinds,
+                styles
+                )
+            for blocks, first, last in zip(track, bounds[:-1], bounds[1:])
+            ]
+        groups[name] = FeatureGroup._from_rows(
+            children,
+            lengths,
+            shapes,
+            name=name,
+            **kwargs
+            )
+    return groups
+
+
+def _layout_matrix(offset, by_axis):
+    """ Affine matrix that offsets a track and optionally swaps its axes. """
+    matrix = np.array([
+        [1., 0., 0.],
+        [0., 1., offset],
+        [0., 0., 1.]
+        ])
+    if by_axis == "y":
+        matrix = matrix[[1, 0, 2]]
+    return matrix
+
+
+def _layout_patches(collection):
+    """ Shape objects in data coordinates for a Feature or FeatureGroup. """
+    patches = list()
+    for patch in collection.shape_array:
+        patch.update(
+            offset=patch.offset + collection.offset,
+            by_axis=collection.by_axis
+            )
+        patches.append(patch)
+    return patches
+
+
+def _feature_meta(feature):
+    """ Description of a FeatureGroup child, stored by `tobytes`. """
+    if isinstance(feature, Shape):
+        return {"type": "Shape", "name": feature.name, "length": 1}
+    array, _ = _child_array(feature, stored=True)
+    return dict(feature._meta(), length=len(array))
+
+
+def _child_array(feature, stored=False):
+    """ ShapeArray and offset of a FeatureGroup child.
+
+    Objects that are not Shapes, Features or FeatureGroups have no rows.
+
+    Keyword arguments:
+    stored -- bool, the rows stored by `tobytes` rather than the rows
+        drawn, see `FeatureGroup._stored_rows`.
+    """
+    if isinstance(feature, _TrackFeature):
+        if feature.feature is None:
+            return feature.shape_array(), 0
+        feature = feature.feature
+
+    if isinstance(feature, Shape):
+        return ShapeArray.from_shapes([feature]), 0
+    elif isinstance(feature, FeatureGroup) and stored:
+        return feature._stored_rows(), feature.offset
+    elif isinstance(feature, (Feature, FeatureGroup)):
+        # Children are laid out along x, the group swaps the axes.
+        return feature.shape_array, feature.offset
+    return ShapeArray(), 0
+
+
+def _from_meta(shapes, meta):
+    """ Create a FeatureGroup child from its rows and `_feature_meta`. """
+    if meta["type"] == "Shape":
+        shape = shapes[0]
+        shape.name = meta["name"]
+        return shape
+    elif meta["type"] == "Feature":
+        return Feature._from_meta(shapes, meta)
+    elif meta["type"] == "FeatureGroup":
+        return FeatureGroup._from_meta(shapes, meta)
+    raise ValueError("Unknown feature type {}.".format(meta["type"]))
+
+
+def _child_extents(lengths, shapes):
+    """ Start and end of the rows of each FeatureGroup child, NaN if it has
+    no rows.
+
+    Keyword arguments:
+    lengths -- int array of the number of rows of each child.
+    shapes -- ShapeArray of the rows of the children, in order.
+    """
+    data = shapes.data
+    starts = np.full(len(lengths), np.nan)
+    ends = np.full(len(lengths), np.nan)
+
+    nonempty = lengths > 0
+    firsts = (np.cumsum(lengths) - lengths)[nonempty]
+    if len(firsts) > 0:
+        starts[nonempty] = np.minimum.reduceat(
+            np.minimum(data["start"], data["end"]),
+            firsts
+            )
+        ends[nonempty] = np.maximum.reduceat(
+            np.maximum(data["start"], data["end"]),
+            firsts
+            )
+    return starts, ends
+
+
+def _row_positions(offsets, rows):
+    """ Indices of the vertices of `rows` in a flat vertex array.
+
+    Keyword arguments:
+    offsets -- int array (N + 1, ), see `ShapeArray.flat_paths`.
+    rows -- sorted int array of rows.
+    """
+    counts = offsets[rows + 1] - offsets[rows]
+    firsts = np.repeat(offsets[rows] - np.cumsum(counts) + counts, counts)
+    return firsts + np.arange(counts.sum())
+
+
+def _template_transforms(offsets, scales):
+    """ Transforms stretching a template by `scales`, then moving it by
+    `offsets`, see `ShapeArray.instances`.
+
+    Returns:
+    float array (N, 3, 3).
+    """
+    transforms = np.zeros((len(offsets), 3, 3))
+    transforms[:, 0, 0] = scales[:, 0]
+    transforms[:, 1, 1] = scales[:, 1]
+    transforms[:, :2, 2] = offsets
+    transforms[:, 2, 2] = 1.
+    return transforms
+
+
+def _stack_geometry(stack, width):
+    """ Row spacing and scale across the features of a stacked track. """
+    if stack == "squished":
+        return width * SQUISHED, SQUISHED
+    elif stack == "collapsed":
+        return 0., 1.
+    return width, 1.
+
+
+def _set_style_props(collection, shapes):
+    """ Set the collection properties of each path from a ShapeArray.
+
+    Properties are looked up in the style palette of the ShapeArray by
+    fancy indexing. A property shared by every style in use is set once,
+    and broadcast by the collection, rather than once per path.
+    """
+    _set_palette_props(collection, shapes.palette(), shapes.data["style"])
+    return
+
+
+def _set_palette_props(collection, palette, index):
+    """ Set the collection properties of each path from a style palette.
+
+    Keyword arguments:
+    palette -- dict of arrays, see `feature_shapes._style_palette`.
+    index -- int array, the style of each path.
+    """
+    setters = {
+        "facecolors": collection.set_facecolor,
+        "edgecolors": collection.set_edgecolor,
+        "linewidths": collection.set_linewidth,
+        "linestyles": collection.set_linestyle,
+        "antialiaseds": collection.set_antialiased,
+        }
+
+    used = np.flatnonzero(
+        np.bincount(index, minlength=len(palette["linewidths"]))
+        )
+    for key, set_ in setters.items():
+        values = palette[key]
+        if _uniform(values[used]):
+            values = values[used[:1]]
+        else:
+            values = values[index]
+        set_(list(values) if values.dtype == object else values)
+    return
+
+
+def _link_ranges(by):
+    """ Names of the CrossLink ranges along and across the axes. """
+    if by == 'y':
+        return ("ax1_yrange", "ax2_yrange"), ("ax1_xrange", "ax2_xrange")
+    return ("ax1_xrange", "ax2_xrange"), ("ax1_yrange", "ax2_yrange")
+
+
+def _uniform(values):
+    """ Are all of the values in a palette array equal? """
+    if len(values) == 0:
+        return False
+    elif values.dtype == object:
+        return all(v == values[0] for v in values[1:])
+    return bool((values == values[0]).all())
 
 ################################## Classes ###################################
 
-class Feature(Collection):
+class _InstanceCollection(Collection):
+
+    """ Copies of a template path, each placed by an offset and stretched by
+    a scale, see `ShapeCollection.set_instanced`.
+    """
+
+    def __init__(self, template, scales, **kwargs):
+        """
+        Keyword arguments:
+        template -- Path.
+        scales -- float array (N, 2), stretch of each copy in x and y.
+        """
+        Collection.__init__(self, **kwargs)
+        self._paths = [template]
+
+        # One scale lets Agg draw the copies as markers.
+        if (scales == scales[0]).all():
+            scales = scales[:1]
+        self._transforms = np.zeros((len(scales), 3, 3))
+        self._transforms[:, 0, 0] = scales[:, 0]
+        self._transforms[:, 1, 1] = scales[:, 1]
+        self._transforms[:, 2, 2] = 1.
+        return
+
+
+class _TemplateCollection(Collection):
+
+    """ Paths each drawn with a transform of their own, e.g. a few template
+    paths shared by many rows, see `ShapeCollection._template_paths`.
+    """
+
+    def __init__(self, paths, transforms=None, **kwargs):
+        """
+        Keyword arguments:
+        paths -- list of Paths.
+        transforms -- None or float array (N, 3, 3), the transform of each
+            path, applied before the transform of the collection.
+        """
+        Collection.__init__(self, **kwargs)
+        self._paths = paths
+        if transforms is not None:
+            self._transforms = transforms
+        return
+
+
+class ShapeCollection(Collection):
+
+    """ Draws the rows of a ShapeArray without any Patch objects.
+
+    Keyword arguments are passed to `matplotlib.collections.Collection`.
+
+    The geometry and styles can be saved with `tobytes` and loaded, e.g. in
+    another process, with `frombytes`, without pickling matplotlib state.
+
+    Hit testing (`contains` and `rows_at`) uses an IntervalIndex of the
+    shapes, built when first needed, rather than testing every path.
+
+    With culling enabled (see `set_cull`) only the rows near the view of
+    the axes are drawn, found with the interval index when the limits of
+    the axes change, so drawing costs time in proportion to the shapes in
+    view. `get_paths` still returns the path of every row.
+
+    With level of detail enabled (see `set_lod`) the collection is drawn
+    from a simplified ShapeArray, recomputed when the zoom changes, with
+    curved and wave shapes sampled to suit the zoom. `get_paths` returns the
+    paths of the last draw.
+
+    The shapes are drawn as copies of a few template paths, one for each
+    kind of shape (see `ShapeArray.instances`), each copy placed by a
+    transform of its own. The copies are drawn in row order by a single
+    `draw_path_collection`, as `matplotlib.collections.Collection` draws a
+    path per row, without making a path per row. On axes with non-affine
+    transforms the shapes are drawn from their own vertices instead.
+
+    The vertices and codes of the shapes are held in one flat vertex array
+    and one codes array, see `ShapeArray.flat_paths`, made when first
+    needed, and the path of each shape in `get_paths` is a view of them.
+
+    With instancing enabled (see `set_instanced`) repeated glyphs are drawn
+    as copies of a template path, placed with Collection offsets.
+
+    Collections nested in FeatureGroups form a scene graph. Each node keeps
+    its own flattened rows, and a change to the rows or offset of a node
+    only marks its ancestors dirty, see `FeatureGroup._flush`.
+    """
+
+    def __init__(
+            self,
+            shapes=None,
+            lod=False,
+            cull=True,
+            instanced=False,
+            **kwargs
+            ):
+        """
+        Keyword arguments:
+        shapes -- ShapeArray.
+        lod -- bool, simplify shapes that are small on screen.
+        cull -- bool, only draw shapes near the view of the axes.
+        instanced -- bool, draw repeated glyphs as copies of one path.
+        """
+        if shapes is None:
+            shapes = ShapeArray()
+
+        self._parents = WeakSet()
+        self._shape_array = shapes
+        self._paths = None
+        self._stale_paths = True
+        self._own_paths = False
+        self._lod = lod
+        self._lod_scale = None
+        self._lod_shapes = None
+        self._cull = cull
+        self._cull_range = None
+        self._cull_rows = None
+        self._cull_shapes = None
+        self._cull_axes = None
+        self._cull_cids = list()
+        self._index = None
+        self._flat = None
+        self._templates = None
+        self._transformed = None
+        self._composite = None
+        self._instanced = instanced
+        self._instances = None
+
+        Collection.__init__(self, **kwargs)
+        self._set_props()
+        return
+
+    def __getstate__(self):
+        state = Collection.__getstate__(self)
+        # Weak references can't be pickled, FeatureGroups adopt their
+        # features again when unpickled.
+        state["_parents"] = None
+        state["_transformed"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._parents = WeakSet()
+        return
+
+    @property
+    def shape_array(self):
+        """ The ShapeArray holding the geometry of the collection. """
+        self._flush()
+        return self._shape_array
+
+    @shape_array.setter
+    def shape_array(self, shapes):
+        self._shape_array = shapes
+        self._invalidate()
+        self._set_props()
+        return
+
+    def _meta(self):
+        """ JSON serialisable properties stored by `tobytes`. """
+        return {"type": type(self).__name__}
+
+    @classmethod
+    def _from_meta(cls, shapes, meta, **kwargs):
+        """ Create a collection from a ShapeArray and `_meta`. """
+        return cls(shapes, **kwargs)
+
+    def tobytes(self):
+        """ Compact binary form of the collection, see `ShapeArray.tobytes`.
+        """
+        self._flush()
+        return self._shape_array.tobytes(meta=self._meta())
+
+    @classmethod
+    def frombytes(cls, buffer, **kwargs):
+        """ Load a collection saved by `tobytes`.
+
+        The geometry is a read only view of `buffer`, without copying.
+
+        Keyword arguments:
+        kwargs -- passed to the constructor, e.g. Collection properties.
+        """
+        shapes, meta = ShapeArray._unpack(buffer)
+        return cls._from_meta(shapes, meta, **kwargs)
+
+    @property
+    def paths(self):
+        self._flush()
+        if self._stale_paths:
+            self._set_paths()
+        return self._paths
+
+    @paths.setter
+    def paths(self, paths):
+        # Paths set from outside are drawn instead of the templates.
+        self._paths = paths
+        self._stale_paths = False
+        self._own_paths = True
+        return
+
+    def _invalidate(self, geometry=True):
+        """ Recompute the paths when they are next needed.
+
+        Call this after editing the ShapeArray in place.
+
+        Keyword arguments:
+        geometry -- bool, the rows changed, so rebuild the interval index.
+        """
+        if geometry:
+            self._index = None
+            self._cull_range = None
+            self._cull_rows = None
+            self._cull_shapes = None
+            self._changed()
+        self._stale_paths = True
+        self._own_paths = False
+        self._flat = None
+        self._templates = None
+        self._transformed = None
+        self._instances = None
+        self._lod_scale = None
+        self._lod_shapes = None
+        self.stale = True
+        return
+
+    def _changed(self):
+        """ Tell the FeatureGroups holding the collection that its rows or
+        offset changed.
+        """
+        for parent in list(self._parents):
+            parent._child_changed(self)
+        return
+
+    def _flush(self):
+        """ Bring the rows up to date with any changed children. """
+        return
+
+    def get_paths(self):
+        """ alias for paths property """
+        return self.paths
+
+    def get_datalim(self, transData):
+        # Measured from the templates, without making the path of each row.
+        if not self._templated():
+            return Collection.get_datalim(self, transData)
+        paths, transforms = self._template_paths()
+        collection = self._path_collection(
+            self.get_transform(),
+            paths,
+            transforms=transforms
+            )
+        return collection.get_datalim(transData)
+
+    def set_paths(self, paths):
+        """ alias for paths.setter """
+        self.paths = paths
+        return
+
+    def _compose(self, layout):
+        """ The transform `layout` followed by the transform of the
+        collection.
+
+        The composite is kept while the transform of the collection is the
+        same object, so that caches keyed on the transform, see
+        `_transformed_paths`, last between draws.
+        """
+        transform = Collection.get_transform(self)
+        if self._composite is None or self._composite[0] is not transform:
+            self._composite = (transform, layout + transform)
+        return self._composite[1]
+
+    def _visible_shapes(self):
+        """ The ShapeArray near the view if culled, else all of it. """
+        if self._cull_rows is None:
+            return self._shape_array
+        if self._cull_shapes is None:
+            self._cull_shapes = self._shape_array.take(self._cull_rows)
+        return self._cull_shapes
+
+    def _drawn_shapes(self):
+        """ The ShapeArray of the paths, the shapes near the view simplified
+        if lod is enabled, else all of the shapes.
+        """
+        if self._lod_shapes is not None:
+            return self._lod_shapes
+        return self._shape_array
+
+    def _set_paths(self):
+        vertices, _, _ = self._flat_paths()
+        self._paths = self._row_paths(vertices)
+        self._stale_paths = False
+        return
+
+    def _set_props(self):
+        _set_style_props(self, self._drawn_shapes())
+        return
+
+    def get_lod(self):
+        return self._lod
+
+    def set_lod(self, lod):
+        """ Enable level of detail drawing, see `ShapeArray.level_of_detail`.
+        """
+        self._lod = lod
+        self._invalidate(geometry=False)
+        self._set_props()
+        return
+
+    def _lod_scale_now(self):
+        """ Pixels per data unit along the length of the shapes. """
+        data = self._shape_array.data
+
+        # Measure near the middle of the shapes, in case of log scales.
+        middle = np.median(data["start"]) if len(data) > 0 else 0.
+        if self._shape_array.by_axis == "y":
+            points = [[0., middle], [0., middle + 1.]]
+        else:
+            points = [[middle, 0.], [middle + 1., 0.]]
+
+        (x0, y0), (x1, y1) = self.get_transform().transform(points)
+        return np.hypot(x1 - x0, y1 - y0)
+
+    def _update_lod(self):
+        """ Simplify the shapes if the zoom changed since the last draw. """
+        scale = self._lod_scale_now()
+        if scale == self._lod_scale:
+            return
+        shapes = self._visible_shapes().level_of_detail(scale)
+        self._invalidate(geometry=False)
+        self._lod_scale = scale
+        self._lod_shapes = shapes
+        self._set_props()
+        return
+
+    def get_cull(self):
+        return self._cull
+
+    def set_cull(self, cull):
+        """ Only draw the shapes near the view of the axes. """
+        self._cull = cull
+        self._cull_range = None
+        self._cull_rows = None
+        self._cull_shapes = None
+        self._instances = None
+        if self._lod:
+            self._invalidate(geometry=False)
+            self._set_props()
+        self.stale = True
+        return
+
+    def get_instanced(self):
+        return self._instanced
+
+    def set_instanced(self, instanced):
+        """ Draw the shapes as copies of a few template paths, see
+        `ShapeArray.instances`.
+
+        Each template is drawn once with the offset and scale of every
+        shape using it, by a matplotlib Collection, so repeated glyphs,
+        e.g. SNP ticks, don't need vertices of their own. A single template
+        with one style is drawn as markers, rendered once by Agg and placed
+        at whole pixels. Many glyphs under a pixel each are drawn faster
+        with `set_lod`.
+        """
+        self._instanced = instanced
+        self.stale = True
+        return
+
+    def _view_range(self):
+        """ Range along the length of the shapes shown by the axes. """
+        corners = self.get_transform().inverted().transform(
+            self.axes.bbox.corners()
+            )
+        if self._shape_array.by_axis == "y":
+            along = corners[:, 1]
+        else:
+            along = corners[:, 0]
+        return along.min(), along.max()
+
+    def _connect_view(self):
+        """ Cull again whenever the limits of the axes change. """
+        if self._cull_axes is self.axes:
+            return
+        if self._cull_axes is not None:
+            for cid in self._cull_cids:
+                self._cull_axes.callbacks.disconnect(cid)
+
+        self._cull_axes = self.axes
+        self._cull_cids = [
+            self.axes.callbacks.connect(signal, self._on_limits_changed)
+            for signal in ("xlim_changed", "ylim_changed")
+            ]
+        return
+
+    def _on_limits_changed(self, axes):
+        if self._cull and axes is self.axes:
+            self._update_cull()
+        return
+
+    def _update_cull(self):
+        """ Cull the shapes if the view left the culled range.
+
+        The culled range is the view plus a margin, and the rows in it are
+        found with the interval index, so this costs time in proportion to
+        the shapes near the view. The paths are kept, and the culled rows
+        picked from them when drawn, see `_draw_rows`.
+        """
+        if self.axes is None:
+            return
+        self._connect_view()
+        self._flush()
+
+        low, high = self._view_range()
+        if not np.isfinite([low, high]).all():
+            return
+        elif self._cull_range is not None:
+            cull_low, cull_high = self._cull_range
+            if (cull_low <= low and high <= cull_high and
+                    cull_high - cull_low <= CULL_ZOOM * (high - low)):
+                return
+
+        margin = (high - low) * CULL_MARGIN
+        self._cull_range = (low - margin, high + margin)
+        rows = np.sort(self._interval_index().overlap(*self._cull_range))
+        if len(rows) == len(self._shape_array):
+            rows = None
+        if rows is None and self._cull_rows is None:
+            return
+
+        self._cull_rows = rows
+        self._cull_shapes = None
+        self._instances = None
+        if self._lod:
+            # The simplified shapes are made from the culled rows.
+            self._invalidate(geometry=False)
+            self._set_props()
+        self.stale = True
+        return
+
+    def _rows_added(self, start):
+        """ Update after appending rows from `start` to the ShapeArray.
+
+        Unlike `_invalidate`, the interval index is kept, if built, and the
+        new rows inserted into it.
+        """
+        index = self._index
+        self._invalidate()
+        if index is not None:
+            data = self._shape_array.data[start:]
+            index.insert(
+                np.minimum(data["start"], data["end"]),
+                np.maximum(data["start"], data["end"]),
+                ids=np.arange(start, len(self._shape_array))
+                )
+            self._index = index
+        self._set_props()
+        return
+
+    def _rows_changed(self, start, stop, moved=True, restyled=True):
+        """ Update after rewriting rows `start` to `stop` of the ShapeArray
+        in place, without changing the number of rows.
+
+        Unlike `_invalidate`, the paths of the other rows are kept. The
+        paths view the flat vertices, see `_row_paths`, so rows drawn with
+        as many vertices and the same codes as before are rewritten there,
+        and the templates and transforms of the rows are replaced.
+
+        Keyword arguments:
+        moved -- bool, the rows moved along their length, so update the
+            interval index and cull again.
+        restyled -- bool, the styles of the rows changed.
+        """
+        self._changed()
+        if moved:
+            self._cull_range = None
+            self._cull_rows = None
+            self._cull_shapes = None
+            if self._index is not None:
+                data = self._shape_array.data[start:stop]
+                ids = np.arange(start, stop)
+                self._index.remove(ids)
+                self._index.insert(
+                    np.minimum(data["start"], data["end"]),
+                    np.maximum(data["start"], data["end"]),
+                    ids=ids
+                    )
+
+        self._transformed = None
+        self._instances = None
+        self.stale = True
+        if self._lod:
+            self._invalidate(geometry=False)
+        else:
+            shapes = self._shape_array.take(slice(start, stop))
+            self._rewrite_flat(start, stop, shapes)
+            self._rewrite_templates(start, shapes)
+
+        # With lod, the paths are of every row until the next draw.
+        if restyled or self._lod:
+            self._set_props()
+        return
+
+    def _rewrite_flat(self, start, stop, shapes):
+        """ Write the vertices of `shapes` over rows `start` to `stop` of the
+        flat vertices, or drop them if the rows have other codes.
+        """
+        if self._flat is None:
+            return
+        vertices, codes, offsets = self._flat
+        first, last = offsets[start], offsets[stop]
+        new_vertices, new_codes, new_offsets = shapes.flat_paths()
+        if (np.array_equal(offsets[start:stop + 1] - first, new_offsets)
+                and np.array_equal(codes[first:last], new_codes)):
+            vertices[first:last] = new_vertices
+        else:
+            self._flat = None
+            self._stale_paths = True
+        return
+
+    def _rewrite_templates(self, start, shapes):
+        """ Replace the templates and transforms of the rows from `start`
+        with those of `shapes`.
+        """
+        if self._templates is None:
+            return
+        paths, transforms = self._templates
+        for index, template, offsets, scales in shapes.instances():
+            rows = start + index
+            for row in rows.tolist():
+                paths[row] = template
+            transforms[rows] = _template_transforms(offsets, scales)
+        return
+
+    def _interval_index(self):
+        """ IntervalIndex of the rows along the length of the shapes. """
+        self._flush()
+        if self._index is None:
+            data = self._shape_array.data
+            self._index = IntervalIndex(
+                np.minimum(data["start"], data["end"]),
+                np.maximum(data["start"], data["end"])
+                )
+        return self._index
+
+    def rows_at(self, along, across=None, tolerance=0):
+        """ Rows of the ShapeArray whose bounding boxes contain a point.
+
+        Keyword arguments:
+        along -- position along the length of the shapes.
+        across -- None or position across the shapes, compared with the
+            offset and width of each row.
+        tolerance -- distance along the shapes to count as a hit.
+
+        Returns:
+        int array -- row indices, sorted by start.
+        """
+        rows = self._interval_index().overlap(
+            along - tolerance,
+            along + tolerance
+            )
+        if across is not None and len(rows) > 0:
+            data = self._shape_array.data[rows]
+            lows = data["offset"] + np.minimum(data["width"], 0)
+            highs = data["offset"] + np.maximum(data["width"], 0)
+            rows = rows[(lows <= across) & (across <= highs)]
+        return rows
+
+    def contains(self, mouseevent):
+        """ Test whether the mouse event is over any of the shapes.
+
+        Shapes are hit if their bounding box, widened by the pick radius
+        along the length of the shapes, contains the event.
+
+        Returns:
+        bool, dict(ind=rows) -- rows of the ShapeArray that were hit.
+        """
+        if self._different_canvas(mouseevent) or not self.get_visible():
+            return False, {}
+
+        pickradius = (
+            float(self._picker)
+            if isinstance(self._picker, Number) and self._picker is not True
+            else self.get_pickradius()
+            )
+        scale = self._lod_scale_now()
+        tolerance = pickradius / scale if scale > 0 else 0.
+
+        x, y = self.get_transform().inverted().transform(
+            [mouseevent.x, mouseevent.y]
+            )
+        if self._shape_array.by_axis == "y":
+            x, y = y, x
+
+        rows = self.rows_at(x, y, tolerance)
+        return len(rows) > 0, dict(ind=rows)
+
+    def _flat_paths(self):
+        """ Vertices, codes and row offsets of the drawn shapes, see
+        `ShapeArray.flat_paths`.
+        """
+        if self._flat is None:
+            # With lod, curved shapes are also sampled to suit the zoom.
+            self._flat = self._drawn_shapes().flat_paths(self._lod_scale)
+        return self._flat
+
+    def _row_paths(self, vertices):
+        """ A Path of each drawn row, viewing `vertices`, e.g. the flat
+        vertices, and the flat codes, without copying them.
+        """
+        _, codes, offsets = self._flat_paths()
+        bounds = offsets.tolist()
+        return [
+            Path(vertices[first:last], codes[first:last])
+            for first, last in zip(bounds[:-1], bounds[1:])
+            ]
+
+    def _templated(self):
+        """ Are the rows drawn as copies of templates, see `_template_paths`,
+        rather than from paths of their own?
+        """
+        return (self.get_transform().is_affine and not self._own_paths and
+                len(self.get_transforms()) == 0 and not self.have_units())
+
+    def _template_paths(self):
+        """ The drawn rows as copies of template paths, see
+        `ShapeArray.instances`.
+
+        Returns:
+        paths -- list with the template Path of each row, shared by every
+            row of the template.
+        transforms -- float array (N, 3, 3), the transform stretching and
+            placing the template of each row.
+        """
+        if self._templates is None:
+            shapes = self._drawn_shapes()
+            templates = list()
+            ids = np.zeros(len(shapes), dtype=np.int64)
+            transforms = np.zeros((len(shapes), 3, 3))
+            for index, template, offsets, scales in shapes.instances(
+                    self._lod_scale):
+                ids[index] = len(templates)
+                templates.append(template)
+                transforms[index] = _template_transforms(offsets, scales)
+            paths = [templates[i] for i in ids.tolist()]
+            self._templates = (paths, transforms)
+        return self._templates
+
+    def _transformed_paths(self):
+        """ The paths with the non-affine part of the transform applied, and
+        the affine part of the transform to draw them with.
+
+        The transformed paths are cached, and only made again when the
+        geometry or the non-affine part of the transform change, e.g. not
+        when the figure is redrawn, panned or zoomed on linear axes.
+        Invalidation of the transform is tracked by a matplotlib
+        TransformedPath of the flat vertices.
+        """
+        transform = self.get_transform()
+        if transform.is_affine:
+            return transform, self.paths
+
+        if self._transformed is None or self._transformed[0] is not transform:
+            vertices, codes, _ = self._flat_paths()
+            transformed = TransformedPath(Path(vertices, codes), transform)
+            self._transformed = (transform, transformed, None, None)
+        _, transformed, points, paths = self._transformed
+
+        new_points, affine = transformed.get_transformed_points_and_affine()
+        if new_points is not points:
+            paths = self._row_paths(new_points.vertices)
+            self._transformed = (transform, transformed, new_points, paths)
+        return affine, paths
+
+    def _draw_rows(self):
+        """ Rows of the paths to draw, those near the view if culled, or None
+        to draw all of them.
+
+        The culled rows are drawn without the others unless the paths have
+        offsets, urls, transforms or dashes of their own, which can't be
+        picked out by row.
+        """
+        rows = self._cull_rows
+        if rows is None or self._lod or self._own_paths:
+            # Lod shapes are already made from the culled rows, and paths
+            # given to `set_paths` aren't picked out by row.
+            return None
+
+        n = len(self._drawn_shapes())
+        linestyles = self.get_linestyle()
+        own = [
+            self.get_offsets(),
+            self.get_urls(),
+            self.get_transforms(),
+            linestyles,
+            ]
+        dashed = any(dashes is not None for _, dashes in linestyles)
+        if any(len(values) == n > 1 for values in own[:3]):
+            return None
+        elif dashed and len(linestyles) == n > 1:
+            return None
+        return rows
+
+    def _row_props(self, rows=None):
+        """ Colours, line widths and antialiasing of the paths, mapped from
+        the array if one is set.
+
+        Keyword arguments:
+        rows -- None or int array, only the properties of these rows.
+
+        Returns:
+        dict -- Collection properties, each of one value or a value for
+            every row.
+        """
+        self.update_scalarmappable()
+        props = {
+            "facecolors": self.get_facecolor(),
+            "edgecolors": self.get_edgecolor(),
+            "linewidths": np.asarray(self.get_linewidth()),
+            "antialiaseds": np.asarray(self.get_antialiased()),
+            }
+        if self.get_hatch() is not None:
+            props["hatchcolor"] = self.get_hatchcolor()
+        if rows is None:
+            return props
+
+        n = len(self._drawn_shapes())
+        props = {
+            key: value[rows] if len(value) == n > 1 else value
+            for key, value in props.items()
+            }
+        if len(self.get_linestyle()) > 1:
+            # Only solid paths are drawn by row, see `_draw_rows`.
+            props["linestyles"] = ["solid"]
+        return props
+
+    def _path_collection(self, transform, paths, rows=None, transforms=None):
+        """ A _TemplateCollection of `paths`, drawn with `transform` and the
+        properties of this collection.
+
+        Keyword arguments:
+        rows -- None or int array, only draw these rows of `paths`.
+        transforms -- None or float array (N, 3, 3), the transform of each
+            of `paths`, see `_template_paths`, else the transforms of this
+            collection.
+        """
+        if transforms is None:
+            transforms = self.get_transforms()
+        elif rows is not None:
+            transforms = transforms[rows]
+        if rows is not None:
+            paths = [paths[row] for row in rows.tolist()]
+
+        collection = _TemplateCollection(paths, transforms)
+        collection.update_from(self)
+        collection.set_figure(self.get_figure(root=True))
+        collection.set(
+            transform=transform,
+            offsets=self.get_offsets(),
+            offset_transform=self.get_offset_transform(),
+            urls=self.get_urls(),
+            snap=self.get_snap(),
+            gid=self.get_gid(),
+            hatch_linewidth=self.get_hatch_linewidth(),
+            )
+        if self.get_joinstyle() is not None:
+            collection.set_joinstyle(self.get_joinstyle())
+        if self.get_capstyle() is not None:
+            collection.set_capstyle(self.get_capstyle())
+        if rows is not None:
+            # The colours are already mapped, for the drawn rows only.
+            collection.set_array(None)
+            collection.set(**self._row_props(rows))
+        return collection
+
+    def _instance_collection(self, template, offsets, scales, **props):
+        """ An _InstanceCollection drawn like this collection.
+
+        Keyword arguments:
+        template -- Path in the coordinates of the shapes.
+        offsets, scales -- float arrays (N, 2), see `ShapeArray.instances`.
+        props -- Collection properties, e.g. facecolors.
+        """
+        # Templates are stretched in data units, then placed by offsets.
+        transform = self.get_transform()
+        linear = transform.get_matrix().copy()
+        linear[:2, 2] = 0.
+
+        collection = _InstanceCollection(template, scales)
+        collection.update_from(self)
+        collection.set_figure(self.get_figure(root=True))
+        collection.set(
+            transform=Affine2D(linear),
+            offsets=offsets,
+            offset_transform=transform,
+            **props
+            )
+        return collection
+
+    def _instance_collections(self, rows=None):
+        """ An _InstanceCollection for each template of the drawn shapes, or
+        None if there are too many templates.
+
+        Keyword arguments:
+        rows -- None or int array, the culled rows, see `_draw_rows`.
+        """
+        if rows is None:
+            shapes = self._drawn_shapes()
+        else:
+            shapes = self._visible_shapes()
+
+        if self._instances is None or self._instances[0] is not rows:
+            self._instances = (rows, list(shapes.instances(self._lod_scale)))
+        instances = self._instances[1]
+        if len(instances) > INSTANCE_TEMPLATES:
+            return None
+
+        n = len(shapes)
+        props = self._row_props(rows)
+        return [
+            self._instance_collection(template, offsets, scales, **{
+                key: value[index] if len(value) == n > 1 else value
+                for key, value in props.items()
+                })
+            for index, template, offsets, scales in instances
+            ]
+
+    @allow_rasterization
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        self._flush()
+        if self._cull:
+            self._update_cull()
+        if self._lod:
+            self._update_lod()
+        rows = self._draw_rows()
+        if len(self._drawn_shapes()) == 0 or (
+                rows is not None and len(rows) == 0):
+            self.stale = False
+            return
+
+        if (self._instanced and self.get_transform().is_affine and
+                self.get_array() is None and not self.have_units()):
+            collections = self._instance_collections(rows)
+            if collections is not None:
+                renderer.open_group(type(self).__name__, self.get_gid())
+                for collection in collections:
+                    collection.draw(renderer)
+                renderer.close_group(type(self).__name__)
+                self.stale = False
+                return
+
+        if self._templated():
+            paths, transforms = self._template_paths()
+            collection = self._path_collection(
+                self.get_transform(),
+                paths,
+                rows,
+                transforms
+                )
+        else:
+            transform, paths = self._transformed_paths()
+            if rows is None and transform is self.get_transform():
+                Collection.draw(self, renderer)
+                return
+            # Non-affine transforms are drawn from the cached paths.
+            collection = self._path_collection(transform, paths, rows)
+        collection.draw(renderer)
+        self.stale = False
+        return
+
+
+class Feature(ShapeCollection):
 
     """ Groups shapes into features so that they stay together
-    in stacked tracks. """
+    in stacked tracks.
+
+    The geometry of the blocks is held in a ShapeArray rather than one
+    Patch per block. The `patches` property creates Shape objects on
+    demand.
+
+    The offset and by_axis of the feature are applied by an affine
+    layout transform, so changing them does not touch the geometry.
+    """
 
     def __init__(
             self,
@@ -76,11 +1543,14 @@ class Feature(Collection):
         self._by_axis = by_axis
         self._name = name
 
-        self._paths = None
-        self._patches = None
+        self._layout_transform = Affine2D()
 
-        Collection.__init__(self, **kwargs)
-        self._draw_patches()
+        ShapeCollection.__init__(self, **kwargs)
+        self._draw_layout()
+        # Rows already laid out, e.g. by `build_tracks`, may be passed as
+        # the shapes kwarg of ShapeCollection.
+        if kwargs.get("shapes") is None:
+            self._draw_patches()
         return
 
     @property
@@ -90,6 +1560,7 @@ class Feature(Collection):
     @blocks.setter
     def blocks(self, blocks):
         self._blocks = blocks
+        self._draw_patches()
 
     @property
     def strand(self):
@@ -98,9 +1569,10 @@ class Feature(Collection):
     @strand.setter
     def strand(self, strand):
         self._strand = strand
-        for patch in self.patches:
-            if patch.strand is not None:
-                patch.strand = strand
+        self._shape_array._writable()
+        strands = self._shape_array.data["strand"]
+        strands[strands != 0] = 0 if strand is None else strand
+        self._invalidate()
 
     @property
     def offset(self):
@@ -109,9 +1581,7 @@ class Feature(Collection):
     @offset.setter
     def offset(self, offset):
         self._offset = offset
-        if offset != 0:
-            for patch in self.patches:
-                patch.offset += offset
+        self._draw_layout()
 
     @property
     def by_axis(self):
@@ -120,10 +1590,7 @@ class Feature(Collection):
     @by_axis.setter
     def by_axis(self, by_axis):
         self._by_axis = by_axis
-        if by_axis is not None:
-            for patch in self.patches:
-                if patch.by_axis is not None:
-                    patch.by_axis = by_axis
+        self._draw_layout()
 
     @property
     def shape(self):
@@ -145,160 +1612,128 @@ class Feature(Collection):
 
     @property
     def patches(self):
-        return self._patches
-
-    @patches.setter
-    def patches(self, patches):
-        self._patches = patches
-        self._set_paths()
-        self._set_props()
-        return
-
-    @property
-    def paths(self):
-        return self._paths
-
-    @paths.setter
-    def paths(self, paths):
-        self._paths = paths
-        return
-
-    def get_paths(self):
-        """ alias for paths property """
-        return self.paths
-
-    def set_paths(self, paths):
-        """ alias for paths.setter """
-        self.paths = paths
-        return
-
-    def _set_paths(self):
-        self.paths = [
-            p.get_transform().transform_path(p.get_path())
-            for p in self.patches
-            ]
-        return
-
-    def _set_props(self):
-
-        def determine_facecolor(patch):
-            if patch.get_fill():
-                return patch.get_facecolor()
-            return [0, 0, 0, 0]
-
-        props = defaultdict(list)
-        valid = {
-            "facecolors": (self.set_facecolor, determine_facecolor),
-            "edgecolors": (self.set_edgecolor, Patch.get_edgecolor),
-            "linewidths": (self.set_linewidth, Patch.get_linewidth),
-            "linestyles": (self.set_linestyle, Patch.get_linestyle),
-            "antialiaseds": (self.set_antialiased, Patch.get_antialiased),
-            }
-
-        for p in self.patches:
-            for key, (set_, get) in valid.items():
-                props[key].append(get(p))
-
-        for key, (set_, get) in valid.items():
-            set_(props[key])
-        return
-
-    def _draw_patches(self):
-        start = 0
-        end = None
+        """ New Shape objects for each block, created on demand. """
+        return _layout_patches(self)
 
-        patches = list()
+    @patches.setter
+    def patches(self, patches):
+        shapes = ShapeArray.from_shapes(patches)
+        shapes.data["offset"] -= self.offset
+        self.shape_array = shapes
+        return
 
-        length_blocks = len(self.blocks)
+    def _meta(self):
+        return {
+            "type": "Feature",
+            "blocks": [list(block) for block in self.blocks],
+            "strand": self.strand,
+            "offset": self.offset,
+            "by_axis": self.by_axis,
+            "name": self._name,
+            }
 
-        # Draw the between shapes first
-        between_shape_pos = 0
-        between_blocks = []
-        if self.between_shape is not None:
-            between_blocks = list(zip(
-                range(0, length_blocks - 1),
-                range(1, length_blocks)
-                ))
-        length_between_blocks = len(between_blocks)
-
-        # Note that if between shape is none there is nothing to iterate over.
-        for h, (i, j) in enumerate(between_blocks):
-            first = self.blocks[i]
-            second = self.blocks[j]
-            min_dist = min([(0, 0), (0, 1), (1, 0), (1, 1)],
-                key=lambda t: abs(second[t[0]] - first[t[1]])
-                )
-            start = first[min_dist[1]]
-            end = second[min_dist[0]]
-
-            strand_first = None
-            strand_second = None
-            try:
-                strand_first = first[2]
-                strand_second = second[2]
-            except:
-                pass
-
-            if strand_first == strand_second:
-                strand = strand_first
-            else:
-                strand = None
+    @classmethod
+    def _from_meta(cls, shapes, meta, **kwargs):
+        # Shape factories are not stored. They are only needed to redraw
+        # the blocks, so may be passed again as kwargs.
+        return cls(
+            blocks=[tuple(block) for block in meta["blocks"]],
+            strand=meta["strand"],
+            offset=meta["offset"],
+            by_axis=meta["by_axis"],
+            name=meta["name"],
+            shapes=shapes,
+            **kwargs
+            )
+
+    def _draw_layout(self):
+        """ Update the layout transform from the offset and by_axis. """
+        self._layout_transform.set_matrix(
+            _layout_matrix(self._offset, self._by_axis)
+            )
+        self._changed()
+        self.stale = True
+        return
 
-            if len(self.between_shape) > 1 and h + 1 == length_between_blocks:
-                between_shape_pos = -1
+    def get_layout_transform(self):
+        """ Affine transform applying the offset and by_axis. """
+        return self._layout_transform
 
-            patches.append(self.between_shape[between_shape_pos](
-                start=start,
-                end=end,
-                strand=None
-                ))
+    def get_transform(self):
+        return self._compose(self._layout_transform)
 
-            if len(self.between_shape) > 2:
-                between_shape_pos = 1
+    def _row_block(self, row):
+        """ The block drawn by a row, or None for a shape between blocks. """
+        # The shapes between blocks are added first, see `_draw_patches`.
+        block = row - (len(self.shape_array) - len(self.blocks))
+        if 0 <= block < len(self.blocks):
+            return self.blocks[block]
+        return None
 
-        # Now do the blocks
-        shape_pos = 0
+    def _row_hit(self, row):
+        return self, self._row_block(row)
 
-        for i, block in enumerate(self.blocks):
-            if len(self.shape) > 1 and i + 1 == length_blocks:
-                shape_pos = -1
+    def contains(self, mouseevent):
+        """ Test whether the mouse event is over the feature.
 
-            start = block[0]
-            end = block[1]
+        Returns:
+        bool, dict(ind=rows, blocks=blocks) -- the blocks that were hit,
+            None for shapes between blocks.
+        """
+        inside, info = ShapeCollection.contains(self, mouseevent)
+        if inside:
+            info["blocks"] = [self._row_block(row) for row in info["ind"]]
+        return inside, info
 
-            strand = None
-            try:
-                strand = block[2]
-            except:
-                pass
+    def _draw_patches(self):
+        """ Lay out the blocks, see `layout_blocks`. """
+        self.shape_array = layout_blocks(
+            self.blocks,
+            self.shape,
+            self.between_shape
+            )
+        return
 
-            patches.append(self.shape[shape_pos](
-                start=start,
-                end=end,
-                strand=strand
-                ))
 
-            if len(self.shape) > 2:
-                shape_pos = 1
+class FeatureGroup(ShapeCollection):
 
-        if self.offset != 0:
-            for patch in patches:
-                patch.offset += self.offset
+    """ Generic collection for genomic tracks.
 
-        self._patches = patches
-        self._set_paths()
-        self._set_props()
-        return
+    Features under the mouse are found with an interval index, see
+    `contains` and `features_at`.
 
+    Stacked tracks pack overlapping features into rows, see `stack` and
+    `pack_intervals`. The rows of the features are concatenated once, so
+    changing the stack mode, max_rows or stack_range only rewrites their
+    offsets.
 
-class FeatureGroup(Collection):
+    Features can be added, removed and updated by their stable `ids`
+    without rebuilding the rows of the other features, which are patched
+    in place.
 
-    """ Generic collection for genomic tracks.
+    Zoomed out tracks can draw a summary of the features instead of the
+    features, see `density` and `DensityPyramid`.
 
     Methods
     -------
+    add
+        Add features after the others.
+    remove
+        Remove features by id.
+    update_feature
+        Set attributes of a feature and redraw it.
+    ids
+        The stable id of each feature.
     stack
         Determines how to stack features in a track
+    rows
+        The row of each feature in a stacked track.
+    overflow
+        Features that did not fit in max_rows.
+    features_at
+        The features and blocks at a point.
+    density_pyramid
+        Binned summaries of the features.
     """
 
     def __init__(
@@ -309,35 +1744,417 @@ class FeatureGroup(Collection):
             stack=None,
             by_axis=None,
             name=None,
+            max_rows=None,
+            stack_range=None,
+            density=None,
+            density_style="bars",
             **kwargs
             ):
-        """ . """
-        self._features = features
+        """
+        Keyword arguments:
+        features -- sequence of Feature, FeatureGroup or Shape objects.
+        width -- width of each row of a stacked track.
+        offset -- offset of the track across the axis.
+        stack -- one of STACK_MODES. None draws each feature at its own
+            offset, "expanded" packs overlapping features into rows,
+            "squished" packs them into narrower rows, and "collapsed"
+            draws every feature in one row.
+        by_axis -- "y" to draw the track along the y axis.
+        name -- name of the track.
+        max_rows -- None or the maximum number of rows of a stacked track.
+            Features that don't fit are not drawn, see `overflow`.
+        stack_range -- None, (low, high) or "view". Only stack and draw
+            the features overlapping this range. "view" is the range shown
+            by the axes, and the features in view are packed again
+            whenever the limits of the axes change.
+        density -- None or a length. Views of the axes longer than this
+            draw the density of the features instead of the features.
+        density_style -- one of DENSITY_STYLES. "bars" draws the number
+            of features in each bin, "heat" colours each bin by the
+            fraction of its bases covered, with the cmap of the group.
+        """
+        if stack not in STACK_MODES:
+            raise ValueError("Unknown stack mode {!r}.".format(stack))
+        if density_style not in DENSITY_STYLES:
+            raise ValueError(
+                "Unknown density style {!r}.".format(density_style)
+                )
+
+        self._features = list(features)
+        self._next_id = 0
+        self._ids = self._new_ids(len(self._features))
         self._width = width
         self._stack = stack
         self._by_axis = by_axis
         self._offset = offset
+        self._max_rows = max_rows
+        self._stack_range = stack_range
+        self._stacked_view = None
+        self._rows = None
+        self._stack_base = None
+        self._dirty = dict()
+        self._positions = None
+        self._density = density
+        self._density_style = density_style
+        self._pyramid = None
         self.name = name
 
-        self._patches = None
-        self._paths = None
-
+        self._layout_transform = Affine2D()
 
-        Collection.__init__(self, **kwargs)
+        ShapeCollection.__init__(self, **kwargs)
+        self._draw_layout()
         self._draw_patches()
         return
 
     @property
     def features(self):
+        if any(isinstance(f, _TrackFeature) for f in self._features):
+            self._features = [self._child_feature(f) for f in self._features]
+            self._positions = None
         return self._features
 
     @features.setter
     def features(self, features):
         """ . """
-        self._features = features
+        self._disown(self._features)
+        self._features = list(features)
+        self._ids = self._new_ids(len(self._features))
         self._draw_patches()
         return
 
+    @property
+    def ids(self):
+        """ The id of each of `features`, used by `remove` and
+        `update_feature`.
+
+        Ids increase in the order features are added, and are kept until
+        the feature is removed or `features` is set.
+        """
+        return list(self._ids)
+
+    def _new_ids(self, n):
+        """ Ids for n new features, see `ids`. """
+        ids = list(range(self._next_id, self._next_id + n))
+        self._next_id += n
+        return ids
+
+    def _find_ids(self, ids):
+        """ Positions in `features` of the features with some ids.
+
+        The ids are sorted, so each is found by bisection.
+
+        Keyword arguments:
+        ids -- int or sequence of ints.
+        """
+        positions = list()
+        for id_ in np.atleast_1d(ids).tolist():
+            i = bisect_left(self._ids, id_)
+            if i == len(self._ids) or self._ids[i] != id_:
+                raise KeyError("Unknown feature id {!r}.".format(id_))
+            positions.append(i)
+        return positions
+
+    def add(self, features):
+        """ Add features after the others.
+
+        The rows of the new features are appended in place, growing the
+        buffer geometrically, so adding k features costs O(k) amortised,
+        plus restacking a stacked track.
+
+        Keyword arguments:
+        features -- sequence of Feature, FeatureGroup or Shape objects.
+
+        Returns:
+        list -- the ids of the new features, see `ids`.
+        """
+        self._flush()
+        features = list(features)
+        end = len(self._features)
+        self._splice_features([(end, end, features)])
+        ids = self._new_ids(len(features))
+        self._ids.extend(ids)
+        return ids
+
+    def remove(self, ids):
+        """ Remove features by id.
+
+        The rows of the later features are moved up in place, in one pass
+        over the rows, and the paths are made again when next drawn.
+
+        Keyword arguments:
+        ids -- int or sequence of ints, see `ids`.
+        """
+        self._flush()
+        remove = np.zeros(len(self._features), dtype=bool)
+        remove[self._find_ids(ids)] = True
+        self._disown([f for f, r in zip(self._features, remove) if r])
+        self._features = [f for f, r in zip(self._features, remove) if not r]
+        self._ids = [i for i, r in zip(self._ids, remove) if not r]
+        self._positions = None
+
+        children, lengths, shapes = self._child_rows()
+        shapes.delete(_row_positions(
+            np.concatenate([[0], np.cumsum(lengths)]),
+            np.flatnonzero(remove)
+            ))
+        children = [c for c, r in zip(children, remove) if not r]
+        self._set_child_rows(children, lengths[~remove], shapes)
+        if self._stack is None:
+            self._invalidate()
+            self._set_props()
+        return
+
+    def update_feature(self, id_, **attrs):
+        """ Set attributes of a feature, e.g. blocks, strand or shape, and
+        redraw only that feature.
+
+        If the feature keeps its number of rows, e.g. when it moves, its
+        rows and paths are rewritten in place, see `_rewrite_features`.
+
+        Keyword arguments:
+        id_ -- int, see `ids`.
+        attrs -- attribute values.
+        """
+        feature = self._child_feature(self._features[self._find_ids(id_)[0]])
+        for key, value in attrs.items():
+            setattr(feature, key, value)
+        # Shapes don't tell the group when they change.
+        self._child_changed(feature)
+        self._flush()
+        return
+
+    def __setstate__(self, state):
+        ShapeCollection.__setstate__(self, state)
+        self._adopt(self._features)
+        return
+
+    def _adopt(self, features):
+        """ Register as a parent of the features, see `_child_changed`. """
+        for feature in features:
+            if isinstance(feature, _TrackFeature):
+                feature = feature.feature
+            if isinstance(feature, ShapeCollection):
+                feature._parents.add(self)
+        return
+
+    def _disown(self, features):
+        for feature in features:
+            if isinstance(feature, _TrackFeature):
+                feature = feature.feature
+            if isinstance(feature, ShapeCollection):
+                feature._parents.discard(self)
+        return
+
+    def _child_feature(self, child):
+        """ The child, or the Feature of a child laid out by `build_tracks`,
+        made and adopted when first needed.
+        """
+        if not isinstance(child, _TrackFeature):
+            return child
+        elif child.feature is None:
+            self._adopt([child.make_feature()])
+            self._positions = None
+        return child.feature
+
+    def _child_changed(self, child):
+        """ Mark a child dirty, and the ancestors of the group with it.
+
+        Ancestors are only told the first time, since they stay dirty until
+        they flush this group.
+        """
+        clean = not self._dirty
+        self._dirty[id(child)] = child
+        self.stale = True
+        if clean:
+            for parent in list(self._parents):
+                parent._child_changed(self)
+        return
+
+    def _flush(self):
+        """ Flatten the rows of the dirty children into the group again.
+
+        The dirty descendants of each child are flushed first, so only the
+        branches that changed are flattened.
+        """
+        if not self._dirty:
+            return
+        for child in list(self._dirty.values()):
+            if isinstance(child, ShapeCollection):
+                child._flush()
+
+        # Flushing children marks them dirty again, so take the set after.
+        dirty, self._dirty = self._dirty, dict()
+        if self._positions is None:
+            self._positions = defaultdict(list)
+            for i, feature in enumerate(self._features):
+                if isinstance(feature, _TrackFeature):
+                    feature = feature.feature
+                self._positions[id(feature)].append(i)
+
+        indices = sorted(set(
+            i for key in dirty for i in self._positions.get(key, ())
+            ))
+        self._splice_features([
+            (i, i + 1, [self._features[i]]) for i in indices
+            ])
+        return
+
+    def _child_rows(self):
+        """ The features, their numbers of rows, and the ShapeArray holding
+        them, patched by `add`, `remove` and `update_feature`.
+
+        Stacked tracks patch the rows that are restacked, see `_restack`.
+        """
+        if self._stack is None:
+            return self._children, self._child_lengths, self._shape_array
+        elif self._stack_base is None:
+            self._draw_patches()
+        return self._stack_base
+
+    def _feature_starts(self):
+        """ First row of each feature in the ShapeArray of `_child_rows`. """
+        if self._stack is None:
+            return self._child_starts
+        return self._stack_starts
+
+    def _set_child_rows(self, children, lengths, shapes):
+        """ Store the patched `_child_rows`, restacking if stacked. """
+        self._pyramid = None
+        if self._stack is None:
+            self._set_children(children, lengths)
+            return
+        self._set_stack_base(children, lengths, shapes)
+        self._restack()
+        return
+
+    def _set_stack_base(self, children, lengths, shapes):
+        """ Store the features stacked, their numbers of rows and their rows
+        before stacking, see `_child_rows`.
+        """
+        self._stack_base = (children, lengths, shapes)
+        self._stack_starts = np.cumsum(lengths) - lengths
+        self._stack_extents = self._feature_extents()
+        self._stack_index = None
+        return
+
+    def _splice_features(self, splices):
+        """ Replace runs of features, patching the rows in place.
+
+        Keyword arguments:
+        splices -- list of (start, stop, features), sorted by start and
+            not overlapping.
+        """
+        if len(splices) == 0:
+            return
+        children, lengths, shapes = self._child_rows()
+        pieces = list()
+
+        # From the end, so the positions of earlier splices stay valid.
+        for start, stop, features in splices[::-1]:
+            if self._features[start:stop] != features:
+                self._disown(self._features[start:stop])
+                self._features[start:stop] = features
+                self._positions = None
+            self._adopt(features)
+
+            pairs = [_child_array(f) for f in features]
+            new = ShapeArray.concatenate(
+                [array for array, _ in pairs],
+                # Stacked rows are offset by `_restack`.
+                offsets=None if self._stack else [o for _, o in pairs]
+                )
+            pieces.append(
+                (start, stop, features, new, [len(a) for a, _ in pairs])
+                )
+
+        if all(np.array_equal(counts, lengths[start:stop])
+               for start, stop, _, _, counts in pieces):
+            self._rewrite_features(pieces)
+            return
+
+        children = list(children)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        new_lengths = list()
+        for start, stop, features, new, counts in pieces:
+            shapes.splice(offsets[start], offsets[stop], new)
+            children[start:stop] = features
+            new_lengths.append((start, stop, counts))
+
+        pieces = list()
+        last = 0
+        for start, stop, counts in new_lengths[::-1]:
+            pieces.extend([lengths[last:start], counts])
+            last = stop
+        pieces.append(lengths[last:])
+        lengths = np.concatenate(pieces).astype(np.int64)
+        self._set_child_rows(children, lengths, shapes)
+
+        start, stop, features = splices[0]
+        if self._stack is not None:
+            return
+        elif len(splices) == 1 and start == stop == offsets.size - 1:
+            self._rows_added(int(offsets[start]))
+        else:
+            self._invalidate()
+            self._set_props()
+        return
+
+    def _rewrite_features(self, pieces):
+        """ Write the rows of features replaced by as many rows in place.
+
+        Only the rows of the replaced features are written, along with
+        their paths, see `ShapeCollection._rows_changed`, so the cost
+        follows the number of rows changed, plus restacking a stacked
+        track.
+
+        Keyword arguments:
+        pieces -- list of (start, stop, features, ShapeArray, row counts),
+            see `_splice_features`.
+        """
+        children, lengths, shapes = self._child_rows()
+        starts = self._feature_starts()
+        changed = list()
+        for start, stop, features, new, _ in pieces:
+            first = int(starts[start]) if start < len(starts) else 0
+            last = first + len(new)
+            old = shapes.data[first:last][["start", "end", "style"]].copy()
+            shapes.splice(first, last, new)
+            children[start:stop] = features
+
+            rows = shapes.data[first:last]
+            moved = not (np.array_equal(old["start"], rows["start"]) and
+                         np.array_equal(old["end"], rows["end"]))
+            restyled = not np.array_equal(old["style"], rows["style"])
+            changed.append((start, stop, first, last, moved, restyled))
+
+        self._pyramid = None
+        if self._stack is None:
+            for _, _, first, last, moved, restyled in changed:
+                self._rows_changed(first, last, moved, restyled)
+            return
+
+        extent_starts, extent_ends = self._stack_extents
+        for start, stop, first, last, moved, _ in changed:
+            if not moved:
+                continue
+            new_starts, new_ends = _child_extents(
+                lengths[start:stop],
+                shapes.take(slice(first, last))
+                )
+            extent_starts[start:stop] = new_starts
+            extent_ends[start:stop] = new_ends
+            if self._stack_index is not None:
+                ids = np.arange(start, stop)
+                self._stack_index.remove(ids)
+                drawn = ~np.isnan(new_starts)
+                self._stack_index.insert(
+                    new_starts[drawn],
+                    new_ends[drawn],
+                    ids=ids[drawn]
+                    )
+        self._restack()
+        return
+
     @property
     def offset(self):
         return self._offset
@@ -345,7 +2162,7 @@ class FeatureGroup(Collection):
     @offset.setter
     def offset(self, offset):
         self._offset = offset
-        self._draw_patches()
+        self._draw_layout()
         return
 
     @property
@@ -355,103 +2172,721 @@ class FeatureGroup(Collection):
     @by_axis.setter
     def by_axis(self, by_axis):
         self._by_axis = by_axis
-        if by_axis is not None:
-            for patch in self.patches:
-                if patch.by_axis is not None:
-                    patch.by_axis = by_axis
+        self._draw_layout()
         return
 
     @property
-    def paths(self):
-        return self._paths
+    def stack(self):
+        """ How the features are stacked, one of STACK_MODES. """
+        return self._stack
+
+    @stack.setter
+    def stack(self, stack):
+        if stack not in STACK_MODES:
+            raise ValueError("Unknown stack mode {!r}.".format(stack))
+        self._stack = stack
+        if stack is None:
+            self._draw_patches()
+        else:
+            self._restack()
+        return
 
-    @paths.setter
-    def paths(self, paths):
-        self._paths = paths
+    @property
+    def max_rows(self):
+        return self._max_rows
+
+    @max_rows.setter
+    def max_rows(self, max_rows):
+        self._max_rows = max_rows
+        self._restack()
         return
 
-    def get_paths(self):
-        """ alias for paths property """
-        return self.paths
+    @property
+    def stack_range(self):
+        return self._stack_range
 
-    def set_paths(self, paths):
-        """ alias for paths.setter """
-        self.paths = paths
+    @stack_range.setter
+    def stack_range(self, stack_range):
+        self._stack_range = stack_range
+        self._restack()
         return
 
-    def _set_paths(self):
-        self.paths = [
-            p.get_transform().transform_path(p.get_path())
-            for p in self._patches
-            ]
+    @property
+    def density(self):
+        """ View length above which the density of the features is drawn,
+        or None to always draw the features.
+        """
+        return self._density
+
+    @density.setter
+    def density(self, density):
+        self._density = density
+        self._pyramid = None
+        self.stale = True
         return
 
-    def _set_props(self):
+    @property
+    def density_style(self):
+        """ How the density is drawn, one of DENSITY_STYLES. """
+        return self._density_style
+
+    @density_style.setter
+    def density_style(self, density_style):
+        if density_style not in DENSITY_STYLES:
+            raise ValueError(
+                "Unknown density style {!r}.".format(density_style)
+                )
+        self._density_style = density_style
+        self.stale = True
+        return
+
+    @property
+    def rows(self):
+        """ Row of each feature, -1 if not drawn, or None if not stacked.
+
+        Features are not drawn if they overflow max_rows or are outside of
+        the stack_range.
+        """
+        self._flush()
+        return self._rows
+
+    @property
+    def nrows(self):
+        """ Number of rows drawn in a stacked track. """
+        rows = self.rows
+        if rows is None:
+            return None
+        return int(rows.max()) + 1 if len(rows) > 0 else 0
+
+    @property
+    def overflow(self):
+        """ Features in the stack_range that did not fit in max_rows. """
+        self._flush()
+        if self._rows is None or self._stack_base is None:
+            return list()
+        children, _, _ = self._stack_base
+        return [
+            self._child_feature(children[i])
+            for i in np.flatnonzero(self._stack_visible & (self._rows < 0))
+            ]
+
+    @property
+    def patches(self):
+        """ New Shape objects for each block, created on demand. """
+        return _layout_patches(self)
+
+    def _has_stacked(self):
+        """ Is the group, or any group nested in it, stacked? """
+        return self._stack is not None or any(
+            f._has_stacked() for f in self._features
+            if isinstance(f, FeatureGroup)
+            )
+
+    def _stored_rows(self):
+        """ The rows of every feature, drawn or not, stored by `tobytes`.
+
+        Features of stacked groups are stored as they are before stacking,
+        see `_child_rows`. Without stacking these are the rows drawn.
+        """
+        self._flush()
+        if not any(f._has_stacked() for f in self._features
+                   if isinstance(f, FeatureGroup)):
+            _, _, shapes = self._child_rows()
+            return shapes
+
+        pairs = [_child_array(f, stored=True) for f in self._features]
+        return ShapeArray.concatenate(
+            [array for array, _ in pairs],
+            offsets=None if self._stack else [o for _, o in pairs]
+            )
+
+    def tobytes(self):
+        """ Compact binary form of the group, see `ShapeArray.tobytes`.
+
+        Every feature is stored, including those that a stacked group does
+        not draw, e.g. the `overflow`.
+        """
+        return self._stored_rows().tobytes(meta=self._meta())
 
-        def determine_facecolor(patch):
-            if patch.get_fill():
-                return patch.get_facecolor()
-            return [0, 0, 0, 0]
-
-        props = defaultdict(list)
-        valid = {
-            "facecolors": (self.set_facecolor, determine_facecolor),
-            "edgecolors": (self.set_edgecolor, Patch.get_edgecolor),
-            "linewidths": (self.set_linewidth, Patch.get_linewidth),
-            "linestyles": (self.set_linestyle, Patch.get_linestyle),
-            "antialiaseds": (self.set_antialiased, Patch.get_antialiased),
+    def _meta(self):
+        self._flush()
+        stored = [
+            isinstance(f, (Shape, Feature, FeatureGroup, _TrackFeature))
+            for f in self._features
+            ]
+        features = [
+            _feature_meta(self._child_feature(f))
+            for f, s in zip(self._features, stored) if s
+            ]
+        meta = {
+            "type": "FeatureGroup",
+            "width": self._width,
+            "offset": self.offset,
+            "by_axis": self.by_axis,
+            "name": self.name,
+            "stack": self._stack,
+            "max_rows": self._max_rows,
+            "stack_range": self._stack_range,
+            "density": self._density,
+            "density_style": self._density_style,
+            "features": features,
             }
+        if self._stack is not None:
+            # Features that are not drawn have row -1.
+            meta["rows"] = self._rows[np.array(stored, dtype=bool)].tolist()
+        return meta
+
+    @classmethod
+    def _from_meta(cls, shapes, meta, **kwargs):
+        # The rows of each child are contiguous in the group, see
+        # `_stored_rows`, so the children are rebuilt from slices.
+        stack = meta.get("stack")
+        features = list()
+        start = 0
+        for child in meta["features"]:
+            stop = start + child["length"]
+            rows = shapes.data[start:stop].copy()
+            if stack is None and child["type"] != "Shape":
+                rows["offset"] -= child["offset"]
+            child_shapes = ShapeArray(
+                rows,
+                kinds=shapes.kinds,
+                styles=shapes.styles
+                )
+            features.append(_from_meta(child_shapes, child))
+            start = stop
+
+        lengths = [child["length"] for child in meta["features"]]
+        return cls._from_rows(
+            features,
+            lengths,
+            shapes,
+            rows=meta.get("rows"),
+            width=meta["width"],
+            offset=meta["offset"],
+            stack=stack,
+            by_axis=meta["by_axis"],
+            name=meta["name"],
+            max_rows=meta.get("max_rows"),
+            stack_range=meta.get("stack_range"),
+            density=meta.get("density"),
+            density_style=meta.get("density_style", "bars"),
+            **kwargs
+            )
+
+    @classmethod
+    def _from_rows(cls, features, lengths, shapes, rows=None, **kwargs):
+        """ Create a group from the rows of its features, without laying
+        them out or concatenating them again.
+
+        Keyword arguments:
+        features -- the children.
+        lengths -- sequence of ints, the number of rows of each child.
+        shapes -- ShapeArray of the rows of the children in order, see
+            `_stored_rows`.
+        rows -- None, or the row of each feature of a stacked group, see
+            `rows`. Default is to stack the features.
+        kwargs -- passed to the constructor.
+        """
+        group = cls(list(), **kwargs)
+        group._features = list(features)
+        group._ids = group._new_ids(len(features))
+        group._adopt(features)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if any(f._has_stacked() for f in features
+               if isinstance(f, FeatureGroup)):
+            # Nested stacked groups store rows that they don't draw.
+            group._draw_patches()
+        elif group._stack is None:
+            group._set_children(list(features), lengths)
+            group.shape_array = shapes
+        elif rows is None:
+            group._set_stack_base(list(features), lengths, shapes)
+            group._restack()
+        else:
+            group._set_stack_base(list(features), lengths, shapes)
+            group._offset_rows(
+                np.array(rows, dtype=np.int64),
+                group._in_stack_range()
+                )
+        return group
+
+    def _draw_layout(self):
+        """ Update the layout transform from the offset and by_axis. """
+        self._layout_transform.set_matrix(
+            _layout_matrix(self._offset, self._by_axis)
+            )
+        self._changed()
+        self.stale = True
+        return
+
+    def get_layout_transform(self):
+        """ Affine transform applying the offset and by_axis. """
+        return self._layout_transform
+
+    def get_transform(self):
+        return self._compose(self._layout_transform)
+
+    def _set_children(self, children, lengths):
+        """ Record the children drawn, and their numbers of rows. """
+        self._children = children
+        self._child_lengths = np.asarray(lengths, dtype=np.int64)
+        self._child_starts = (
+            np.cumsum(self._child_lengths) - self._child_lengths
+            )
+        return
+
+    def _row_hit(self, row):
+        """ The (feature, block) drawn by a row, see `features_at`. """
+        i = np.searchsorted(self._child_starts, row, side="right") - 1
+        child = self._child_feature(self._children[i])
+        if isinstance(child, Shape):
+            return child, None
+        return child._row_hit(row - self._child_starts[i])
+
+    def features_at(self, x, y):
+        """ The features and blocks at a point.
+
+        Keyword arguments:
+        x, y -- the point in data coordinates.
 
-        for p in self._patches:
-            for key, (set_, get) in valid.items():
-                props[key].append(get(p))
+        Returns:
+        list -- (feature, block) tuples, one per shape hit, sorted by start.
+            Nested groups give their innermost Feature. The block is None
+            for shapes between blocks, and for Shape children.
+        """
+        along, across = self._layout_transform.inverted().transform([x, y])
+        return [self._row_hit(row) for row in self.rows_at(along, across)]
+
+    def contains(self, mouseevent):
+        """ Test whether the mouse event is over any of the features.
+
+        Returns:
+        bool, dict(ind=rows, features=features, blocks=blocks) -- see
+            `features_at`. These are set on the PickEvent when picking.
+        """
+        inside, info = ShapeCollection.contains(self, mouseevent)
+        if inside:
+            hits = [self._row_hit(row) for row in info["ind"]]
+            info["features"] = [feature for feature, _ in hits]
+            info["blocks"] = [block for _, block in hits]
+        return inside, info
+
+    def density_pyramid(self):
+        """ The DensityPyramid of the features, built when first needed.
+
+        The bins of the finest level are a power of two long, with about
+        DENSITY_BINS bins in a view as long as `density`.
+        """
+        self._flush()
+        if self._pyramid is None:
+            _, lengths, shapes = self._child_rows()
+            starts, ends = _child_extents(lengths, shapes)
+            strands = np.zeros(len(lengths), dtype=np.int8)
+            rows = lengths > 0
+            strands[rows] = shapes.data["strand"][
+                (np.cumsum(lengths) - lengths)[rows]
+                ]
+
+            bin_size = 1024
+            if self._density is not None:
+                bin_size = 2 ** max(
+                    int(np.log2(max(self._density / DENSITY_BINS, 1.))),
+                    0
+                    )
+            self._pyramid = DensityPyramid(
+                starts[rows],
+                ends[rows],
+                strands[rows],
+                bin_size=bin_size
+                )
+        return self._pyramid
+
+    def _draw_density(self, renderer, low, high):
+        """ Draw the bins of the density pyramid in the view, with bins of
+        about a pixel.
+        """
+        pyramid = self.density_pyramid()
+        if len(pyramid) == 0:
+            self.stale = False
+            return
+
+        if self._by_axis == "y":
+            pixels = self.axes.bbox.height
+        else:
+            pixels = self.axes.bbox.width
+        bins = pyramid.bins(
+            pyramid.level((high - low) / max(pixels, 1.)),
+            low,
+            high
+            )
+
+        lengths = bins["end"] - bins["start"]
+        if self._density_style == "bars":
+            heights = bins["count"] / max(bins["count"].max(), 1)
+            colours = self.get_facecolor()
+            if len(colours) == 0:
+                colours = self.get_edgecolor()
+            colours = colours[:1]
+        else:
+            heights = np.ones(len(lengths))
+            colours = self.get_cmap()(bins["coverage"] / lengths)
+
+        collection = self._instance_collection(
+            Path.unit_rectangle(),
+            np.column_stack([bins["start"], np.zeros(len(lengths))]),
+            np.column_stack([lengths, heights * self._width]),
+            facecolors=colours,
+            edgecolors="none",
+            linewidths=0,
+            )
+        collection.draw(renderer)
+        self.stale = False
+        return
+
+    def _on_limits_changed(self, axes):
+        if self._stack_range == "view" and axes is self.axes:
+            self._update_stack_view()
+        ShapeCollection._on_limits_changed(self, axes)
+        return
 
-        for key, (set_, get) in valid.items():
-            set_(props[key])
+    def _stack_view(self):
+        """ The stack_range, or the range shown by the axes if it is "view",
+        None if not shown.
+        """
+        if self._stack_range != "view":
+            return self._stack_range
+        elif self.axes is None:
+            return None
+        low, high = self._view_range()
+        if not np.isfinite([low, high]).all():
+            return None
+        return (low, high)
+
+    def _update_stack_view(self):
+        """ Pack the features in view again if the view changed since they
+        were last packed.
+        """
+        self._flush()
+        if (self._stack is not None and self._stack_base is not None and
+                self._stack_view() != self._stacked_view):
+            self._restack()
+        return
+
+    @allow_rasterization
+    def draw(self, renderer):
+        if self._stack_range == "view" and self.axes is not None:
+            self._connect_view()
+            self._update_stack_view()
+        if (self._density is not None and self.get_visible() and
+                self.axes is not None):
+            self._flush()
+            low, high = self._view_range()
+            if high - low > self._density:
+                self._draw_density(renderer, low, high)
+                return
+        ShapeCollection.draw(self, renderer)
         return
 
     def _draw_patches(self):
         """ . """
-        patches = list()
-        for feature in self.features:
-            if self._offset != 0:
-                feature.offset = self._offset
-            if isinstance(feature, Patch):
-                patches.append(feature)
-            elif isinstance(feature, Feature):
-                patches.extend(feature.patches)
-            elif isinstance(feature, FeatureGroup):
-                patches.extend(feature.patches)
-            else:
-                pass
+        self._dirty = dict()
+        self._positions = None
+        self._pyramid = None
+        self._adopt(self._features)
+        pairs = [_child_array(f) for f in self._features]
+        arrays = [array for array, _ in pairs]
+        offsets = [offset for _, offset in pairs]
+        children = list(self._features)
+
+        if self._stack is None:
+            self._rows = None
+            self._stack_base = None
+            self._set_children(children, [len(a) for a in arrays])
+            self.shape_array = ShapeArray.concatenate(arrays, offsets=offsets)
+            return
+
+        # Stacked features are concatenated without their own offsets,
+        # and each restack offsets these rows.
+        lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+        self._set_stack_base(children, lengths, ShapeArray.concatenate(arrays))
+        self._restack()
+        return
+
+    def _feature_extents(self):
+        """ Start and end of each feature stacked, NaN if it has no rows. """
+        _, lengths, shapes = self._stack_base
+        return _child_extents(lengths, shapes)
+
+    def _feature_index(self):
+        """ IntervalIndex of the features stacked, for the stack_range. """
+        if self._stack_index is None:
+            starts, ends = self._stack_extents
+            ids = np.flatnonzero(~np.isnan(starts))
+            self._stack_index = IntervalIndex(starts[ids], ends[ids], ids)
+        return self._stack_index
+
+    def _restack(self):
+        """ Pack the features into rows, and offset their rows to match.
+
+        Only the features in the stack_range are packed, so the cost
+        follows the number of features visible.
+        """
+        if self._stack is None:
+            return
+        elif self._stack_base is None:
+            self._draw_patches()
+            return
+
+        starts, ends = self._stack_extents
+        self._stacked_view = self._stack_view()
+        visible = self._in_stack_range()
+        rows = np.full(len(visible), -1, dtype=np.int64)
+        if self._stack == "collapsed":
+            rows[visible] = 0
+        else:
+            rows[visible] = pack_intervals(
+                starts[visible],
+                ends[visible],
+                max_rows=self._max_rows
+                )
+        self._offset_rows(rows, visible)
+        return
+
+    def _in_stack_range(self):
+        """ Bool array, the features stacked that overlap the stack_range.
+        """
+        starts, _ = self._stack_extents
+        stack_range = self._stack_view()
+        if stack_range is None:
+            return ~np.isnan(starts)
+        visible = np.zeros(len(starts), dtype=bool)
+        visible[self._feature_index().overlap(*stack_range)] = True
+        return visible
 
-        self._patches = patches
+    def _offset_rows(self, rows, visible):
+        """ Offset the rows of the features stacked to their rows.
+
+        Keyword arguments:
+        rows -- int array, the row of each feature, -1 if not drawn.
+        visible -- bool array, the features in the stack_range.
+        """
+        children, lengths, base = self._stack_base
+        self._rows = rows
+        self._stack_visible = visible
+
+        drawn = np.flatnonzero(rows >= 0)
+        pitch, scale = _stack_geometry(self._stack, self._width)
+        data = base.data[np.repeat(rows >= 0, lengths)]
+        data["offset"] = (
+            data["offset"] * scale +
+            np.repeat(rows[drawn] * pitch, lengths[drawn])
+            )
+        data["width"] *= scale
+
+        self._set_children([children[i] for i in drawn], lengths[drawn])
+        self.shape_array = ShapeArray(
+            data,
+            kinds=base.kinds,
+            styles=base.styles,
+            by_axis=base.by_axis
+            )
         return
 
 
-class LinkCollection(object):
+class LinkCollection(Collection):
+
+    """ Draws the CrossLinks between axes as one collection on the figure.
+
+    The ribbons of the links in view are computed together, see
+    `links.link_paths`, and drawn in figure coordinates by a single
+    `draw_path_collection`, rather than one PathPatch artist per link.
+
+    Each link is styled by the properties of its CrossLink, interned in a
+    palette of styles as for ShapeArray, so the colours of every link are
+    a single fancy index. Links given values by `add` are coloured by the
+    colormap of the collection instead, see `set_cmap` and `set_norm`.
+
+    The coordinates of the links are copied into a structured array when
+    they are added, see LINK_DTYPE, without keeping the CrossLinks, and
+    `add_stream` fills it from an iterator of alignments a chunk at a time,
+    so that whole genome alignments can be drawn without a Python object
+    per link. The links in view are those with both
+    ranges within the limits of their axes, found from the links sorted by
+    the start of their range in each axes with `searchsorted`, then a mask
+    of the candidates, and only found again when the limits change.
+
+    Keyword arguments are passed to `matplotlib.collections.Collection`.
+    The default zorder of a Collection is above that of the axes, so the
+    links are drawn over the axes they join, as the PathPatches added to
+    `figure.patches` were.
 
-    """ . """
+    Methods
+    -------
+    add
+        Add links between ranges of the axes.
+    add_stream
+        Add links from an iterator of alignments, e.g. a file.
+    """
 
     def __init__(
             self,
             obj,
             links=list(),
             add_to_fig=False,
-            by=None
+            by=None,
+            **kwargs
             ):
-        """ . """
-        self.links = list()
-        self.links.extend(links)
+        """
+        Keyword arguments:
+        obj -- function returning a new CrossLink between the axes, e.g.
+            `functools.partial(CrossLink, ax1, ax2)`.
+        links -- CrossLinks to draw.
+        add_to_fig -- bool, add the collection to the figure of the axes.
+        by -- "x" or "y", default axis of the ranges given to `add`.
+        """
         self.obj = obj
         self.add_to_fig = add_to_fig
         self.by = by
-        lobj = obj()
-        self.figure = lobj.figure
 
+        self._buffer = np.zeros(0, dtype=LINK_DTYPE)
+        self._data = self._buffer
+        self._groups = list()
+        self._group_index = dict()
+        self._styles = list()
+        self._style_index = dict()
+        self._palette = None
+        self._index = None
+        self._in_view = None
+        self._in_view_limits = None
+
+        Collection.__init__(self, **kwargs)
+        figure = obj().figure
+        self.set_figure(figure)
+        self.set_transform(figure.transFigure)
+        self._extend(links)
+        if add_to_fig:
+            figure.add_artist(self)
+        return
+
+    @staticmethod
+    def _intern(table, index, key, value):
+        """ Index of `value` in `table`, appending it if new. """
+        try:
+            return index[key]
+        except KeyError:
+            index[key] = len(table)
+            table.append(value)
+            return index[key]
+
+    @property
+    def links(self):
+        """ A new CrossLink for each link, made from its row.
+
+        The links are a read-only tuple, as the CrossLinks are copies and
+        changing them does not change the collection. Use `add` to add
+        links.
+        """
+        return tuple(self._crosslink(row) for row in self._data)
+
+    def _crosslink(self, row):
+        """ A CrossLink with the coordinates, settings and style of a row.
+        """
+        ax1, ax2, by, cpoint_offset, transform_ax1, transform_ax2 = \
+            self._groups[row["group"]]
+        link = CrossLink(
+            ax1,
+            ax2,
+            ax1_cpoint=None if np.isnan(row["cpoint1"]) else row["cpoint1"],
+            ax2_cpoint=None if np.isnan(row["cpoint2"]) else row["cpoint2"],
+            cpoint_offset=cpoint_offset,
+            by=by,
+            **self._styles[row["style"]]
+            )
+        along, across = _link_ranges(by)
+        for names, field in zip((along, across), ("along", "across")):
+            setattr(link, names[0], row[field + "1"].tolist())
+            setattr(link, names[1], row[field + "2"].tolist())
+        link.transform_ax1 = transform_ax1
+        link.transform_ax2 = transform_ax2
+        return link
+
+    def _row(self, link):
+        """ A row of LINK_DTYPE holding a CrossLink, as a tuple. """
+        # Links of the same axes and settings are drawn together.
+        settings = (
+            link.ax1,
+            link.ax2,
+            link.by,
+            link.cpoint_offset,
+            link.transform_ax1,
+            link.transform_ax2,
+            )
+        group = self._intern(
+            self._groups,
+            self._group_index,
+            tuple(id(s) for s in settings[:2] + settings[4:]) + settings[2:4],
+            settings
+            )
+
+        properties = {
+            k: v for k, v in link.properties.items()
+            if k in LINK_STYLE_KEYS
+            }
+        style = self._intern(
+            self._styles,
+            self._style_index,
+            _freeze(properties),
+            properties
+            )
+
+        along, across = [
+            [getattr(link, name) for name in names]
+            for names in _link_ranges(link.by)
+            ]
+        # Ranges across default as in CrossLink, e.g. if `by` was changed
+        # by `add`.
+        if across[0] is None:
+            across[0] = [0, 1]
+        if across[1] is None:
+            across[1] = across[0]
+        if any(r is None for r in along):
+            along = [[0, 0], [0, 0]]
+        cpoints = [
+            np.nan if cpoint is None else cpoint
+            for cpoint in (link.ax1_cpoint, link.ax2_cpoint)
+            ]
+        return (group, along[0], along[1], across[0], across[1],
+                cpoints[0], cpoints[1], style, np.nan)
+
+    def _append(self, data):
+        """ Append rows of LINK_DTYPE, growing the buffer by doubling. """
+        size = len(self._data)
+        if size + len(data) > len(self._buffer):
+            buffer = np.zeros(
+                max(2 * len(self._buffer), size + len(data)),
+                dtype=LINK_DTYPE
+                )
+            buffer[:size] = self._data
+            self._buffer = buffer
+        self._buffer[size:size + len(data)] = data
+        self._data = self._buffer[:size + len(data)]
+
+        self._index = None
+        self._in_view = None
+        self.stale = True
+        return
+
+    def _extend(self, links, values=None):
+        """ Append CrossLinks, copying their coordinates into rows. """
+        data = np.array([self._row(link) for link in links],
+                        dtype=LINK_DTYPE)
+        if values is not None:
+            data["value"] = values
+        self._append(data)
         return
 
-    def add(self, blocks, by=None, **kwargs):
+    def add(self, blocks, by=None, values=None, **kwargs):
         """
         Keyword arguments:
         blocks -- a 2, 3, or 4 dimensional array
@@ -474,81 +2909,301 @@ class LinkCollection(object):
                     ],
                     ...
                 ]
+            Ranges along `by` of the 2 and 3 dimensional forms are x
+            ranges, or y ranges if `by` is "y".
+        by -- "x" or "y", default is the `by` of the collection.
+        values -- None or sequence of a float per link, coloured by the
+            colormap of the collection.
+        kwargs -- CrossLink properties of the new links, e.g. facecolor.
+
+        Returns:
+        list -- a CrossLink for each new link, made from its row as for
+            `links`, so changing it does not change the collection. Use
+            `add_stream` to add many links without a CrossLink each.
         """
-        by = self.by if by is None else by
-        obj = self.obj
-
         if len(blocks) == 0:
             return list()
 
-        blocks = np.array(blocks)
-        if len(blocks.shape) == 2:
-            if by == 'x' or self.by is None:
-                pblocks = np.array([
-                    [[ax_xrange, None] for ax_xrange in blocks]
-                    ])
-            elif by == 'y':
-                pblocks = np.array([
-                    [[None, ax_yrange] for ax_yrange in blocks]
-                    ])
-        elif len(blocks.shape) == 3:
-            if by == 'x' or self.by is None:
-                pblocks = np.array([
-                    [[ax1_xrange, None],
-                     [ax2_xrange, None]]
-                    for ax1_xrange, ax2_xrange in blocks
-                    ])
-            elif by == 'y':
-                pblocks = np.array([
-                    [[None, ax1_yrange],
-                     [None, ax2_yrange]]
-                    for ax1_yrange, ax2_yrange in blocks
-                    ])
+        blocks = np.asarray(blocks, dtype=float)
+        if blocks.ndim == 2:
+            blocks = blocks[np.newaxis]
+
+        data = self._template_rows(len(blocks), by, kwargs)
+        if blocks.ndim == 3:
+            # Ranges along `by` only, the ranges across are left default.
+            data["along1"] = blocks[:, 0]
+            data["along2"] = blocks[:, 1]
         else:
-            pblocks = blocks
-
-        new_links = list()
-        for block in pblocks:
-            ((ax1_xrange, ax1_yrange), (ax2_xrange, ax2_yrange)) = block
-            params = dict() #copy(kwargs)
-            params['by'] = by
-            params['ax1_xrange'] = ax1_xrange
-            params['ax1_yrange'] = ax1_yrange
-            params['ax2_xrange'] = ax2_xrange
-            params['ax2_yrange'] = ax2_yrange
-            params = {k:v for k, v in params.items() if v is not None}
-            lobj = obj()
-            lobj.__dict__.update(params)
-            lobj.properties.update(kwargs)
-            self.links.append(lobj)
-            new_links.append(lobj)
-
-        return new_links
+            along = 1 if (self.by if by is None else by) == 'y' else 0
+            data["along1"] = blocks[:, 0, along]
+            data["along2"] = blocks[:, 1, along]
+            data["across1"] = blocks[:, 0, 1 - along]
+            data["across2"] = blocks[:, 1, 1 - along]
+        if values is not None:
+            data["value"] = values
+
+        self._append(data)
+        return [self._crosslink(row) for row in data]
+
+    def _template_rows(self, n, by, kwargs):
+        """ N rows of links made by `obj`, with the properties `kwargs`,
+        to be given their own ranges.
+        """
+        template = self.obj()
+        template.by = self.by if by is None else by
+        template.properties.update(kwargs)
+        row = np.array(self._row(template), dtype=LINK_DTYPE)
+        return np.repeat(row[np.newaxis], n)
 
-    def __call__(self):
-        return self.draw()
+    def add_stream(
+            self,
+            records,
+            by=None,
+            columns=(0, 1, 2, 3),
+            identity=None,
+            min_identity=None,
+            min_length=None,
+            values=None,
+            chunk_size=LINK_CHUNK,
+            **kwargs
+            ):
+        """ Add links from an iterator of alignments, a chunk at a time.
 
-    def draw(self):
-        """ . """
-        patches = list()
-        for link in self.links:
-            if not link.in_limits():
+        Records are read `chunk_size` at a time, filtered, and copied into
+        the rows of the collection, without a CrossLink per link, so memory
+        is bounded by the rows kept rather than the records read.
+
+        Keyword arguments:
+        records -- iterable of alignments, as lines of whitespace separated
+            text, e.g. a file of nucmer or promer `show-coords -T -H`
+            output, opened in text or binary mode, or as sequences of
+            numbers.
+        by -- "x" or "y", default is the `by` of the collection.
+        columns -- indices of the ax1 start, ax1 end, ax2 start and ax2 end
+            in each record.
+        identity -- None or index of the percent identity in each record,
+            e.g. 6 for `show-coords -T`.
+        min_identity -- None or the minimum identity of links to add.
+        min_length -- None or the minimum length of links to add, along
+            both axes.
+        values -- None, "identity" or "length", to colour the links by the
+            colormap of the collection, see `add`.
+        chunk_size -- number of records read at a time.
+        kwargs -- CrossLink properties of the new links, e.g. facecolor.
+
+        Returns:
+        int -- the number of links added.
+        """
+        if values not in (None, "identity", "length"):
+            raise ValueError("Unknown values {!r}.".format(values))
+        elif identity is None and (
+                min_identity is not None or values == "identity"):
+            raise ValueError("Filtering or colouring by identity needs the "
+                             "identity column.")
+
+        # Every link is a copy of a template row, with its own ranges.
+        row = self._template_rows(1, by, kwargs)
+
+        usecols = list(columns)
+        if identity is not None:
+            usecols.append(identity)
+
+        records = iter(records)
+        added = 0
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if len(chunk) == 0:
+                break
+            elif isinstance(chunk[0], bytes):
+                # Lines of a file opened in binary mode.
+                chunk = [line.decode() for line in chunk]
+
+            if isinstance(chunk[0], str):
+                table = np.loadtxt(chunk, usecols=usecols, ndmin=2)
+            else:
+                table = np.asarray(chunk, dtype=float)[:, usecols]
+
+            lengths = np.minimum(
+                np.abs(table[:, 1] - table[:, 0]),
+                np.abs(table[:, 3] - table[:, 2])
+                )
+            keep = np.ones(len(table), dtype=bool)
+            if min_identity is not None:
+                keep &= table[:, 4] >= min_identity
+            if min_length is not None:
+                keep &= lengths >= min_length
+
+            data = np.repeat(row, keep.sum())
+            data["along1"] = table[keep, 0:2]
+            data["along2"] = table[keep, 2:4]
+            if values == "identity":
+                data["value"] = table[keep, 4]
+            elif values == "length":
+                data["value"] = lengths[keep]
+            self._append(data)
+            added += len(data)
+        return added
+
+    def _link_index(self):
+        """ For each group, the links of the group sorted by the low end of
+        their range in each axes, and the sorted low ends.
+        """
+        if self._index is None:
+            self._index = list()
+            groups = self._data["group"]
+            for group in range(len(self._groups)):
+                rows = np.flatnonzero(groups == group)
+                index = list()
+                for field in ("along1", "along2"):
+                    lows = self._data[field][rows].min(axis=1)
+                    order = np.argsort(lows, kind="mergesort")
+                    index.append((rows[order], lows[order]))
+                self._index.append(index)
+        return self._index
+
+    def _limits(self):
+        """ The limits along each axes of each group, as (low, high). """
+        limits = list()
+        for ax1, ax2, by, _, _, _ in self._groups:
+            for ax in (ax1, ax2):
+                lim = ax.get_ylim() if by == 'y' else ax.get_xlim()
+                limits.append((min(lim), max(lim)))
+        return limits
+
+    def _links_in_view(self):
+        """ Indices of the links with both ranges within the limits of their
+        axes, found again only if the limits changed.
+        """
+        limits = self._limits()
+        if self._in_view is not None and limits == self._in_view_limits:
+            return self._in_view
+
+        data = self._data
+        visible = list()
+        for g, index in enumerate(self._link_index()):
+            bounds = limits[2 * g:2 * g + 2]
+
+            # Candidates start within the limits of the axes with fewest.
+            candidates = list()
+            for (rows, lows), (low, high) in zip(index, bounds):
+                first = np.searchsorted(lows, low, side="left")
+                last = np.searchsorted(lows, high, side="right")
+                candidates.append(rows[first:last])
+            rows = min(candidates, key=len)
+
+            keep = np.ones(len(rows), dtype=bool)
+            for field, (low, high) in zip(("along1", "along2"), bounds):
+                ranges = data[field][rows]
+                keep &= (ranges.min(axis=1) >= low)
+                keep &= (ranges.max(axis=1) <= high)
+            visible.append(rows[keep])
+
+        self._in_view = np.sort(np.concatenate(
+            visible + [np.zeros(0, dtype=np.int64)]
+            ))
+        self._in_view_limits = limits
+        return self._in_view
+
+    def _link_paths(self, visible):
+        """ The Paths of links, computed by `links.link_paths` for each
+        group.
+        """
+        data = self._data[visible]
+        paths = [None] * len(visible)
+        for g, group in enumerate(self._groups):
+            positions = np.flatnonzero(data["group"] == g)
+            if len(positions) == 0:
                 continue
+            rows = data[positions]
+            ax1, ax2, by, cpoint_offset, transform_ax1, transform_ax2 = group
+            vertices, codes = link_paths(
+                ax1,
+                ax2,
+                rows["along1"],
+                rows["along2"],
+                rows["across1"],
+                rows["across2"],
+                ax1_cpoint=rows["cpoint1"],
+                ax2_cpoint=rows["cpoint2"],
+                cpoint_offset=cpoint_offset,
+                by=by,
+                transform_ax1=transform_ax1,
+                transform_ax2=transform_ax2,
+                )
+            for i, path in zip(positions, vertices):
+                paths[i] = Path(path, codes)
+        return paths
+
+    def _set_link_props(self, visible):
+        """ Set the collection properties of the links drawn.
+
+        Keyword arguments:
+        visible -- int array, indices of the links drawn.
+        """
+        if (self._palette is None or
+                len(self._palette["linewidths"]) != len(self._styles)):
+            # Styles default as for the PathPatch of a CrossLink, e.g. with
+            # an edge.
+            self._palette = _style_palette(
+                self._styles,
+                patch=partial(PathPatch, None)
+                )
+
+        index = self._data["style"][visible]
+        _set_palette_props(self, self._palette, index)
+
+        # Links with values take the colour of the colormap, and the alpha
+        # of their style. The norm is scaled to every link, not only those
+        # in view, so that colours don't change when panning.
+        values = self._data["value"]
+        valued = ~np.isnan(values)
+        if not valued.any():
+            return
+        self.norm.autoscale_None(values[valued])
+
+        faces = self._palette["facecolors"][index]
+        mapped = valued[visible]
+        colours = self.to_rgba(values[visible][mapped])
+        colours[:, 3] = faces[mapped, 3]
+        faces[mapped] = colours
+        self.set_facecolor(faces)
+        return
+
+    def __call__(self):
+        """ Deprecated, the collection draws itself on the figure.
 
-            path = link.draw()
-            link_patch = PathPatch(
+        Returns:
+        list -- a PathPatch in figure coordinates for each link in view,
+            not added to the figure.
+        """
+        warnings.warn(
+            "Calling a LinkCollection is deprecated, add it to the figure "
+            "with `add_to_fig` or `figure.add_artist` instead.",
+            DeprecationWarning,
+            stacklevel=2
+            )
+        visible = self._links_in_view()
+        return [
+            PathPatch(
                 path,
                 transform=self.figure.transFigure,
-                **link.properties
+                **self._styles[style]
                 )
-            rax = link.ax1
-            qax = link.ax2
-
-            patches.append(link_patch)
-        if self.add_to_fig:
-            self.figure.patches.extend(patches)
-        return patches
+            for path, style in zip(
+                self._link_paths(visible),
+                self._data["style"][visible]
+                )
+            ]
 
+    @allow_rasterization
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        visible = self._links_in_view()
+        self._paths = self._link_paths(visible)
+        self._set_link_props(visible)
+        Collection.draw(self, renderer)
+        return
 
 
 ################################# Functions ##################################
@@ -12,7 +12,10 @@ _contributors = [
 ############################ Import all modules ##############################
 
 
+from functools import lru_cache
+import json
 from math import sin
+import struct
 from math import radians
 
 import numpy as np
@@ -20,6 +23,199 @@ import numpy as np
 import matplotlib
 from matplotlib.patches import PathPatch
 from matplotlib.path import Path
+from matplotlib.transforms import Affine2D
+
+
+# Level of detail thresholds, as lengths on screen in pixels.
+# Shorter shapes are drawn as rectangles, then as ticks.
+LOD_RECTANGLE = 4.
+LOD_TICK = 1.
+
+# Sample counts of curved and wave shapes, per curve or wave cycle.
+# Shapes with resolution=None use about one sample per RESOLUTION_PIXELS
+# pixels on screen, rounded up to a power of two so that few templates
+# are cached.
+RESOLUTION_DEFAULT = 32
+RESOLUTION_MIN = 4
+RESOLUTION_MAX = 256
+RESOLUTION_PIXELS = 4.
+
+
+def _as_float_array(values, length=None):
+    """ Coerce scalars or sequences to a 1D float array of `length`. """
+    values = np.asarray(values, dtype=float)
+    if length is not None:
+        values = np.broadcast_to(values, (length,))
+    return values
+
+
+def _as_strands(strands, length):
+    """ Coerce strands, which may contain None, to an int8 array. """
+    if strands is None:
+        return np.zeros(length, dtype=np.int8)
+    strands = np.asarray(strands)
+    if strands.dtype == object:
+        strands = np.where(np.equal(strands, None), 0, strands)
+    return np.broadcast_to(strands.astype(np.int8), (length,))
+
+
+@lru_cache(maxsize=4096)
+def _unit_template(shape, params):
+    """ Read only unit Path of a shape class, see `Shape._template`. """
+    vertices, codes = shape.batch([0], [1], **dict(params))
+    return Path(vertices[0], codes, readonly=True)
+
+
+def adaptive_resolution(pixels):
+    """ Sample count for a curve `pixels` long on screen. """
+    samples = max(pixels / RESOLUTION_PIXELS, 1.)
+    samples = 2 ** int(np.ceil(np.log2(samples)))
+    return int(min(max(samples, RESOLUTION_MIN), RESOLUTION_MAX))
+
+
+def _place(unit, starts, ends, widths, offsets):
+    """ Stretch unit vertices (k, 2) over N shapes, giving (N, k, 2). """
+    vertices = np.empty((len(starts), len(unit), 2))
+    vertices[:, :, 0] = (
+        starts[:, None] + (ends - starts)[:, None] * unit[:, 0]
+        )
+    vertices[:, :, 1] = offsets[:, None] + widths[:, None] * unit[:, 1]
+    return vertices
+
+
+@lru_cache(maxsize=None)
+def _class_codes(shape):
+    """ Read only codes shared by the shapes of a class, see `_codes`. """
+    codes = np.array(shape._codes, dtype=Path.code_type)
+    codes.setflags(write=False)
+    return codes
+
+
+@lru_cache(maxsize=1024)
+def _line_codes(length, parts=1, closed=False):
+    """ Read only codes of `parts` equal polylines with `length` vertices.
+
+    Keyword arguments:
+    closed -- bool, close the last polyline.
+    """
+    codes = np.full(length, Path.LINETO, dtype=Path.code_type)
+    codes[::length // parts] = Path.MOVETO
+    if closed:
+        codes[-1] = Path.CLOSEPOLY
+    codes.setflags(write=False)
+    return codes
+
+
+@lru_cache(maxsize=256)
+def _unit_curve(shape, resolution):
+    """ Read only unit vertices of a curved shape, see `_curve`. """
+    vertices = shape._curve(resolution)
+    vertices.setflags(write=False)
+    return vertices
+
+
+@lru_cache(maxsize=1024)
+def _unit_wave(shape, cycles, resolution):
+    """ Read only unit vertices of a wave shape, see `Wave._wave`. """
+    vertices = shape._wave(cycles, resolution)
+    vertices.setflags(write=False)
+    return vertices
+
+
+def _freeze(value):
+    """ Convert dicts, lists and arrays to hashable tuples for interning. """
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    """ Convert lists loaded from JSON back to tuples. """
+    if isinstance(value, list):
+        return tuple(_thaw(v) for v in value)
+    return value
+
+
+def _json_default(value):
+    """ Encode numpy scalars and arrays for `json.dumps`. """
+    if isinstance(value, np.generic):
+        return value.item()
+    elif isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError("Cannot serialise {!r}.".format(value))
+
+
+# Shape subclasses by `_shape_name`, added as they are defined. Only these
+# are loaded by `ShapeArray.frombytes`.
+_SHAPE_CLASSES = dict()
+
+
+def _shape_name(shape):
+    return "{}.{}".format(shape.__module__, shape.__qualname__)
+
+
+def _shape_class(name):
+    """ The Shape subclass named by `_shape_name`.
+
+    Names read from a buffer are looked up in the Shape subclasses already
+    defined, so loading a buffer never imports a module.
+    """
+    try:
+        return _SHAPE_CLASSES[name]
+    except KeyError:
+        raise ValueError(
+            "Unknown shape class {!r}, import the module defining it "
+            "first.".format(name)
+            )
+
+
+def _style_palette(styles, patch=matplotlib.patches.Patch):
+    """ Collection properties of each style in a ShapeArray style table.
+
+    Keyword arguments:
+    styles -- list of dicts of Patch properties.
+    patch -- function returning a Patch from the properties of a style,
+        whose defaults fill in those the style doesn't set, e.g. the edge
+        a PathPatch draws by default.
+
+    Returns:
+    dict -- keyed by Collection property (e.g. "facecolors"), with an array
+        of one value per style.
+    """
+    palette = {
+        "facecolors": np.zeros((len(styles), 4)),
+        "edgecolors": np.zeros((len(styles), 4)),
+        "linewidths": np.zeros(len(styles)),
+        "linestyles": np.empty(len(styles), dtype=object),
+        "antialiaseds": np.zeros(len(styles), dtype=bool),
+        }
+    for i, style in enumerate(styles):
+        artist = patch(**style)
+        if artist.get_fill():
+            palette["facecolors"][i] = artist.get_facecolor()
+        palette["edgecolors"][i] = artist.get_edgecolor()
+        palette["linewidths"][i] = artist.get_linewidth()
+        palette["linestyles"][i] = artist.get_linestyle()
+        palette["antialiaseds"][i] = artist.get_antialiased()
+    return palette
+
+
+def _tick_style(style):
+    """ Style stroking a line in the fill colour of a shape style. """
+    patch = matplotlib.patches.Patch(**style)
+    if patch.get_fill():
+        color = patch.get_facecolor()
+    else:
+        color = patch.get_edgecolor()
+    return {
+        "fill": False,
+        "edgecolor": color,
+        "linewidth": max(patch.get_linewidth(), 1.),
+        "linestyle": patch.get_linestyle(),
+        "antialiased": patch.get_antialiased(),
+        }
 
 
 ################################## Classes ###################################
@@ -28,13 +224,35 @@ class Shape(matplotlib.patches.Patch):
 
     """ Base class for drawing genomic features.
 
-    Shape objects are templates for later drawing.
+    Shape objects are templates for later drawing. The path of a shape is
+    a cached unit template, placed in data coordinates by an affine patch
+    transform, so moving, resizing or swapping the axis of a shape only
+    updates the transform. The transform matrix, and any explicit vertices,
+    are written in place so that animating a shape does not allocate.
 
     Methods
     -------
-
+    batch
+        Vertices for many shapes of the same class at once.
     """
 
+    # Path codes shared by every instance of the class.
+    _codes = None
+    # Does a strand of -1 swap the start and end of the shape?
+    _stranded = False
+    # Shape specific parameters passed to `batch`, e.g. Arrow.head_length.
+    _params = ()
+    # Properties that change the vertices, see `update`.
+    _geometry = ("start", "end", "strand", "offset", "width", "by_axis")
+    # Properties of `_geometry` that only move the template.
+    _placement = ("offset", "by_axis")
+    # Does the sample count follow the size on screen, see `resolution`?
+    _adaptive = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _SHAPE_CLASSES[_shape_name(cls)] = cls
+
     def __init__(
             self,
             start,
@@ -44,9 +262,14 @@ class Shape(matplotlib.patches.Patch):
             offset=0,
             by_axis=None,
             name=None,
+            lod=False,
             **kwargs
             ):
-        """ . """
+        """
+        Keyword arguments:
+        lod -- bool, simplify the shape when it is small on screen, see
+            `set_lod`.
+        """
         super().__init__(**kwargs)
         self._start = start
         self._end = end
@@ -55,7 +278,13 @@ class Shape(matplotlib.patches.Patch):
         self._width = width
         self._by_axis = by_axis
         self.name = name
-        self._draw_path()
+        self._lod = lod
+        self._lod_path = None
+        self._path = None
+        self._vertices = None
+        self._buffer = None
+        self._shape_transform = Affine2D()
+        self._invalidate()
         return
 
     def __repr__(self):
@@ -66,43 +295,358 @@ class Shape(matplotlib.patches.Patch):
                       "width={_width}, "
                       "by_axis={_by_axis})").format(obj=clss, **self.__dict__)
 
-    def _draw_vertices(self):
+    @classmethod
+    def batch(
+            cls,
+            starts,
+            ends,
+            strands=None,
+            widths=1,
+            offsets=0,
+            by_axis=None,
+            **kwargs
+            ):
+        """ Compute the vertices of many shapes at once.
+
+        Keyword arguments:
+        starts -- sequence of N start positions.
+        ends -- sequence of N end positions.
+        strands -- None or sequence of N strands (1, -1, 0 or None).
+        widths -- scalar or sequence of N widths.
+        offsets -- scalar or sequence of N offsets.
+        by_axis -- "y" to swap the x and y coordinates.
+        kwargs -- shape specific parameters, e.g. head_length for Arrow.
+            May be scalars or sequences of N values.
+
+        Returns:
+        vertices -- float array with shape (N, k, 2).
+        codes -- uint8 array with shape (k, ), shared by all N shapes.
+        """
+        starts = np.atleast_1d(_as_float_array(starts))
+        length = len(starts)
+        ends = _as_float_array(ends, length)
+        widths = _as_float_array(widths, length)
+        offsets = _as_float_array(offsets, length)
+        strands = _as_strands(strands, length)
+
+        if cls._stranded:
+            reverse = strands == -1
+            starts, ends = (
+                np.where(reverse, ends, starts),
+                np.where(reverse, starts, ends)
+                )
+
+        vertices = cls._batch_vertices(
+            starts,
+            ends,
+            strands,
+            widths,
+            offsets,
+            **kwargs
+            )
+
+        if by_axis == "y":
+            vertices = vertices[:, :, ::-1]
+
+        return vertices, cls._batch_codes(**kwargs)
+
+    @classmethod
+    def _batch_vertices(cls, starts, ends, strands, widths, offsets):
+        """ Vertices (N, k, 2) of N shapes, strands already applied. """
         raise NotImplementedError
-        return
+
+    @classmethod
+    def _batch_codes(cls, **params):
+        """ Read only codes (k, ) shared by the shapes of a batch. """
+        return _class_codes(cls)
+
+    @classmethod
+    def _batch_groups(cls, rows, params, scale=None):
+        """ Split ShapeArray rows of this class into batches.
+
+        Keyword arguments:
+        rows -- structured array of ShapeArray rows.
+        params -- dict of shape specific parameters shared by the rows.
+        scale -- None or pixels per data unit, used to choose the
+            resolution of adaptive shapes.
+
+        Yields:
+        index -- int array of the rows in the batch.
+        params -- dict of keyword arguments to `batch`.
+        """
+        if (cls._adaptive and scale is not None and len(rows) > 0
+                and params.get("resolution") is None):
+            lengths = np.abs(rows["end"] - rows["start"])
+            params = dict(
+                params,
+                resolution=adaptive_resolution(np.median(lengths) * scale)
+                )
+        yield np.arange(len(rows)), params
+
+    def _shape_params(self):
+        """ Shape specific keyword arguments to `batch`. """
+        return {k: getattr(self, k) for k in self._params}
+
+    def tobytes(self):
+        """ Compact binary form of the shape, see `ShapeArray.tobytes`.
+
+        Explicit vertices and codes are not kept.
+        """
+        array = ShapeArray.from_shapes([self], by_axis=self.by_axis)
+        return array.tobytes(meta={"name": self.name})
+
+    @classmethod
+    def frombytes(cls, buffer):
+        """ Load a shape saved by `tobytes`. """
+        array, meta = ShapeArray._unpack(buffer)
+        shape = array[0]
+        shape.name = meta.get("name")
+        return shape
+
+    def get_style(self):
+        """ The drawing properties of the shape as a dict of kwargs. """
+        return {
+            "fill": self.get_fill(),
+            "facecolor": self.get_facecolor(),
+            "edgecolor": self.get_edgecolor(),
+            "linewidth": self.get_linewidth(),
+            "linestyle": self.get_linestyle(),
+            "antialiased": self.get_antialiased(),
+            }
+
+    def _unit_params(self, pixels=None):
+        """ Shape specific parameters of the unit template.
+
+        Keyword arguments:
+        pixels -- None or the length of the shape on screen, used to
+            choose the resolution of adaptive shapes.
+        """
+        return dict()
+
+    @classmethod
+    def _template(cls, **params):
+        """ Path of the shape from (0, 0) to (1, 1), shared by instances.
+
+        Templates are cached by class and params, and are read only.
+        """
+        return _unit_template(cls, _freeze(params))
 
     def _draw_path(self):
-        self._draw_vertices()
-        try:
-            self._path.vertices = self._vertices
-        except AttributeError:
-            self._path = Path(self._vertices, self._codes)
+        """ Look up the unit template for the current geometry. """
+        if self._vertices is not None:
+            # Explicit vertices are updated in place, so keep their Path.
+            if self._path is None or self._path.vertices is not self._vertices:
+                self._path = Path(self._vertices, self._codes)
+        else:
+            path = self._template(**self._unit_params())
+            if "_codes" in self.__dict__:
+                path = Path(path.vertices, self._codes)
+            self._path = path
+        self._stale_path = False
+        return
+
+    def _draw_transform(self):
+        """ Place the unit template in data coordinates. """
+        # Write into the matrix of the transform, rather than replacing it.
+        matrix = self._shape_transform.get_matrix()
+        if self._vertices is not None:
+            matrix[:2] = 0.
+            matrix[0, 0] = matrix[1, 1] = 1.
+        else:
+            start = self.start
+            end = self.end
+            if self._stranded and self.strand == -1:
+                start, end = end, start
+
+            along, across = (1, 0) if self.by_axis == "y" else (0, 1)
+            matrix[along, 0] = end - start
+            matrix[along, 1] = 0.
+            matrix[along, 2] = start
+            matrix[across, 0] = 0.
+            matrix[across, 1] = self.width
+            matrix[across, 2] = self.offset
+
+        self._shape_transform.invalidate()
+        self._stale_transform = False
+        return
+
+    def _vertex_buffer(self, length):
+        """ The (length, 2) vertex array of the shape, reused if possible. """
+        if self._buffer is None or len(self._buffer) != length:
+            self._buffer = np.empty((length, 2))
+        return self._buffer
+
+    def _invalidate(self, template=True):
+        """ Mark the path for recomputation on next access.
+
+        Keyword arguments:
+        template -- bool, the change affects the unit template as well as
+            the transform that places it.
+        """
+        self._vertices = None
+        if template:
+            self._stale_path = True
+        self._stale_transform = True
+        self.stale = True
+        return
+
+    def _update_path(self):
+        """ Recompute the template and transform if they are out of date. """
+        if self._stale_path:
+            self._draw_path()
+        if self._stale_transform:
+            self._draw_transform()
+        return
+
+    def update(self, props=None, **attrs):
+        """ Set several properties at once.
+
+        Geometry properties (e.g. start, end, offset) are stored without
+        their setters, and the path invalidated once, then recomputed when
+        next needed. Other properties are passed on to
+        `matplotlib.artist.Artist.update`.
+
+        Keyword arguments:
+        props -- dict of properties, as for `Artist.update`.
+        attrs -- properties as keyword arguments.
+        """
+        if props is not None:
+            attrs = dict(props, **attrs)
+
+        others = dict()
+        geometry = False
+        template = False
+        for key, value in attrs.items():
+            if key in self._geometry:
+                # Each geometry setter stores the value as "_" + key.
+                setattr(self, "_" + key, value)
+                geometry = True
+                template = template or key not in self._placement
+            else:
+                others[key] = value
+
+        if geometry:
+            self._invalidate(template=template)
+        if len(others) > 0:
+            return super().update(others)
+        return list()
 
     @property
     def path(self):
+        """ The unit template, see `get_patch_transform`. """
+        self._update_path()
         return self._path
 
     def get_path(self):
-        # Alias to path
+        # Alias to path, or the simplified template while drawing.
+        if self._lod_path is not None:
+            return self._lod_path
         return self.path
 
+    def get_lod(self):
+        return self._lod
+
+    def set_lod(self, lod):
+        """ Enable level of detail drawing.
+
+        When enabled, shapes shorter than LOD_RECTANGLE pixels on screen are
+        drawn as rectangles, and shapes shorter than LOD_TICK pixels as a
+        tick (if they have a visible edge).
+        """
+        self._lod = lod
+        self.stale = True
+        return
+
+    def _pixel_length(self):
+        """ Length of the shape on screen in pixels. """
+        transform = self.get_transform()
+        (x0, y0), (x1, y1) = transform.transform([[0, 0.5], [1, 0.5]])
+        return np.hypot(x1 - x0, y1 - y0)
+
+    def _level_of_detail(self, pixels=None):
+        """ Simplified template for the current zoom, or None. """
+        if pixels is None:
+            pixels = self._pixel_length()
+
+        if pixels >= LOD_RECTANGLE:
+            return None
+
+        edge = self.get_edgecolor()[3] > 0 and self.get_linewidth() > 0
+        if pixels < LOD_TICK and edge:
+            return Tick._template()
+        return Rectangle._template()
+
+    def _draw_template(self):
+        """ Template for the current zoom, or None to use `path`. """
+        if self._vertices is not None:
+            return None
+
+        pixels = self._pixel_length()
+        path = None
+        if self._lod:
+            path = self._level_of_detail(pixels)
+        if path is None and self._adaptive and self.resolution is None:
+            path = self._template(**self._unit_params(pixels))
+            if "_codes" in self.__dict__:
+                path = Path(path.vertices, self._codes)
+        return path
+
+    def draw(self, renderer):
+        if (self._lod or self._adaptive) and self.get_visible():
+            self._lod_path = self._draw_template()
+        try:
+            super().draw(renderer)
+        finally:
+            self._lod_path = None
+        return
+
+    def get_patch_transform(self):
+        """ Affine transform placing the unit template in data coords. """
+        self._update_path()
+        return self._shape_transform
+
     @property
     def vertices(self):
-        return self._vertices
+        """ Vertices in data coordinates.
+
+        The array is reused by later calls, copy it to keep it.
+        """
+        if self._vertices is not None:
+            return self._vertices
+
+        template = self.get_path().vertices
+        matrix = self.get_patch_transform().get_matrix()
+        buffer = self._vertex_buffer(len(template))
+        np.dot(template, matrix[:2, :2].T, out=buffer)
+        buffer += matrix[:2, 2]
+        return buffer
 
     @vertices.setter
     def vertices(self, vertices):
-        self._vertices = vertices
-        self._draw_path()
+        # Explicit vertices replace the template until the geometry changes.
+        vertices = np.asarray(vertices, dtype=float)
+        buffer = self._vertex_buffer(len(vertices))
+        if buffer is not vertices:
+            buffer[:] = vertices
+        self._vertices = buffer
+        self._stale_path = True
+        self._stale_transform = True
+        self.stale = True
         return
 
     @property
     def codes(self):
-        return self._codes
+        # Codes set on the instance, or those of the current template.
+        if "_codes" in self.__dict__:
+            return self._codes
+        return self.path.codes.tolist()
 
     @codes.setter
     def codes(self, codes):
         self._codes = codes
-        self._draw_path()
+        self._path = None
+        self._stale_path = True
+        self.stale = True
         return
 
     @property
@@ -112,7 +656,7 @@ class Shape(matplotlib.patches.Patch):
     @start.setter
     def start(self, start):
         self._start = start
-        self._draw_path()
+        self._invalidate()
         return
 
     @property
@@ -122,7 +666,7 @@ class Shape(matplotlib.patches.Patch):
     @end.setter
     def end(self, end):
         self._end = end
-        self._draw_path()
+        self._invalidate()
         return
 
     @property
@@ -132,7 +676,7 @@ class Shape(matplotlib.patches.Patch):
     @strand.setter
     def strand(self, strand):
         self._strand = strand
-        self._draw_path()
+        self._invalidate()
         return
 
     @property
@@ -142,7 +686,7 @@ class Shape(matplotlib.patches.Patch):
     @offset.setter
     def offset(self, offset):
         self._offset = offset
-        self._draw_path()
+        self._invalidate(template=False)
         return
 
     @property
@@ -152,7 +696,7 @@ class Shape(matplotlib.patches.Patch):
     @width.setter
     def width(self, width):
         self._width = width
-        self._draw_path()
+        self._invalidate()
         return
 
     @property
@@ -162,13 +706,21 @@ class Shape(matplotlib.patches.Patch):
     @by_axis.setter
     def by_axis(self, by_axis):
         self._by_axis = by_axis
-        self._draw_path()
+        self._invalidate(template=False)
 
 
 class Rectangle(Shape):
 
     """ Rectangle. """
 
+    _codes = [
+        Path.MOVETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.CLOSEPOLY
+        ]
+
     def __init__(
             self,
             start,
@@ -181,14 +733,6 @@ class Rectangle(Shape):
             **kwargs
             ):
 
-        self._codes = [
-            Path.MOVETO,
-            Path.LINETO,
-            Path.LINETO,
-            Path.LINETO,
-            Path.CLOSEPOLY
-            ]
-
         super().__init__(
             start=start,
             end=end,
@@ -201,32 +745,43 @@ class Rectangle(Shape):
             )
         return
 
-    def _draw_vertices(self):
+    @classmethod
+    def _batch_vertices(cls, starts, ends, strands, widths, offsets):
         """ . """
 
-        start = self.start
-        end = self.end
-        width = self.width
-        offset = self.offset
-
-        self._vertices = np.array([
-            [start, offset],  # bottom left
-            [start, offset + width],  # top left
-            [end, offset + width],  # top right
-            [end, offset],  # bottom right
-            [start, offset]  # bottom left
-            ])
-
-        if self.by_axis == "y":
-            self._vertices = self._vertices[:,::-1]
+        tops = offsets + widths
 
-        return
+        vertices = np.empty((len(starts), 5, 2))
+        vertices[:, :, 0] = np.column_stack([
+            starts,  # bottom left
+            starts,  # top left
+            ends,  # top right
+            ends,  # bottom right
+            starts  # bottom left
+            ])
+        vertices[:, :, 1] = np.column_stack([
+            offsets,
+            tops,
+            tops,
+            offsets,
+            offsets
+            ])
+        return vertices
 
 
 class Triangle(Shape):
 
     """ Triangle. """
 
+    _stranded = True
+
+    _codes = [
+        Path.MOVETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.CLOSEPOLY
+        ]
+
     def __init__(
             self,
             start,
@@ -239,13 +794,6 @@ class Triangle(Shape):
             **kwargs
             ):
 
-        self._codes = [
-            Path.MOVETO,
-            Path.LINETO,
-            Path.LINETO,
-            Path.CLOSEPOLY
-            ]
-
         super().__init__(
             start=start,
             end=end,
@@ -258,35 +806,45 @@ class Triangle(Shape):
             )
         return
 
-    def _draw_vertices(self):
+    @classmethod
+    def _batch_vertices(cls, starts, ends, strands, widths, offsets):
         """ . """
 
-        start = self.start
-        end = self.end
-        width = self.width
-        offset = self.offset
-        strand = self.strand
-
-        if strand == -1:
-            start = self.end
-            end = self.start
-
-        self._vertices = np.array([
-            [start, offset],
-            [start, offset + width],
-            [end, offset + (width / 2)],
-            [start, offset]
+        vertices = np.empty((len(starts), 4, 2))
+        vertices[:, :, 0] = np.column_stack([
+            starts,
+            starts,
+            ends,
+            starts
             ])
-
-        if self.by_axis == "y":
-            self._vertices = self._vertices[:,::-1]
-        return
+        vertices[:, :, 1] = np.column_stack([
+            offsets,
+            offsets + widths,
+            offsets + (widths / 2),
+            offsets
+            ])
+        return vertices
 
 
 class Arrow(Shape):
 
     """ Arrow. """
 
+    _stranded = True
+    _params = ("head_length", "tail_width")
+    _geometry = Shape._geometry + _params
+
+    _codes = [
+        Path.MOVETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.CLOSEPOLY
+        ]
+
     def __init__(
             self,
             start,
@@ -301,17 +859,6 @@ class Arrow(Shape):
             **kwargs
             ):
         """ . """
-        self._codes = [
-            Path.MOVETO,
-            Path.LINETO,
-            Path.LINETO,
-            Path.LINETO,
-            Path.LINETO,
-            Path.LINETO,
-            Path.LINETO,
-            Path.CLOSEPOLY
-            ]
-
         self._tail_width = tail_width
         self._head_length = head_length
 
@@ -327,6 +874,22 @@ class Arrow(Shape):
             )
         return
 
+    def _unit_params(self, pixels=None):
+        length = abs(self.end - self.start)
+        head_length = self.head_length
+
+        # Express the clamped head length as a fraction of the length, see
+        # `_batch_vertices`.
+        if abs(head_length) >= length:
+            head_length = 1.
+        else:
+            head_length = head_length / length
+
+        tail_width = self.tail_width
+        if tail_width is not None:
+            tail_width = tail_width / self.width if self.width != 0 else 1.
+        return {"head_length": head_length, "tail_width": tail_width}
+
     @property
     def head_length(self):
         return self._head_length
@@ -334,7 +897,7 @@ class Arrow(Shape):
     @head_length.setter
     def head_length(self, head_length):
         self._head_length = head_length
-        self._draw_vertices()
+        self._invalidate()
 
     @property
     def tail_width(self):
@@ -343,56 +906,132 @@ class Arrow(Shape):
     @tail_width.setter
     def tail_width(self, tail_width):
         self._tail_width = tail_width
-        self._draw_vertices()
-
-    def _draw_vertices(self):
+        self._invalidate()
+
+    @classmethod
+    def _batch_vertices(
+            cls,
+            starts,
+            ends,
+            strands,
+            widths,
+            offsets,
+            head_length=1,
+            tail_width=None
+            ):
         """ . """
 
-        start = self.start
-        end = self.end
-        strand = self.strand
-        width = self.width
-        offset = self.offset
-
-        head_length = self.head_length
-        tail_width = self.tail_width
-
         if tail_width is None:
-            tail_width = self.width
-
-        if abs(head_length) > abs(end - start):
-            head_length = end - start
-
-        if start > end:
-            head_length *= -1
-
-        if strand == -1:
-            start = self.end
-            end = self.start
-            head_length *= -1
-
-        tail_offset = offset + (width - tail_width) / 2
-
-        self._vertices = np.array([
-            [start, tail_offset],
-            [start, tail_offset + tail_width],
-            [end - head_length, tail_offset + tail_width],
-            [end - head_length, offset + width],
-            [end, offset + (width / 2)],
-            [end - head_length, offset],
-            [end - head_length, tail_offset],
-            [start, tail_offset]
+            tail_widths = widths
+        else:
+            tail_widths = np.where(
+                np.equal(tail_width, None),
+                widths,
+                tail_width
+                ).astype(float)
+
+        # A head longer than the arrow is clamped to the whole arrow,
+        # pointing towards the (strand adjusted) end, whatever its sign.
+        # A negative head that fits points back from the end.
+        lengths = ends - starts
+        head_lengths = _as_float_array(head_length)
+        head_lengths = np.where(
+            np.abs(head_lengths) > np.abs(lengths),
+            lengths,
+            np.sign(lengths) * head_lengths
+            )
+
+        necks = ends - head_lengths
+        tail_offsets = offsets + (widths - tail_widths) / 2
+        tail_tops = tail_offsets + tail_widths
+
+        vertices = np.empty((len(starts), 8, 2))
+        vertices[:, :, 0] = np.column_stack([
+            starts,
+            starts,
+            necks,
+            necks,
+            ends,
+            necks,
+            necks,
+            starts
             ])
+        vertices[:, :, 1] = np.column_stack([
+            tail_offsets,
+            tail_tops,
+            tail_tops,
+            offsets + widths,
+            offsets + (widths / 2),
+            offsets,
+            tail_offsets,
+            tail_offsets
+            ])
+        return vertices
+
+
+class OpenTriangle(Shape):
+
+    """ . """
+
+    _codes = [
+        Path.MOVETO,
+        Path.LINETO,
+        Path.LINETO
+        ]
 
-        if self.by_axis == "y":
-            self._vertices = self._vertices[:,::-1]
+    def __init__(
+            self,
+            start,
+            end,
+            strand=None,
+            width=1,
+            offset=0,
+            by_axis=None,
+            name=None,
+            **kwargs
+            ):
 
+        super().__init__(
+            start=start,
+            end=end,
+            strand=strand,
+            offset=offset,
+            width=width,
+            by_axis=by_axis,
+            name=name,
+            **kwargs
+            )
         return
 
+    @classmethod
+    def _batch_vertices(cls, starts, ends, strands, widths, offsets):
+        """ . """
+
+        vertices = np.empty((len(starts), 3, 2))
+        vertices[:, :, 0] = np.column_stack([
+            starts,
+            (starts + ends) / 2,
+            ends
+            ])
+        vertices[:, :, 1] = np.column_stack([
+            offsets,
+            offsets + widths,
+            offsets
+            ])
+        return vertices
 
-class OpenTriangle(Shape):
+
+class OpenRectangle(Shape):
 
     """ . """
+
+    _codes = [
+        Path.MOVETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO
+        ]
+
     def __init__(
             self,
             start,
@@ -405,12 +1044,6 @@ class OpenTriangle(Shape):
             **kwargs
             ):
 
-        self._codes = [
-            Path.MOVETO,
-            Path.LINETO,
-            Path.LINETO
-            ]
-
         super().__init__(
             start=start,
             end=end,
@@ -423,47 +1056,65 @@ class OpenTriangle(Shape):
             )
         return
 
-    def _draw_vertices(self):
+    @classmethod
+    def _batch_vertices(cls, starts, ends, strands, widths, offsets):
         """ . """
 
-        start = self.start
-        end = self.end
-        offset = self.offset
-        width = self.width
+        tops = offsets + widths
 
-        self._vertices = np.array([
-            [start, offset],
-            [(start + end) / 2, offset + width],
-            [end, offset],
+        vertices = np.empty((len(starts), 4, 2))
+        vertices[:, :, 0] = np.column_stack([
+            starts,  # bottom left
+            starts,  # top left
+            ends,  # top right
+            ends  # bottom right
+            ])
+        vertices[:, :, 1] = np.column_stack([
+            offsets,
+            tops,
+            tops,
+            offsets
             ])
+        return vertices
 
-        if self.by_axis == "y":
-            self._vertices = self._vertices[:,::-1]
 
-        return
+class OpenSemicircle(Shape):
 
+    """ . """
 
-class OpenRectangle(Shape):
+    _adaptive = True
+    _params = ("resolution", )
+    _geometry = Shape._geometry + _params
+
+    _codes = [
+        Path.MOVETO,
+        Path.CURVE4,
+        Path.CURVE4,
+        Path.CURVE4,
+        ]
+
+    # Control points of the Bezier curve from (0, 0) to (1, 0).
+    _control = np.array([[0., 0.], [0., 1.], [1., 1.], [1., 0.]])
 
-    """ . """
     def __init__(
             self,
             start,
             end,
             strand=None,
+            resolution=None,
             width=1,
             offset=0,
             by_axis=None,
             name=None,
             **kwargs
             ):
-
-        self._codes = [
-            Path.MOVETO,
-            Path.LINETO,
-            Path.LINETO,
-            Path.LINETO
-            ]
+        """
+        Keyword arguments:
+        resolution -- None or int, the number of line segments to flatten
+            the curve into. If None, the curve is a cubic Bezier, which is
+            flattened to suit its size on screen when drawn.
+        """
+        self._resolution = resolution
 
         super().__init__(
             start=start,
@@ -477,29 +1128,83 @@ class OpenRectangle(Shape):
             )
         return
 
-    def _draw_vertices(self):
+    @property
+    def resolution(self):
+        return self._resolution
+
+    @resolution.setter
+    def resolution(self, resolution):
+        self._resolution = resolution
+        self._invalidate()
+
+    def _unit_params(self, pixels=None):
+        resolution = self.resolution
+        if resolution is None and pixels is not None:
+            resolution = adaptive_resolution(pixels)
+        return {"resolution": resolution}
+
+    @classmethod
+    def _curve(cls, resolution):
+        """ The Bezier curve flattened to `resolution` segments. """
+        t = np.linspace(0, 1, resolution + 1)
+        weights = np.column_stack([
+            (1 - t) ** 3,
+            3 * (1 - t) ** 2 * t,
+            3 * (1 - t) * t ** 2,
+            t ** 3
+            ])
+        return weights.dot(cls._control)
+
+    @classmethod
+    def _batch_codes(cls, resolution=None):
+        if resolution is None:
+            return super()._batch_codes()
+        return _line_codes(resolution + 1)
+
+    @classmethod
+    def _batch_vertices(
+            cls,
+            starts,
+            ends,
+            strands,
+            widths,
+            offsets,
+            resolution=None
+            ):
         """ . """
 
-        start = self.start
-        end = self.end
-        offset = self.offset
-        width = self.width
+        if resolution is not None:
+            unit = _unit_curve(cls, resolution)
+            return _place(unit, starts, ends, widths, offsets)
+
+        tops = offsets + widths
 
-        self._vertices = np.array([
-            [start, offset],  # bottom left
-            [start, offset + width],  # top left
-            [end, offset + width],  # top right
-            [end, offset],  # bottom right
+        vertices = np.empty((len(starts), 4, 2))
+        vertices[:, :, 0] = np.column_stack([
+            starts,  # bottom left
+            starts,  # top left
+            ends,  # top right
+            ends  # bottom right
+            ])
+        vertices[:, :, 1] = np.column_stack([
+            offsets,
+            tops,
+            tops,
+            offsets
             ])
+        return vertices
 
-        if self.by_axis == "y":
-            self._vertices = self._vertices[:,::-1]
 
-        return
 
-class OpenSemicircle(Shape):
+class Tick(Shape):
+
+    """ Tick. """
+
+    _codes = [
+        Path.MOVETO,
+        Path.LINETO
+        ]
 
-    """ . """
     def __init__(
             self,
             start,
@@ -512,13 +1217,6 @@ class OpenSemicircle(Shape):
             **kwargs
             ):
 
-        self._codes = [
-            Path.MOVETO,
-            Path.CURVE4,
-            Path.CURVE4,
-            Path.CURVE4,
-            ]
-
         super().__init__(
             start=start,
             end=end,
@@ -531,96 +1229,1326 @@ class OpenSemicircle(Shape):
             )
         return
 
-
-    def _draw_vertices(self):
+    @classmethod
+    def _batch_vertices(cls, starts, ends, strands, widths, offsets):
         """ . """
-        start = self.start
-        end = self.end
-        offset = self.offset
-        width = self.width
-
-        self._vertices = np.array([
-            [start, offset],  # bottom left
-            [start, offset + width],  # top left
-            [end, offset + width],  # top right
-            [end, offset],  # bottom right
-            ])
 
-        if self.by_axis == "y":
-            self._vertices = self._vertices[:,::-1]
+        middles = (starts + ends) / 2
+
+        vertices = np.empty((len(starts), 2, 2))
+        vertices[:, :, 0] = np.column_stack([middles, middles])
+        vertices[:, :, 1] = np.column_stack([offsets, offsets + widths])
+        return vertices
+
+
+class ShapeArray(object):
+
+    """ Columnar store for the geometry of many shapes.
+
+    Rather than keeping one Patch object per shape, the geometry is kept
+    as rows of a numpy structured array. The shape class (with its
+    parameters, e.g. Arrow head_length) and the drawing style of each
+    row are interned into small tables and referenced by index.
+
+    Indexing a ShapeArray returns a new Shape object for that row, which
+    can be used for picking or editing, and written back by assignment.
+
+    Methods
+    -------
+    append
+        Add a single shape.
+    extend
+        Add many shapes of the same kind and style.
+    batches
+        Vertices for each kind of shape in the array.
+    get_paths
+        One Path per row.
+    flat_paths
+        Vertices and codes of every row in two contiguous arrays.
+    instances
+        Template paths, with the offset and scale of each row drawn by them.
+    splice
+        Replace, insert or delete rows in place.
+    take
+        Some rows, sharing the kinds and styles.
+    concatenate
+        Join several ShapeArrays.
+    tobytes
+        Compact binary form, loaded by `frombytes`.
+    palette
+        Drawing properties of each style, indexed by the style column.
+    """
+
+    dtype = np.dtype([
+        ("start", np.float64),
+        ("end", np.float64),
+        ("strand", np.int8),
+        ("offset", np.float64),
+        ("width", np.float64),
+        ("kind", np.uint16),
+        ("style", np.uint32),
+        ])
+
+    def __init__(self, data=None, kinds=None, styles=None, by_axis=None):
+        """
+        Keyword arguments:
+        data -- structured array with dtype `ShapeArray.dtype`.
+        kinds -- list of (Shape subclass, params dict) tuples.
+        styles -- list of dicts of Patch kwargs.
+        by_axis -- "y" to draw the shapes along the y axis.
+        """
+        if data is None:
+            data = np.zeros(0, dtype=self.dtype)
+        self._data = np.array(data, dtype=self.dtype)
+        self._length = len(self._data)
+
+        self._kinds = list()
+        self._kind_index = dict()
+        for shape, params in (kinds or list()):
+            self.add_kind(shape, **params)
+
+        self._styles = list()
+        self._style_index = dict()
+        self._palette = None
+        for style in (styles or list()):
+            self.add_style(**style)
+
+        self.by_axis = by_axis
+        return
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return "ShapeArray(length={}, kinds={}, styles={})".format(
+            len(self),
+            len(self._kinds),
+            len(self._styles)
+            )
+
+    @property
+    def data(self):
+        """ Structured array view of the rows. """
+        return self._data[:self._length]
+
+    @property
+    def kinds(self):
+        return self._kinds
+
+    @property
+    def styles(self):
+        return self._styles
+
+    # Binary format, see `tobytes`.
+    _magic = b"BPSA"
+    _version = 1
+    _prefix = struct.Struct("<4sBxxxI")
+
+    def _writable(self):
+        """ Copy the rows if they are a read only view of a buffer. """
+        if not self._data.flags.writeable:
+            self._data = self.data.copy()
+        return
+
+    def _reserve(self, n):
+        """ Make room for n more rows, growing the buffer geometrically. """
+        self._writable()
+        needed = self._length + n
+        if needed <= len(self._data):
+            return
+        capacity = max(needed, 2 * len(self._data), 16)
+        data = np.zeros(capacity, dtype=self.dtype)
+        data[:self._length] = self.data
+        self._data = data
+        return
+
+    def add_kind(self, shape, **params):
+        """ Index of the (shape class, params) kind, adding it if new. """
+        key = (shape, _freeze(params))
+        try:
+            return self._kind_index[key]
+        except KeyError:
+            index = len(self._kinds)
+            self._kinds.append((shape, params))
+            self._kind_index[key] = index
+            return index
+
+    def palette(self):
+        """ Collection properties of each style, see `_style_palette`.
+
+        Properties of every row are then a single fancy index, e.g.
+        `palette["facecolors"][data["style"]]`. The palette is cached until
+        a style is added.
+        """
+        if (self._palette is None or
+                len(self._palette["linewidths"]) != len(self._styles)):
+            self._palette = _style_palette(self._styles)
+        return self._palette
+
+    def add_style(self, **style):
+        """ Index of the style, adding it if new. """
+        key = _freeze(style)
+        try:
+            return self._style_index[key]
+        except KeyError:
+            index = len(self._styles)
+            self._styles.append(style)
+            self._style_index[key] = index
+            return index
+
+    @staticmethod
+    def _split_kwargs(shape, kwargs):
+        """ Split Shape kwargs into geometry, params and style. """
+        kwargs = dict(kwargs)
+        geometry = {
+            "width": kwargs.pop("width", 1),
+            "offset": kwargs.pop("offset", 0),
+            }
+        kwargs.pop("by_axis", None)
+        kwargs.pop("name", None)
+        params = {k: kwargs.pop(k) for k in shape._params if k in kwargs}
+        return geometry, params, kwargs
+
+    def append(self, start, end, strand=None, shape=Rectangle, **kwargs):
+        """ Add a single shape.
+
+        Keyword arguments:
+        start -- start position.
+        end -- end position.
+        strand -- 1, -1, 0 or None.
+        shape -- Shape subclass.
+        kwargs -- any other Shape kwargs, e.g. width, head_length or
+            facecolor.
+        """
+        geometry, params, style = self._split_kwargs(shape, kwargs)
+        self._reserve(1)
+        row = self._data[self._length]
+        row["start"] = start
+        row["end"] = end
+        row["strand"] = 0 if strand is None else strand
+        row["offset"] = geometry["offset"]
+        row["width"] = geometry["width"]
+        row["kind"] = self.add_kind(shape, **params)
+        row["style"] = self.add_style(**style)
+        self._length += 1
+        return
+
+    def extend(
+            self,
+            starts,
+            ends,
+            strands=None,
+            widths=1,
+            offsets=0,
+            shape=Rectangle,
+            **kwargs
+            ):
+        """ Add many shapes sharing a kind and style.
+
+        Keyword arguments:
+        starts -- sequence of N start positions.
+        ends -- sequence of N end positions.
+        strands -- None or sequence of N strands.
+        widths -- scalar or sequence of N widths.
+        offsets -- scalar or sequence of N offsets.
+        shape -- Shape subclass.
+        kwargs -- shape params and style shared by all N shapes.
+        """
+        starts = np.atleast_1d(_as_float_array(starts))
+        n = len(starts)
+        _, params, style = self._split_kwargs(shape, kwargs)
+
+        self._reserve(n)
+        rows = self._data[self._length:self._length + n]
+        rows["start"] = starts
+        rows["end"] = _as_float_array(ends, n)
+        rows["strand"] = _as_strands(strands, n)
+        rows["offset"] = _as_float_array(offsets, n)
+        rows["width"] = _as_float_array(widths, n)
+        rows["kind"] = self.add_kind(shape, **params)
+        rows["style"] = self.add_style(**style)
+        self._length += n
+        return
+
+    def _append_rows(self, rows):
+        """ Add rows of a structured array with the same kinds and styles. """
+        self._reserve(len(rows))
+        self._data[self._length:self._length + len(rows)] = rows
+        self._length += len(rows)
+        return
 
+    def splice(self, start, stop, array=None, offset=0.):
+        """ Replace rows start to stop with the rows of another ShapeArray.
+
+        The rows after `stop` are moved in place, so appending, with start
+        and stop at the end, or replacing rows by as many rows, only copies
+        the new rows.
+
+        Keyword arguments:
+        start, stop -- the rows to replace, equal to insert rows.
+        array -- None or ShapeArray of the new rows. None deletes rows.
+        offset -- extra offset of the new rows.
+        """
+        n = 0 if array is None else len(array)
+        change = n - (stop - start)
+        self._reserve(max(change, 0))
+        if change != 0:
+            length = self._length
+            self._data[start + n:length + change] = self._data[stop:length]
+            self._length += change
+        if n == 0:
+            return
+
+        kinds = np.array(
+            [self.add_kind(s, **p) for s, p in array.kinds] or [0],
+            dtype=self.dtype["kind"]
+            )
+        styles = np.array(
+            [self.add_style(**s) for s in array.styles] or [0],
+            dtype=self.dtype["style"]
+            )
+
+        rows = self._data[start:start + n]
+        rows[:] = array.data
+        rows["offset"] += offset
+        rows["kind"] = kinds[rows["kind"]]
+        rows["style"] = styles[rows["style"]]
+        return
+
+    def delete(self, rows):
+        """ Remove rows in place, keeping the order of the others.
+
+        Keyword arguments:
+        rows -- int or bool array selecting rows.
+        """
+        self._writable()
+        keep = np.ones(self._length, dtype=bool)
+        keep[rows] = False
+        kept = self.data[keep]
+        self._data[:len(kept)] = kept
+        self._length = len(kept)
         return
 
-'''
+    def take(self, rows):
+        """ A new ShapeArray of some rows, sharing the kinds and styles.
+
+        Keyword arguments:
+        rows -- int or bool array selecting rows.
+        """
+        new = type(self)(self.data[rows], by_axis=self.by_axis)
+        new._kinds = list(self._kinds)
+        new._kind_index = dict(self._kind_index)
+        new._styles = list(self._styles)
+        new._style_index = dict(self._style_index)
+        new._palette = self.palette()
+        return new
+
+    def append_shape(self, shape):
+        """ Add an existing Shape object. """
+        self.append(
+            shape.start,
+            shape.end,
+            shape.strand,
+            shape=type(shape),
+            width=shape.width,
+            offset=shape.offset,
+            **dict(shape._shape_params(), **shape.get_style())
+            )
+        return
+
+    @classmethod
+    def from_shapes(cls, shapes, by_axis=None):
+        """ Create a ShapeArray from a sequence of Shape objects. """
+        array = cls(by_axis=by_axis)
+        array._reserve(len(shapes))
+        for shape in shapes:
+            array.append_shape(shape)
+        return array
+
+    def _check_index(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ShapeArray index out of range.")
+        return index
+
+    def __getitem__(self, index):
+        """ A new Shape object for a single row. """
+        row = self._data[self._check_index(index)]
+        shape, params = self._kinds[row["kind"]]
+        strand = int(row["strand"])
+        return shape(
+            start=float(row["start"]),
+            end=float(row["end"]),
+            strand=None if strand == 0 else strand,
+            width=float(row["width"]),
+            offset=float(row["offset"]),
+            by_axis=self.by_axis,
+            **dict(params, **self._styles[row["style"]])
+            )
+
+    def __setitem__(self, index, shape):
+        """ Write a Shape object back into a row. """
+        index = self._check_index(index)
+        self._writable()
+        row = self._data[index]
+        row["start"] = shape.start
+        row["end"] = shape.end
+        row["strand"] = 0 if shape.strand is None else shape.strand
+        row["offset"] = shape.offset
+        row["width"] = shape.width
+        row["kind"] = self.add_kind(type(shape), **shape._shape_params())
+        row["style"] = self.add_style(**shape.get_style())
+        return
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def batches(self, scale=None):
+        """ Compute vertices for each kind of shape in the array.
+
+        Keyword arguments:
+        scale -- None or pixels per data unit along the length of shapes,
+            used to choose the resolution of curved and wave shapes.
+
+        Yields:
+        index -- int array of the N rows of this kind.
+        vertices -- float array (N, k, 2).
+        codes -- uint8 array (k, ).
+        """
+        data = self.data
+        for kind in np.unique(data["kind"]):
+            index = np.flatnonzero(data["kind"] == kind)
+            rows = data[index]
+            shape, params = self._kinds[kind]
+            for group, group_params in shape._batch_groups(
+                    rows, params, scale):
+                group_rows = rows[group]
+                vertices, codes = shape.batch(
+                    group_rows["start"],
+                    group_rows["end"],
+                    group_rows["strand"],
+                    group_rows["width"],
+                    group_rows["offset"],
+                    by_axis=self.by_axis,
+                    **group_params
+                    )
+                yield index[group], vertices, codes
+
+    def get_paths(self, scale=None):
+        """ A list with one Path per row, in row order.
+
+        Keyword arguments:
+        scale -- None or pixels per data unit, see `batches`.
+        """
+        paths = [None] * len(self)
+        for index, vertices, codes in self.batches(scale):
+            for i, v in zip(index, vertices):
+                paths[i] = Path(v, codes)
+        return paths
+
+    def flat_paths(self, scale=None):
+        """ Vertices and codes of every row, in row order, without Paths.
+
+        Keyword arguments:
+        scale -- None or pixels per data unit, see `batches`.
+
+        Returns:
+        vertices -- float array (M, 2).
+        codes -- uint8 array (M, ).
+        offsets -- int array (N + 1, ), row i is drawn by the vertices and
+            codes from offsets[i] to offsets[i + 1].
+        """
+        batches = list(self.batches(scale))
+        counts = np.zeros(len(self), dtype=np.int64)
+        for index, _, codes in batches:
+            counts[index] = len(codes)
+
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        vertices = np.empty((offsets[-1], 2))
+        codes = np.empty(offsets[-1], dtype=Path.code_type)
+        for index, batch_vertices, batch_codes in batches:
+            positions = offsets[index, None] + np.arange(len(batch_codes))
+            vertices[positions.ravel()] = batch_vertices.reshape(-1, 2)
+            codes[positions] = batch_codes
+        return vertices, codes, offsets
+
+    def instances(self, scale=None):
+        """ Group the rows into copies of a few template paths.
+
+        Each row is drawn by a template, placed by its (start, offset) and
+        stretched by its (end - start, width). Rows of the same kind and
+        strand share the template of a shape from 0 to 1 with width 1.
+        Shapes that don't stretch evenly, e.g. Arrows with a fixed
+        head_length, share a template with the rows of the same length and
+        width only, so fixed size glyphs still share one template.
+
+        Keyword arguments:
+        scale -- None or pixels per data unit, see `batches`.
+
+        Yields:
+        index -- int array of the N rows drawn by the template.
+        template -- Path.
+        offsets -- float array (N, 2), where to place the template.
+        scales -- float array (N, 2), how much to stretch the template.
+        """
+        data = self.data
+        for kind in np.unique(data["kind"]):
+            kind_index = np.flatnonzero(data["kind"] == kind)
+            shape, params = self._kinds[kind]
+            for group, group_params in shape._batch_groups(
+                    data[kind_index], params, scale):
+                rows = data[kind_index[group]]
+                for strand in np.unique(rows["strand"]):
+                    stranded = np.flatnonzero(rows["strand"] == strand)
+                    index = kind_index[group[stranded]]
+                    for instance in self._instances(
+                            index, shape, strand, group_params):
+                        yield instance
+
+    def _instances(self, index, shape, strand, params):
+        """ `instances` of some rows of one kind, strand and params. """
+        rows = self.data[index]
+        sizes = np.column_stack([rows["end"] - rows["start"], rows["width"]])
+        # Unique pairs, sorted faster as complex numbers than as rows.
+        unique, inverse = np.unique(
+            sizes.view(complex).ravel(),
+            return_inverse=True
+            )
+        unique = unique.view(float).reshape(-1, 2)
+        inverse = inverse.ravel()
+        n = len(unique)
+
+        unit, codes = shape.batch([0.], [1.], [strand], **params)
+        vertices, _ = shape.batch(
+            np.zeros(n),
+            unique[:, 0],
+            np.full(n, strand),
+            unique[:, 1],
+            np.zeros(n),
+            **params
+            )
+        stretched = np.isclose(vertices, unit * unique[:, None, :]).all(
+            axis=(1, 2)
+            )
+
+        offsets = np.column_stack([rows["start"], rows["offset"]])
+        scales = sizes.copy()
+        templates = [(np.flatnonzero(stretched[inverse]), unit[0])]
+        for size in np.flatnonzero(~stretched):
+            rows_of_size = np.flatnonzero(inverse == size)
+            scales[rows_of_size] = 1.
+            templates.append((rows_of_size, vertices[size]))
+
+        swap = slice(None, None, -1 if self.by_axis == "y" else 1)
+        for rows_of_template, template in templates:
+            if len(rows_of_template) == 0:
+                continue
+            yield (
+                index[rows_of_template],
+                Path(template[:, swap], codes),
+                offsets[rows_of_template][:, swap],
+                scales[rows_of_template][:, swap]
+                )
+        return
+
+    def level_of_detail(self, scale, rectangle=None, tick=None):
+        """ A simplified copy of the array for drawing at a given zoom.
+
+        Shapes shorter than `rectangle` pixels become rectangles and shapes
+        shorter than `tick` pixels become ticks. Runs of sub-pixel shapes
+        in the same lane (offset, width and style), less than `tick` pixels
+        apart, are merged into a single coverage rectangle. The number of
+        rows is then bounded by the pixels on screen, not the shapes.
+
+        Keyword arguments:
+        scale -- float, pixels per data unit along the length of shapes.
+        rectangle -- length in pixels, default LOD_RECTANGLE.
+        tick -- length in pixels, default LOD_TICK.
+
+        Returns:
+        ShapeArray -- sharing the kinds and styles of this array, plus any
+            rectangle, tick and tick style entries needed.
+        """
+        if rectangle is None:
+            rectangle = LOD_RECTANGLE
+        if tick is None:
+            tick = LOD_TICK
+
+        new = ShapeArray(
+            kinds=self.kinds,
+            styles=self.styles,
+            by_axis=self.by_axis
+            )
+
+        data = self.data
+        lows = np.minimum(data["start"], data["end"])
+        highs = np.maximum(data["start"], data["end"])
+        pixels = (highs - lows) * scale
+
+        full = pixels >= rectangle
+        new._append_rows(data[full])
+
+        small = pixels < tick
+        rows = data[~full & ~small].copy()
+        rows["kind"] = new.add_kind(Rectangle)
+        new._append_rows(rows)
+
+        rows = data[small]
+        if len(rows) == 0:
+            return new
+
+        lows = lows[small]
+        highs = highs[small]
+        order = np.lexsort(
+            (lows, rows["width"], rows["offset"], rows["style"])
+            )
+        rows = rows[order]
+        lows = lows[order]
+        highs = highs[order]
+
+        lanes = np.zeros(len(rows), dtype=bool)
+        lanes[0] = True
+        for column in ("style", "offset", "width"):
+            lanes[1:] |= rows[column][1:] != rows[column][:-1]
+
+        # A new cluster starts with each lane, or where the gap to
+        # everything before it in the lane is at least a tick wide.
+        gap = tick / scale if scale > 0 else np.inf
+        breaks = lanes.copy()
+        lane_starts = np.flatnonzero(lanes)
+        lane_ends = np.append(lane_starts[1:], len(rows))
+        for first, last in zip(lane_starts, lane_ends):
+            reach = np.maximum.accumulate(highs[first:last])
+            breaks[first + 1:last] = lows[first + 1:last] - reach[:-1] >= gap
+
+        firsts = np.flatnonzero(breaks)
+        counts = np.diff(np.append(firsts, len(rows)))
+
+        clusters = rows[firsts].copy()
+        clusters["start"] = lows[firsts]
+        clusters["end"] = np.maximum.reduceat(highs, firsts)
+        clusters["strand"] = 0
+
+        single = counts == 1
+        clusters["kind"] = np.where(
+            single,
+            new.add_kind(Tick),
+            new.add_kind(Rectangle)
+            )
+
+        # Ticks are lines, so stroke them in the fill colour of the style.
+        tick_styles = {
+            style: new.add_style(**_tick_style(self.styles[style]))
+            for style in np.unique(clusters["style"][single])
+            }
+        for style, tick_style in tick_styles.items():
+            clusters["style"][single & (clusters["style"] == style)] = \
+                tick_style
+
+        new._append_rows(clusters)
+        return new
+
+    def tobytes(self, meta=None):
+        """ Compact binary form of the rows, kinds and styles.
+
+        The bytes hold a short prefix, a JSON table of the kinds, styles
+        and `meta`, then the raw little endian rows. Shape classes are
+        stored by name, so they must be importable where the bytes are
+        loaded.
+
+        Keyword arguments:
+        meta -- None or a JSON serialisable dict to store with the rows.
+        """
+        header = json.dumps(
+            {
+                "length": len(self),
+                "by_axis": self.by_axis,
+                "kinds": [[_shape_name(s), p] for s, p in self._kinds],
+                "styles": self._styles,
+                "meta": meta or dict(),
+                },
+            default=_json_default
+            ).encode("utf-8")
+
+        # Pad the header so that the rows start on an 8 byte boundary.
+        padding = -(self._prefix.size + len(header)) % 8
+        header += b" " * padding
+
+        rows = self.data.astype(self.dtype.newbyteorder("<"), copy=False)
+        return b"".join([
+            self._prefix.pack(self._magic, self._version, len(header)),
+            header,
+            rows.tobytes()
+            ])
+
+    @classmethod
+    def frombytes(cls, buffer):
+        """ Load a ShapeArray saved by `tobytes`.
+
+        The rows are a read only view of `buffer`, without copying, until
+        the array is modified.
+        """
+        return cls._unpack(buffer)[0]
+
+    @classmethod
+    def _unpack(cls, buffer):
+        """ Load a ShapeArray and the meta dict saved by `tobytes`. """
+        magic, version, size = cls._prefix.unpack_from(buffer)
+        if magic != cls._magic or version != cls._version:
+            raise ValueError("Not a ShapeArray buffer.")
+
+        start = cls._prefix.size
+        header = json.loads(bytes(buffer[start:start + size]).decode("utf-8"))
+
+        array = cls(
+            kinds=[
+                (_shape_class(name), {k: _thaw(v) for k, v in params.items()})
+                for name, params in header["kinds"]
+                ],
+            styles=[
+                {k: _thaw(v) for k, v in style.items()}
+                for style in header["styles"]
+                ],
+            by_axis=header["by_axis"]
+            )
+
+        data = np.frombuffer(
+            buffer,
+            dtype=cls.dtype.newbyteorder("<"),
+            count=header["length"],
+            offset=start + size
+            )
+        array._data = data.astype(cls.dtype, copy=False)
+        array._length = len(data)
+        return array, header["meta"]
+
+    @classmethod
+    def concatenate(cls, arrays, offsets=None, by_axis=None):
+        """ Join several ShapeArrays into one.
+
+        Keyword arguments:
+        arrays -- sequence of ShapeArrays.
+        offsets -- None or sequence with an extra offset for each array.
+        by_axis -- by_axis of the new array.
+        """
+        new = cls(by_axis=by_axis)
+        new._reserve(sum(len(a) for a in arrays))
+
+        if offsets is None:
+            offsets = [0] * len(arrays)
+
+        for array, offset in zip(arrays, offsets):
+            new.splice(len(new), len(new), array, offset)
+        return new
+
 
 class Hexagon(Shape):
 
     """ Hexagon. """
 
-    def __init__(self):
+    _params = ("point_length", )
+    _geometry = Shape._geometry + _params
+
+    _codes = [
+        Path.MOVETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.CLOSEPOLY
+        ]
+
+    def __init__(
+            self,
+            start,
+            end,
+            strand=None,
+            point_length=1,
+            width=1,
+            offset=0,
+            by_axis=None,
+            name=None,
+            **kwargs
+            ):
+        """
+        Keyword arguments:
+        point_length -- the length of the points at each end, clamped to
+            half of the length of the shape.
+        """
+        self._point_length = point_length
+
+        super().__init__(
+            start=start,
+            end=end,
+            strand=strand,
+            offset=offset,
+            width=width,
+            by_axis=by_axis,
+            name=name,
+            **kwargs
+            )
         return
 
+    @property
+    def point_length(self):
+        return self._point_length
+
+    @point_length.setter
+    def point_length(self, point_length):
+        self._point_length = point_length
+        self._invalidate()
+
+    def _unit_params(self, pixels=None):
+        length = abs(self.end - self.start)
+        if length == 0:
+            return {"point_length": 0.5}
+        return {
+            "point_length": min(abs(self.point_length), length / 2) / length
+            }
+
+    @classmethod
+    def _batch_vertices(
+            cls,
+            starts,
+            ends,
+            strands,
+            widths,
+            offsets,
+            point_length=1
+            ):
+        """ . """
+
+        lengths = ends - starts
+        point_lengths = np.sign(lengths) * np.minimum(
+            np.abs(_as_float_array(point_length)),
+            np.abs(lengths) / 2
+            )
+        lefts = starts + point_lengths
+        rights = ends - point_lengths
+        middles = offsets + widths / 2
+        tops = offsets + widths
+
+        vertices = np.empty((len(starts), 7, 2))
+        vertices[:, :, 0] = np.column_stack([
+            starts,
+            lefts,
+            rights,
+            ends,
+            rights,
+            lefts,
+            starts
+            ])
+        vertices[:, :, 1] = np.column_stack([
+            middles,
+            tops,
+            tops,
+            middles,
+            offsets,
+            offsets,
+            middles
+            ])
+        return vertices
+
 
 class Ellipse(Shape):
 
     """ Ellipse. """
 
-    def __init__(self):
+    _adaptive = True
+    _params = ("resolution", )
+    _geometry = Shape._geometry + _params
+
+    def __init__(
+            self,
+            start,
+            end,
+            strand=None,
+            resolution=None,
+            width=1,
+            offset=0,
+            by_axis=None,
+            name=None,
+            **kwargs
+            ):
+        """
+        Keyword arguments:
+        resolution -- None or int, the number of sides of the polygon
+            approximating the ellipse. If None, the number of sides suits
+            the size of the ellipse on screen when drawn.
+        """
+        self._resolution = resolution
+
+        super().__init__(
+            start=start,
+            end=end,
+            strand=strand,
+            offset=offset,
+            width=width,
+            by_axis=by_axis,
+            name=name,
+            **kwargs
+            )
         return
 
+    @property
+    def resolution(self):
+        return self._resolution
+
+    @resolution.setter
+    def resolution(self, resolution):
+        self._resolution = resolution
+        self._invalidate()
+
+    def _unit_params(self, pixels=None):
+        resolution = self.resolution
+        if resolution is None:
+            if pixels is None:
+                resolution = RESOLUTION_DEFAULT
+            else:
+                # A flat ellipse is about twice its length around.
+                resolution = adaptive_resolution(2 * pixels)
+        return {"resolution": resolution}
+
+    @classmethod
+    def _curve(cls, resolution):
+        """ Polygon with `resolution` sides, closed at the left. """
+        angles = np.pi + np.linspace(0, 2 * np.pi, resolution + 1)
+        return np.column_stack([
+            0.5 + 0.5 * np.cos(angles),
+            0.5 + 0.5 * np.sin(angles)
+            ])
+
+    @classmethod
+    def _batch_codes(cls, resolution=None):
+        if resolution is None:
+            resolution = RESOLUTION_DEFAULT
+        return _line_codes(resolution + 1, closed=True)
+
+    @classmethod
+    def _batch_vertices(
+            cls,
+            starts,
+            ends,
+            strands,
+            widths,
+            offsets,
+            resolution=None
+            ):
+        """ . """
+
+        if resolution is None:
+            resolution = RESOLUTION_DEFAULT
+        unit = _unit_curve(cls, resolution)
+        return _place(unit, starts, ends, widths, offsets)
+
 
 class Trapeziod(Shape):
 
     """ Trapeziod. """
 
-    def __init__(self):
+    _params = ("slope_length", )
+    _geometry = Shape._geometry + _params
+
+    _codes = [
+        Path.MOVETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.LINETO,
+        Path.CLOSEPOLY
+        ]
+
+    def __init__(
+            self,
+            start,
+            end,
+            strand=None,
+            slope_length=1,
+            width=1,
+            offset=0,
+            by_axis=None,
+            name=None,
+            **kwargs
+            ):
+        """
+        Keyword arguments:
+        slope_length -- the length of the sloped sides, clamped to half of
+            the length of the shape.
+        """
+        self._slope_length = slope_length
+
+        super().__init__(
+            start=start,
+            end=end,
+            strand=strand,
+            offset=offset,
+            width=width,
+            by_axis=by_axis,
+            name=name,
+            **kwargs
+            )
         return
 
+    @property
+    def slope_length(self):
+        return self._slope_length
+
+    @slope_length.setter
+    def slope_length(self, slope_length):
+        self._slope_length = slope_length
+        self._invalidate()
+
+    def _unit_params(self, pixels=None):
+        length = abs(self.end - self.start)
+        if length == 0:
+            return {"slope_length": 0.5}
+        return {
+            "slope_length": min(abs(self.slope_length), length / 2) / length
+            }
+
+    @classmethod
+    def _batch_vertices(
+            cls,
+            starts,
+            ends,
+            strands,
+            widths,
+            offsets,
+            slope_length=1
+            ):
+        """ . """
+
+        lengths = ends - starts
+        slope_lengths = np.sign(lengths) * np.minimum(
+            np.abs(_as_float_array(slope_length)),
+            np.abs(lengths) / 2
+            )
+        tops = offsets + widths
+
+        vertices = np.empty((len(starts), 5, 2))
+        vertices[:, :, 0] = np.column_stack([
+            starts,
+            starts + slope_lengths,
+            ends - slope_lengths,
+            ends,
+            starts
+            ])
+        vertices[:, :, 1] = np.column_stack([
+            offsets,
+            tops,
+            tops,
+            offsets,
+            offsets
+            ])
+        return vertices
 
-class SineWave(Shape):
 
-    """ . """
+class Wave(Shape):
 
-    def __init__(self):
-        return
+    """ Base class for periodic shapes.
 
+    The length of a wave is divided into a whole number of cycles of about
+    `period` data units each, or a single cycle if period is None. Wave
+    vertices are computed for a unit template per number of cycles, and
+    cached.
+    """
 
-class SawtoothWave(Shape):
+    _params = ("period", )
+    _geometry = Shape._geometry + _params
 
-    """ . """
+    def __init__(
+            self,
+            start,
+            end,
+            strand=None,
+            period=None,
+            width=1,
+            offset=0,
+            by_axis=None,
+            name=None,
+            **kwargs
+            ):
+        """
+        Keyword arguments:
+        period -- None or the approximate length of one cycle.
+        """
+        self._period = period
 
-    def __init__(self):
+        super().__init__(
+            start=start,
+            end=end,
+            strand=strand,
+            offset=offset,
+            width=width,
+            by_axis=by_axis,
+            name=name,
+            **kwargs
+            )
         return
 
+    @property
+    def period(self):
+        return self._period
+
+    @period.setter
+    def period(self, period):
+        self._period = period
+        self._invalidate()
+
+    @staticmethod
+    def _cycle_counts(lengths, period):
+        """ Whole number of cycles in each of an array of lengths. """
+        if not period:
+            return np.ones(len(lengths), dtype=int)
+        return np.maximum(np.rint(lengths / abs(period)), 1).astype(int)
+
+    def _cycles(self):
+        length = abs(self.end - self.start)
+        return int(self._cycle_counts(np.array([length]), self.period)[0])
+
+    @classmethod
+    def batch(
+            cls,
+            starts,
+            ends,
+            strands=None,
+            widths=1,
+            offsets=0,
+            by_axis=None,
+            period=None,
+            **kwargs
+            ):
+        """ Compute the vertices of many waves at once, see `Shape.batch`.
+
+        Keyword arguments:
+        period -- None or the approximate length of one cycle, as for a
+            single wave. The number of cycles of each wave is found from
+            its length, and must be the same for every wave of the batch.
+        kwargs -- e.g. cycles, the number of cycles of every wave if
+            period is None.
+        """
+        if period:
+            starts = np.atleast_1d(_as_float_array(starts))
+            lengths = np.abs(_as_float_array(ends, len(starts)) - starts)
+            cycles = np.unique(cls._cycle_counts(lengths, period))
+            if len(cycles) > 1:
+                raise ValueError(
+                    "Waves of period {!r} have {} cycles, batch them by "
+                    "their number of cycles.".format(period, cycles.tolist())
+                    )
+            kwargs["cycles"] = int(cycles[0])
+        return super().batch(
+            starts,
+            ends,
+            strands,
+            widths,
+            offsets,
+            by_axis,
+            **kwargs
+            )
 
-class SquareWave(Shape):
+    def _unit_params(self, pixels=None):
+        cycles = self._cycles()
+        params = {"cycles": cycles}
+        if self._adaptive:
+            resolution = self.resolution
+            if resolution is None and pixels is not None:
+                resolution = adaptive_resolution(pixels / cycles)
+            params["resolution"] = resolution
+        return params
+
+    @classmethod
+    def _batch_groups(cls, rows, params, scale=None):
+        # Rows with different numbers of cycles have different numbers of
+        # vertices, so batch them separately.
+        lengths = np.abs(rows["end"] - rows["start"])
+        cycles = cls._cycle_counts(lengths, params.get("period"))
+        for count in np.unique(cycles):
+            index = np.flatnonzero(cycles == count)
+            batch = {"cycles": int(count)}
+            if cls._adaptive:
+                resolution = params.get("resolution")
+                if resolution is None and scale is not None:
+                    resolution = adaptive_resolution(
+                        np.median(lengths[index]) * scale / count
+                        )
+                batch["resolution"] = resolution
+            yield index, batch
+
+    @classmethod
+    def _cycle(cls, resolution):
+        """ Unit vertices of one cycle, and of the end of the last cycle.
+
+        Returns:
+        cycle -- float array (m, 2), with x from 0 to 1. Cycles are
+            placed end to end.
+        last -- float array (j, 2), appended to the final cycle.
+        """
+        raise NotImplementedError
 
-    """ . """
+    @classmethod
+    def _wave(cls, cycles, resolution):
+        """ Unit vertices of `cycles` cycles from (0, 0) to (1, 1). """
+        cycle, last = cls._cycle(resolution)
+        shifts = np.arange(cycles, dtype=float)[:, None, None] * [1., 0.]
+        vertices = np.concatenate([
+            (cycle[None, :, :] + shifts).reshape(-1, 2),
+            last + [cycles - 1, 0.]
+            ])
+        vertices[:, 0] /= cycles
+        return vertices
+
+    # Number of polylines in the path, and are they closed?
+    _parts = 1
+    _closed = False
+
+    @classmethod
+    def _batch_codes(cls, cycles=1, resolution=None):
+        length = len(_unit_wave(cls, cycles, resolution))
+        return _line_codes(length, cls._parts, cls._closed)
+
+    @classmethod
+    def _batch_vertices(
+            cls,
+            starts,
+            ends,
+            strands,
+            widths,
+            offsets,
+            cycles=1,
+            resolution=None
+            ):
+        """ . """
 
-    def __init__(self):
-        return
+        unit = _unit_wave(cls, cycles, resolution)
+        return _place(unit, starts, ends, widths, offsets)
 
 
-class TriangleWave(Shape):
+class SineWave(Wave):
 
-    """ . """
+    """ SineWave. """
+
+    _adaptive = True
+    _params = Wave._params + ("resolution", )
+    _geometry = Shape._geometry + _params
+
+    def __init__(
+            self,
+            start,
+            end,
+            strand=None,
+            period=None,
+            resolution=None,
+            width=1,
+            offset=0,
+            by_axis=None,
+            name=None,
+            **kwargs
+            ):
+        """
+        Keyword arguments:
+        resolution -- None or int, the number of line segments per cycle.
+            If None, the number of segments suits the size of each cycle on
+            screen when drawn.
+        """
+        self._resolution = resolution
 
-    def __init__(self):
+        super().__init__(
+            start=start,
+            end=end,
+            strand=strand,
+            period=period,
+            offset=offset,
+            width=width,
+            by_axis=by_axis,
+            name=name,
+            **kwargs
+            )
         return
 
+    @property
+    def resolution(self):
+        return self._resolution
 
-class Helix(Shape):
+    @resolution.setter
+    def resolution(self, resolution):
+        self._resolution = resolution
+        self._invalidate()
 
-    """ . """
+    @classmethod
+    def _cycle(cls, resolution):
+        if resolution is None:
+            resolution = RESOLUTION_DEFAULT
+        x = np.arange(resolution) / resolution
+        cycle = np.column_stack([x, 0.5 + 0.5 * np.sin(2 * np.pi * x)])
+        return cycle, np.array([[1., 0.5]])
 
-    def __init__(self):
-        return
 
+class SawtoothWave(Wave):
 
-class DoubleHelix(Shape):
+    """ SawtoothWave. """
 
-    """ . """
+    @classmethod
+    def _cycle(cls, resolution):
+        cycle = np.array([[0., 0.], [1., 1.]])
+        return cycle, np.array([[1., 0.]])
 
-    def __init__(self):
-        return
-'''
+
+class SquareWave(Wave):
+
+    """ SquareWave. """
+
+    @classmethod
+    def _cycle(cls, resolution):
+        cycle = np.array([[0., 0.], [0., 1.], [0.5, 1.], [0.5, 0.]])
+        return cycle, np.array([[1., 0.]])
+
+
+class TriangleWave(Wave):
+
+    """ TriangleWave. """
+
+    @classmethod
+    def _cycle(cls, resolution):
+        cycle = np.array([[0., 0.], [0.5, 1.]])
+        return cycle, np.array([[1., 0.]])
+
+
+class Helix(SineWave):
+
+    """ Helix. """
+
+    _closed = True
+
+    # Thickness of the ribbon as a fraction of the width.
+    _thickness = 0.3
+
+    @classmethod
+    def _wave(cls, cycles, resolution):
+        """ A closed sine shaped ribbon. """
+        line = super()._wave(cycles, resolution)
+        line[:, 1] = 0.5 + (line[:, 1] - 0.5) * (1 - cls._thickness)
+        half = [0., cls._thickness / 2]
+        return np.concatenate([
+            line + half,
+            line[::-1] - half,
+            line[:1] + half
+            ])
+
+
+class DoubleHelix(SineWave):
+
+    """ DoubleHelix. """
+
+    _parts = 2
+
+    @classmethod
+    def _wave(cls, cycles, resolution):
+        """ Two sine waves, half a cycle out of phase. """
+        line = super()._wave(cycles, resolution)
+        other = line.copy()
+        other[:, 1] = 1 - other[:, 1]
+        return np.concatenate([line, other])
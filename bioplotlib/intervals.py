@@ -0,0 +1,387 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+""" Interval index for fast overlap queries, e.g. hit testing, packing
+of intervals into non-overlapping rows, e.g. stacked tracks, and binned
+summaries of intervals for zoomed out views.
+"""
+
+_contributors = [
+    "Darcy Jones <darcy.ab.jones@gmail.com>"
+    ]
+
+
+############################ Import all modules ##############################
+
+
+from heapq import heappush, heappop
+
+import numpy as np
+
+
+################################## Classes ###################################
+
+class IntervalIndex(object):
+
+    """ Index of closed intervals for fast overlap queries.
+
+    Intervals are kept sorted by start, augmented with a binary tree of the
+    maximum end of each run of intervals. A query descends the tree one
+    level at a time, pruning runs that start after the query or end before
+    it, so finding the k overlapping intervals takes O(log n + k) steps
+    rather than a scan of every interval.
+
+    Inserting or removing intervals merges them into the sorted order
+    without re-sorting, and rebuilds the tree from the ends in linear time.
+
+    Methods
+    -------
+    overlap
+        Ids of the intervals overlapping a point or range.
+    insert
+        Add intervals.
+    remove
+        Remove intervals by id.
+    """
+
+    def __init__(self, starts=(), ends=(), ids=None):
+        """
+        Keyword arguments:
+        starts -- sequence of N interval starts.
+        ends -- sequence of N interval ends, each at least its start.
+        ids -- None or sequence of N ints returned by queries. Default is
+            the position of each interval in `starts`.
+        """
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        if ids is None:
+            ids = np.arange(len(starts))
+
+        order = np.argsort(starts, kind="mergesort")
+        self._starts = starts[order]
+        self._ends = ends[order]
+        self._ids = np.asarray(ids, dtype=np.int64)[order]
+        self._build()
+        return
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __repr__(self):
+        return "IntervalIndex(length={})".format(len(self))
+
+    @property
+    def ids(self):
+        """ Ids of the intervals, sorted by start. """
+        return self._ids
+
+    def _build(self):
+        """ Compute the maximum end of each node of the tree.
+
+        Level 0 holds the ends, padded to a power of two. Each level above
+        holds the maximum of pairs of nodes below it.
+        """
+        size = 1
+        while size < len(self._ends):
+            size *= 2
+
+        level = np.full(size, -np.inf)
+        level[:len(self._ends)] = self._ends
+        self._levels = [level]
+        while len(level) > 1:
+            level = np.maximum(level[0::2], level[1::2])
+            self._levels.append(level)
+        return
+
+    def overlap(self, low, high=None):
+        """ Ids of the intervals overlapping [low, high].
+
+        Keyword arguments:
+        low -- start of the query range.
+        high -- end of the query range, default is `low`, to query a point.
+
+        Returns:
+        int array -- ids of the overlapping intervals, sorted by start.
+        """
+        if high is None:
+            high = low
+        if len(self) == 0:
+            return self._ids[:0]
+
+        # Intervals starting after the query are excluded, the tree
+        # excludes those ending before it.
+        stop = np.searchsorted(self._starts, high, side="right")
+
+        nodes = np.zeros(1, dtype=np.int64)
+        for height in range(len(self._levels) - 1, -1, -1):
+            keep = (
+                (nodes << height < stop) &
+                (self._levels[height][nodes] >= low)
+                )
+            nodes = nodes[keep]
+            if height > 0:
+                nodes = np.stack([2 * nodes, 2 * nodes + 1], axis=1).ravel()
+        return self._ids[nodes]
+
+    def insert(self, starts, ends, ids=None):
+        """ Add intervals, keeping the existing ones in place.
+
+        Keyword arguments:
+        starts -- sequence of N interval starts.
+        ends -- sequence of N interval ends.
+        ids -- None or sequence of N ints. Default continues from the
+            largest existing id.
+        """
+        starts = np.atleast_1d(np.asarray(starts, dtype=float))
+        ends = np.atleast_1d(np.asarray(ends, dtype=float))
+        if ids is None:
+            first = self._ids.max() + 1 if len(self) > 0 else 0
+            ids = np.arange(first, first + len(starts))
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+
+        order = np.argsort(starts, kind="mergesort")
+        positions = np.searchsorted(self._starts, starts[order], side="right")
+        self._starts = np.insert(self._starts, positions, starts[order])
+        self._ends = np.insert(self._ends, positions, ends[order])
+        self._ids = np.insert(self._ids, positions, ids[order])
+        self._build()
+        return
+
+    def remove(self, ids):
+        """ Remove the intervals with any of `ids`. """
+        keep = ~np.isin(self._ids, ids)
+        self._starts = self._starts[keep]
+        self._ends = self._ends[keep]
+        self._ids = self._ids[keep]
+        self._build()
+        return
+
+
+class DensityPyramid(object):
+
+    """ Binned summaries of intervals at power of two bin sizes.
+
+    Each level holds, for bins of `bin_size * 2 ** level` bases, the number
+    of intervals overlapping each bin, the bases covered by any interval,
+    and the numbers of intervals on the forward and reverse strands. The
+    bins of all levels start at the same origin, so the bins of a level
+    are split exactly in two by the level below.
+
+    Building the pyramid takes O(n log n) for sorting and O(n + bins) per
+    level. Querying a range reads only the bins in it.
+
+    Methods
+    -------
+    level
+        The level whose bins best match a bin size.
+    bins
+        The bins of a level overlapping a range.
+    """
+
+    # Summaries of each bin, see `bins`.
+    fields = ("count", "coverage", "plus", "minus")
+
+    def __init__(self, starts=(), ends=(), strands=None, bin_size=1024):
+        """
+        Keyword arguments:
+        starts -- sequence of N interval starts.
+        ends -- sequence of N interval ends, each at least its start.
+        strands -- None or sequence of N strands, 1, -1 or 0.
+        bin_size -- size of the bins of level 0.
+        """
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        if strands is None:
+            strands = np.zeros(len(starts), dtype=np.int8)
+        strands = np.asarray(strands)
+
+        self.bin_size = bin_size
+        self.origin = 0.
+        self.levels = list()
+        if len(starts) == 0:
+            return
+
+        self.origin = np.floor(starts.min() / bin_size) * bin_size
+        firsts = ((starts - self.origin) // bin_size).astype(np.int64)
+        lasts = ((ends - self.origin) // bin_size).astype(np.int64)
+
+        edges = self.origin + bin_size * np.arange(lasts.max() + 2)
+        covered = self._covered(starts, ends, edges)
+
+        while True:
+            nbins = len(covered)
+            self.levels.append({
+                "count": self._counts(firsts, lasts, nbins),
+                "coverage": covered,
+                "plus": self._counts(
+                    firsts[strands > 0], lasts[strands > 0], nbins),
+                "minus": self._counts(
+                    firsts[strands < 0], lasts[strands < 0], nbins),
+                })
+            if nbins == 1:
+                break
+            firsts >>= 1
+            lasts >>= 1
+            covered = np.add.reduceat(covered, np.arange(0, nbins, 2))
+        return
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __repr__(self):
+        return "DensityPyramid(bin_size={}, levels={})".format(
+            self.bin_size,
+            len(self)
+            )
+
+    @staticmethod
+    def _counts(firsts, lasts, nbins):
+        """ Number of intervals overlapping each bin, from the first and
+        last bin of each interval.
+        """
+        changes = (
+            np.bincount(firsts, minlength=nbins + 1) -
+            np.bincount(lasts + 1, minlength=nbins + 1)
+            )
+        return np.cumsum(changes[:nbins])
+
+    @staticmethod
+    def _covered(starts, ends, edges):
+        """ Bases covered by the union of the intervals between edges. """
+        order = np.argsort(starts, kind="mergesort")
+        starts = starts[order]
+        ends = ends[order]
+
+        # Merge overlapping intervals into disjoint segments.
+        reach = np.maximum.accumulate(ends)
+        first = np.concatenate([[True], starts[1:] > reach[:-1]])
+        segment_starts = starts[first]
+        segment_ends = reach[np.append(np.flatnonzero(first)[1:] - 1,
+                                       len(ends) - 1)]
+
+        # Bases covered before each edge.
+        lengths = segment_ends - segment_starts
+        before = np.concatenate([[0.], np.cumsum(lengths)])
+        segment = np.searchsorted(segment_starts, edges, side="right") - 1
+        inside = np.clip(
+            edges - segment_starts[np.maximum(segment, 0)],
+            0,
+            lengths[np.maximum(segment, 0)]
+            )
+        cumulative = np.where(segment >= 0, before[segment] + inside, 0.)
+        return np.diff(cumulative)
+
+    def level(self, bin_size):
+        """ The finest level with bins at least `bin_size` long, or the
+        coarsest level.
+        """
+        if len(self.levels) == 0:
+            return None
+        ratio = max(bin_size / self.bin_size, 1.)
+        return min(int(np.ceil(np.log2(ratio))), len(self.levels) - 1)
+
+    def bins(self, level, low=None, high=None):
+        """ The bins of a level overlapping [low, high].
+
+        Keyword arguments:
+        level -- int, see `level`.
+        low, high -- None or the range to return bins for, default all.
+
+        Returns:
+        dict -- "start" and "end" float arrays of the bins, and an array
+            for each of `fields`.
+        """
+        size = self.bin_size * 2 ** level
+        summary = self.levels[level]
+        nbins = len(summary["count"])
+
+        first = 0
+        last = nbins
+        if low is not None:
+            first = int(np.clip((low - self.origin) // size, 0, nbins))
+        if high is not None:
+            last = int(np.clip((high - self.origin) // size + 1, 0, nbins))
+
+        starts = self.origin + size * np.arange(first, max(first, last))
+        bins = {"start": starts, "end": starts + size}
+        for field in self.fields:
+            bins[field] = summary[field][first:max(first, last)]
+        return bins
+
+
+################################# Functions ##################################
+
+def pack_intervals(starts, ends, max_rows=None, gap=0.):
+    """ Assign intervals to rows, so that no two intervals in a row overlap.
+
+    Intervals are swept in order of start, each taking the lowest free row,
+    as in the expanded mode of genome browsers. A row is freed at the first
+    start after the end of its last interval, found for every interval at
+    once by binary search, so the sweep only keeps a heap of free rows and
+    takes O(n log n). Intervals that overlap no other interval are put in
+    row 0 without entering the sweep.
+
+    Keyword arguments:
+    starts -- sequence of N interval starts.
+    ends -- sequence of N interval ends, each at least its start.
+    max_rows -- None or the maximum number of rows. Intervals that would
+        need another row are given row -1.
+    gap -- minimum distance between intervals in the same row. Intervals
+        are closed, so one starting where another ends needs a new row.
+
+    Returns:
+    int array -- the row of each interval, or -1 if it did not fit.
+    """
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    rows = np.zeros(len(starts), dtype=np.int64)
+    if max_rows is not None and max_rows < 1:
+        rows[:] = -1
+        return rows
+    elif len(starts) == 0:
+        return rows
+
+    order = np.argsort(starts, kind="mergesort")
+    starts = starts[order]
+    ends = ends[order] + gap
+
+    # A cluster starts after the end of every earlier interval, when all
+    # rows are free again. Clusters of one interval always go in row 0.
+    reach = np.maximum.accumulate(ends)
+    first = np.concatenate([[True], starts[1:] > reach[:-1]])
+    alone = first & np.concatenate([first[1:], [True]])
+    sweep = np.flatnonzero(~alone)
+
+    # The step of the sweep at which each interval frees its row, in the
+    # order that they are freed.
+    steps = np.searchsorted(starts[sweep], ends[sweep], side="right")
+    released = np.argsort(steps, kind="mergesort")
+    release_steps = np.append(steps[released], len(sweep)).tolist()
+    released = released.tolist()
+
+    if max_rows is None:
+        max_rows = len(sweep)
+
+    packed = [0] * len(sweep)
+    free = list()
+    nrows = 0
+    i = 0
+    for step in range(len(sweep)):
+        while release_steps[i] <= step:
+            row = packed[released[i]]
+            if row >= 0:
+                heappush(free, row)
+            i += 1
+
+        if free:
+            packed[step] = heappop(free)
+        elif nrows < max_rows:
+            packed[step] = nrows
+            nrows += 1
+        else:
+            packed[step] = -1
+
+    sorted_rows = np.zeros(len(starts), dtype=np.int64)
+    sorted_rows[sweep] = packed
+    rows[order] = sorted_rows
+    return rows
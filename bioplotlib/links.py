@@ -8,6 +8,30 @@ import matplotlib.patches as patches
 from matplotlib.path import Path
 import numpy as np
 
+
+# Codes of the vertices of a link, see `link_paths`.
+LINK_CODES = np.array([
+    Path.MOVETO,
+    Path.CURVE4,
+    Path.CURVE4,
+    Path.CURVE4,
+    Path.LINETO,
+    Path.LINETO,
+    Path.LINETO,
+    Path.CURVE4,
+    Path.CURVE4,
+    Path.CURVE4,
+    Path.LINETO,
+    Path.LINETO,
+    Path.LINETO,
+    Path.CLOSEPOLY,
+    ], dtype=Path.code_type)
+
+# The vertices of a link placed by each axes.
+AX1_VERTICES = [0, 1, 8, 9, 10, 11, 12, 13]
+AX2_VERTICES = [2, 3, 4, 5, 6, 7]
+
+
 class CrossLink(object):
 
     """ . """
@@ -118,166 +142,254 @@ class CrossLink(object):
         return all(checks)
 
     def draw(self):
-        """ . """
-
-        x1 = np.array(self.ax1_xrange)
-        x2 = np.array(self.ax2_xrange)
-        y1 = np.array(self.ax1_yrange)
-        y2 = np.array(self.ax2_yrange)
-
-        def orient(s, e):
-            if s == e:
-                return 1
-            else:
-                return (e - s) / abs(e - s)
-
-        if (orient(y1[0], y1[1]) != orient(y2[0], y2[1])) and self.by != 'y':
-            inverted = True
-        elif (orient(x1[0], x1[1]) != orient(x2[0], x2[1])) and self.by == 'y':
-            inverted = True
-        else:
-            inverted = False
-
-        def_cp = 0 if inverted else 1  # Default for straight comparisons is 1
-        # If the control point is None we set to def_cp (straight line for inverted, curved for not inverted)
-        ax1_cp = self.ax1_cpoint if self.ax1_cpoint is not None else def_cp
-        ax2_cp = self.ax2_cpoint if self.ax2_cpoint is not None else ax1_cp
-
-        if self.by != 'y':
-            ax1_orient = orient(y1[0], y1[1])
-            ax2_orient = orient(y2[0], y2[1])
-        else:
-            ax1_orient = orient(x1[0], x1[1])
-            ax2_orient = orient(x2[0], x2[1])
-
-        if self.ax1_cpoint is None:
-            ax1_cp *= ax1_orient
-        if self.ax2_cpoint is None:
-            ax2_cp *= ax2_orient
-
+        """ The Path of the link in figure coordinates, see `link_paths`.
+        """
         if self.by == 'y':
-            s1, e1 = y1
-            s2, e2 = y2
-            iby = -1
-        else:
-            s1, e1 = x1
-            s2, e2 = x2
-            iby = 1
-
-        if self.transform_ax1 is not None:
-            transform_ax1 = self.transform_ax1
+            along = (self.ax1_yrange, self.ax2_yrange)
+            across = (self.ax1_xrange, self.ax2_xrange)
         else:
-            transform_ax1 = blended_transform_factory(
-                *[self.ax1.transData, self.ax1.transAxes][::iby]
-                )
-        if self.transform_ax2 is not None:
-            transform_ax2 = self.transform_ax2
-        else:
-            transform_ax2 = blended_transform_factory(
-                *[self.ax2.transData, self.ax2.transAxes][::iby]
-                )
-
-        loffset = 1 - self.cpoint_offset
-        uoffset = 1 + self.cpoint_offset
-
-        # Find the distance between the points in figure coords
-        if inverted:
-            cmps = [(s1, e2), (s2, e1), (s1, s2), (e1, e2)]
-            cmp_idxs = [[0, 3], [2, 1], [0, 2], [1, 3]]
+            along = (self.ax1_xrange, self.ax2_xrange)
+            across = (self.ax1_yrange, self.ax2_yrange)
+
+        vertices, codes = link_paths(
+            self.ax1,
+            self.ax2,
+            [along[0]],
+            [along[1]],
+            [across[0]],
+            [across[1]],
+            ax1_cpoint=self.ax1_cpoint,
+            ax2_cpoint=self.ax2_cpoint,
+            cpoint_offset=self.cpoint_offset,
+            by=self.by,
+            transform_ax1=self.transform_ax1,
+            transform_ax2=self.transform_ax2,
+            )
+        return Path(vertices[0], codes)
+
+
+################################# Functions ##################################
+
+def _orient(ranges):
+    """ -1 for each range running backwards, else 1. """
+    return np.where(ranges[:, 1] < ranges[:, 0], -1., 1.)
+
+
+def _cpoints(cpoint, n):
+    """ Control points as a float array, NaN where not given. """
+    if cpoint is None:
+        return np.full(n, np.nan)
+    cpoint = np.array(cpoint, dtype=float)
+    return np.broadcast_to(cpoint, (n, )).copy()
+
+
+def link_paths(
+        ax1,
+        ax2,
+        ax1_along,
+        ax2_along,
+        ax1_across=(0, 1),
+        ax2_across=None,
+        ax1_cpoint=None,
+        ax2_cpoint=None,
+        cpoint_offset=0.,
+        by=None,
+        transform_ax1=None,
+        transform_ax2=None,
+        ):
+    """ The ribbons of N links between ranges of two axes.
+
+    Each ribbon covers the linked range of each axes, and joins them with
+    two bezier curves. The distances between the ends of the ranges, the
+    control points and the vertices are computed for every link at once,
+    with one transform per axes.
+
+    Keyword arguments:
+    ax1, ax2 -- the matplotlib axes linked.
+    ax1_along, ax2_along -- float arrays (N, 2), the linked ranges in data
+        coordinates, along the x axis, or the y axis if `by` is "y".
+    ax1_across, ax2_across -- float arrays (N, 2) or (2, ), the ranges of
+        the ribbons across the axes in axes coordinates. The curves leave
+        from the second value. Default for ax2 is `ax1_across`.
+    ax1_cpoint, ax2_cpoint -- None, float or float array (N, ) of the
+        control points of the curves, as a multiple of the distance
+        between the linked ranges, NaN for the default. Default is 1 in
+        the direction of the across range, or 0, i.e. straight, for
+        inverted links. Default for ax2 is `ax1_cpoint`.
+    cpoint_offset -- float, fraction to lengthen the longest and shorten
+        the shortest control point of each link.
+    by -- "x" or "y", the axis the ranges are along.
+    transform_ax1, transform_ax2 -- None or transforms to pixels of points
+        of each axes. Default blends transData along and transAxes across.
+
+    Returns:
+    float array (N, 14, 2) -- vertices of each ribbon in figure
+        coordinates, and uint8 array (14, ) -- the codes of every ribbon.
+    """
+    along1 = np.asarray(ax1_along, dtype=float).reshape(-1, 2)
+    along2 = np.asarray(ax2_along, dtype=float).reshape(-1, 2)
+    n = len(along1)
+    across1 = np.broadcast_to(np.asarray(ax1_across, dtype=float), (n, 2))
+    if ax2_across is None:
+        across2 = across1
+    else:
+        across2 = np.broadcast_to(np.asarray(ax2_across, dtype=float), (n, 2))
+
+    if n == 0:
+        return np.zeros((0, len(LINK_CODES), 2)), LINK_CODES
+
+    iby = -1 if by == 'y' else 1
+    if transform_ax1 is None:
+        transform_ax1 = blended_transform_factory(
+            *[ax1.transData, ax1.transAxes][::iby]
+            )
+    if transform_ax2 is None:
+        transform_ax2 = blended_transform_factory(
+            *[ax2.transData, ax2.transAxes][::iby]
+            )
+    to_figure = ax1.figure.transFigure.inverted().transform
+
+    # Links between ranges of opposite directions are inverted.
+    orient1 = _orient(across1)
+    orient2 = _orient(across2)
+    inverted = orient1 != orient2
+
+    cpoint1 = _cpoints(ax1_cpoint, n)
+    cpoint2 = _cpoints(ax2_cpoint, n)
+    cp1 = np.where(np.isnan(cpoint1), np.where(inverted, 0., 1.), cpoint1)
+    cp2 = np.where(np.isnan(cpoint2), cp1, cpoint2)
+    cp1 = np.where(np.isnan(cpoint1), cp1 * orient1, cp1)
+    cp2 = np.where(np.isnan(cpoint2), cp2 * orient2, cp2)
+
+    # Pixel positions of the starts and ends, as (s1, e1) and (s2, e2).
+    zeros = np.zeros(2 * n)
+    pixels1 = transform_ax1.transform(
+        np.stack([along1.ravel(), zeros], axis=1)[:, ::iby]
+        ).reshape(n, 2, 2)
+    pixels2 = transform_ax2.transform(
+        np.stack([along2.ravel(), zeros], axis=1)[:, ::iby]
+        ).reshape(n, 2, 2)
+
+    # Distances of (s1, e2), (e1, s2), (s1, s2) and (e1, e2). The last two
+    # only join inverted links.
+    vectors = np.abs(np.stack([
+        pixels1[:, 0] - pixels2[:, 1],
+        pixels1[:, 1] - pixels2[:, 0],
+        pixels1[:, 0] - pixels2[:, 0],
+        pixels1[:, 1] - pixels2[:, 1],
+        ], axis=1))
+    axis = 0 if iby == 1 else 1
+    pixels = vectors[:, :, axis]
+    distances = to_figure(vectors.reshape(-1, 2))[:, axis].reshape(n, 4)
+
+    used = np.ones((n, 4), dtype=bool)
+    used[~inverted, 2:] = False
+    longest = np.where(used, pixels, -np.inf).max(axis=1)[:, None]
+    shortest = np.where(used, pixels, np.inf).min(axis=1)[:, None]
+    distances *= np.where(
+        pixels == longest,
+        1 + cpoint_offset,
+        np.where(pixels == shortest, 1 - cpoint_offset, 1.)
+        )
+
+    flip = inverted[:, None]
+    d1 = np.where(flip, distances[:, [2, 3]], distances[:, [0, 1]])
+    d2 = np.where(flip, distances[:, [2, 3]], distances[:, [1, 0]])
+
+    # The ribbon in (along, across) coordinates.
+    s1, e1 = along1.T
+    s2, e2 = along2.T
+    low1, high1 = across1.T
+    low2, high2 = across2.T
+    vertices = np.empty((n, len(LINK_CODES), 2))
+    vertices[:, :, 0] = np.stack(
+        [s1, s1, e2, e2, e2, s2, s2, s2, e1, e1, e1, s1, s1, s1],
+        axis=1
+        )
+    vertices[:, :, 1] = np.stack([
+        high1,
+        high1 + cp1 * d1[:, 0],
+        high2 + cp2 * d2[:, 1],
+        high2,
+        low2,
+        low2,
+        high2,
+        high2 + cp2 * d2[:, 0],
+        high1 + cp1 * d1[:, 1],
+        high1,
+        low1,
+        low1,
+        high1,
+        low1,
+        ], axis=1)
+    vertices[inverted, 2:8] = vertices[inverted, 7:1:-1]
+    vertices = vertices[:, :, ::iby]
+
+    vertices[:, AX1_VERTICES] = transform_ax1.transform(
+        vertices[:, AX1_VERTICES].reshape(-1, 2)
+        ).reshape(n, -1, 2)
+    vertices[:, AX2_VERTICES] = transform_ax2.transform(
+        vertices[:, AX2_VERTICES].reshape(-1, 2)
+        ).reshape(n, -1, 2)
+    vertices = to_figure(vertices.reshape(-1, 2)).reshape(n, -1, 2)
+    return vertices, LINK_CODES
+
+
+def crosslink_paths(links):
+    """ The Paths of CrossLinks, see `CrossLink.draw`.
+
+    Links are grouped by their axes and settings, and the paths of each
+    group computed at once by `link_paths`.
+
+    Returns:
+    list -- a Path for each link.
+    """
+    groups = dict()
+    for i, link in enumerate(links):
+        key = (
+            id(link.ax1),
+            id(link.ax2),
+            link.by,
+            link.cpoint_offset,
+            id(link.transform_ax1),
+            id(link.transform_ax2),
+            )
+        groups.setdefault(key, list()).append(i)
+
+    paths = [None] * len(links)
+    for indices in groups.values():
+        group = [links[i] for i in indices]
+        first = group[0]
+        if first.by == 'y':
+            along = ("ax1_yrange", "ax2_yrange")
+            across = ("ax1_xrange", "ax2_xrange")
         else:
-            cmps = [(s1, e2), (e1, s2)] * 2
-            cmp_idxs = [[0, 3], [1, 2]] * 2
-
-
-        distances = np.array([
-            np.absolute(transform_ax1.transform([s, 0][::iby]) -
-                transform_ax2.transform([e, 0][::iby]))
-            for s, e in cmps
-            ])
-        dist_max = max(distances, key=lambda t: t[0])
-        dist_min = min(distances, key=lambda t: t[0])
-        max_idxs = (distances[:,0] == dist_max[0]).nonzero()[0]
-        min_idxs = (distances[:,0] == dist_min[0]).nonzero()[0]
-
-        trans = self.figure.transFigure.inverted().transform
-        distances = np.apply_along_axis(trans, 1, distances)[:,0]
-
-        dists = np.array([None] * 4)
-        for i, idxs in zip(range(4), cmp_idxs):
-            if i in max_idxs:
-                dists[idxs] = uoffset * distances[i]
-            elif i in min_idxs:
-                dists[idxs] = loffset * distances[i]
-            else:
-                dists[idxs] = distances[i]
-
-        d1 = dists[0:2] #[::iby]
-        d2 = dists[2:4] #[::iby]
-
-        path = np.array([
-            [x1[0], y1[1]],  # 0
-            [x1[0], y1[1] + ax1_cp * d1[0]],  # 1
-            [x2[1], y2[1] + ax2_cp * d2[1]],  # 2
-            [x2[1], y2[1]],  # 3
-            [x2[1], y2[0]],  # 4
-            [x2[0], y2[0]],  # 5
-            [x2[0], y2[1]],  # 6
-            [x2[0], y2[1] + ax2_cp * d2[0]],  # 7
-            [x1[1], y1[1] + ax1_cp * d1[1]],  # 8
-            [x1[1], y1[1]],  # 9
-            [x1[1], y1[0]],  # 10
-            [x1[0], y1[0]],  # 11
-            [x1[0], y1[1]],  # 12
-            [x1[0], y1[0]],  # 13
-            ])
-
-        codes = np.array([
-            Path.MOVETO,  # 0
-            Path.CURVE4,  # 1
-            Path.CURVE4,  # 2
-            Path.CURVE4,  # 3
-            Path.LINETO,  # 4
-            Path.LINETO,  # 5
-            Path.LINETO,  # 6
-            Path.CURVE4,  # 7
-            Path.CURVE4,  # 8
-            Path.CURVE4,  # 9
-            Path.LINETO,  # 10
-            Path.LINETO,  # 11
-            Path.LINETO,  # 12
-            Path.CLOSEPOLY,  # 13
-            ])
-
-        if self.by == 'y':
-            path[1] = [x1[0] + ax1_cp * dist_a, y1[1]]
-            path[2] = [x2[1] + ax2_cp * dist_a, y2[1]]
-            path[7] = [x2[0] + ax2_cp * dist_b, y2[1]]
-            path[8] = [x1[1] + ax1_cp * dist_b, y1[1]]
-
-        if inverted:
-            path[2:8] = path[2:8][::-1]
-
-        transforms = [
-            transform_ax1.transform,
-            transform_ax1.transform,
-            transform_ax2.transform,
-            transform_ax2.transform,
-            transform_ax2.transform,
-            transform_ax2.transform,
-            transform_ax2.transform,
-            transform_ax2.transform,
-            transform_ax1.transform,
-            transform_ax1.transform,
-            transform_ax1.transform,
-            transform_ax1.transform,
-            transform_ax1.transform,
-            transform_ax1.transform,
-            ]
-
-        path = np.array([t(xy) for t, xy in zip(transforms, path)])
-        path = np.apply_along_axis(
-            self.figure.transFigure.inverted().transform,
-            1,
-            path
+            along = ("ax1_xrange", "ax2_xrange")
+            across = ("ax1_yrange", "ax2_yrange")
+
+        def column(name):
+            return [getattr(link, name) for link in group]
+
+        def cpoints(name):
+            return [
+                np.nan if getattr(link, name) is None else getattr(link, name)
+                for link in group
+                ]
+
+        vertices, codes = link_paths(
+            first.ax1,
+            first.ax2,
+            column(along[0]),
+            column(along[1]),
+            column(across[0]),
+            column(across[1]),
+            ax1_cpoint=cpoints("ax1_cpoint"),
+            ax2_cpoint=cpoints("ax2_cpoint"),
+            cpoint_offset=first.cpoint_offset,
+            by=first.by,
+            transform_ax1=first.transform_ax1,
+            transform_ax2=first.transform_ax2,
             )
-        return Path(path, codes)
+        for i, path in zip(indices, vertices):
+            paths[i] = Path(path, codes)
+    return paths
@@ -25,7 +25,7 @@ config = {
     'author_email': 'darcy.ab.jones@gmail.com',
     'url': 'https://github.com/darcyabjones/bioplotlib',
     'download_url': 'https://github.com/darcyabjones/bioplotlib',
-    'packages': find_packages(),
+    'packages': find_packages(exclude=['benchmarks', 'benchmarks.*']),
     'install_requires': ['numpy', 'matplotlib'],
     'scripts': [],
     'extras_require': {
@@ -3,11 +3,1154 @@ Unit tests for feature_shapes.py.
 
 """
 
+from functools import partial
+from io import BytesIO
+import pickle
 import unittest
+
+# Import the axes before bioplotlib, whose Rectangle shares a name with
+# matplotlib's and confuses its docstring interpolation.
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backend_bases import MouseEvent
+
 from bioplotlib.feature_shapes import *
+from bioplotlib.collections import *
+from bioplotlib.links import CrossLink
 import numpy as np
 
+from matplotlib.artist import setp
+from matplotlib.collections import PathCollection
 from matplotlib.path import Path
 from matplotlib.patches import PathPatch
 
-#class TestFeature(unittest.TestCase):
+class TestFeature(unittest.TestCase):
+
+    def setUp(self):
+        self.blocks = [(0, 10, 1), (20, 30, 1), (40, 50, 1)]
+
+    def test_paths(self):
+        obj = Feature(
+            self.blocks,
+            shape=new_shape(Rectangle),
+            between_shape=new_shape(OpenTriangle, width=0.5)
+            )
+
+        self.assertEqual(len(obj.get_paths()), 5)
+        # Styles shared by every path are set once and broadcast.
+        self.assertEqual(len(obj.get_facecolor()), 1)
+
+    def test_offset(self):
+        obj = Feature(self.blocks, shape=new_shape(Rectangle))
+
+        path = obj.get_paths()[0]
+
+        obj.offset = 2
+        obj.offset = 2
+        self.assertIs(obj.get_paths()[0], path)
+
+        vertices = obj.get_layout_transform().transform(path.vertices)
+        self.assertEqual(vertices[:, 1].tolist(), [2., 3., 3., 2., 2.])
+        self.assertEqual(
+            obj.patches[0].vertices.tolist(),
+            vertices.tolist()
+            )
+
+    def test_by_axis(self):
+        obj = Feature(self.blocks, shape=new_shape(Rectangle), offset=1)
+        obj.by_axis = "y"
+
+        vertices = obj.get_layout_transform().transform(
+            obj.get_paths()[0].vertices
+            )
+        self.assertEqual(vertices.tolist(), [
+            [1., 0.],
+            [2., 0.],
+            [2., 10.],
+            [1., 10.],
+            [1., 0.]
+            ])
+        self.assertEqual(
+            obj.patches[0].vertices.tolist(),
+            vertices.tolist()
+            )
+
+    def test_patches(self):
+        obj = Feature(self.blocks, shape=new_shape(Arrow, head_length=2))
+        patches = obj.patches
+
+        self.assertEqual(len(patches), 3)
+        self.assertIsInstance(patches[0], Arrow)
+        self.assertEqual(patches[0].head_length, 2)
+
+    def test_array_blocks(self):
+        blocks = np.array(self.blocks)
+        obj = Feature(
+            blocks,
+            shape=[new_shape(Rectangle), new_shape(Arrow)],
+            between_shape=new_shape(OpenTriangle, width=0.5)
+            )
+        data = obj.shape_array.data
+        kinds = [obj.shape_array.kinds[k][0] for k in data["kind"]]
+
+        self.assertEqual(
+            kinds,
+            [OpenTriangle, OpenTriangle, Rectangle, Rectangle, Arrow]
+            )
+        self.assertEqual(data["start"].tolist(), [10, 30, 0, 20, 40])
+        self.assertEqual(data["end"].tolist(), [20, 40, 10, 30, 50])
+        self.assertEqual(data["width"].tolist(), [0.5, 0.5, 1, 1, 1])
+        self.assertEqual(data["strand"].tolist(), [1] * 5)
+
+    def test_mixed_blocks(self):
+        obj = Feature([(0, 10), (30, 20, -1), (40, 50, None)],
+                      between_shape=new_shape(OpenTriangle))
+        data = obj.shape_array.data
+
+        # Between shapes join the nearest ends, and keep agreeing strands.
+        self.assertEqual(data["start"].tolist(), [10, 30, 0, 30, 40])
+        self.assertEqual(data["end"].tolist(), [20, 40, 10, 20, 50])
+        self.assertEqual(data["strand"].tolist(), [0, 0, 0, -1, 0])
+
+    def test_layout_blocks(self):
+        blocks = [(0, 10), (20, 30), (40, 50), (100, 110), (200, 210)]
+        shapes = layout_blocks(
+            blocks,
+            [Rectangle, Triangle, Arrow],
+            between_shape=OpenTriangle,
+            groups=[0, 0, 0, 1, 2]
+            )
+        kinds = [shapes.kinds[k][0] for k in shapes.data["kind"]]
+
+        self.assertEqual(kinds, [
+            OpenTriangle, OpenTriangle,
+            Rectangle, Triangle, Arrow,
+            Arrow,
+            Arrow
+            ])
+        self.assertEqual(shapes.data["start"][:2].tolist(), [10, 30])
+
+    def test_plain_callable(self):
+        obj = Feature(self.blocks, shape=lambda **k: Rectangle(width=2, **k))
+
+        self.assertEqual(obj.shape_array.data["width"].tolist(), [2., 2., 2.])
+
+    def test_bytes(self):
+        obj = Feature(
+            self.blocks,
+            shape=new_shape(Arrow, head_length=2, facecolor="red"),
+            offset=2,
+            by_axis="y",
+            name="gene"
+            )
+        new = Feature.frombytes(obj.tobytes())
+
+        self.assertEqual(new.blocks, self.blocks)
+        self.assertEqual((new.offset, new.by_axis), (2, "y"))
+        self.assertEqual(new.strand, None)
+        self.assertEqual(
+            [p.vertices.tolist() for p in new.get_paths()],
+            [p.vertices.tolist() for p in obj.get_paths()]
+            )
+        self.assertEqual(new.get_facecolor().tolist(),
+                         obj.get_facecolor().tolist())
+
+        # The loaded rows are read only until they are modified.
+        self.assertFalse(new.shape_array.data.flags.writeable)
+        new.strand = -1
+        self.assertEqual(new.shape_array.data["strand"].tolist(), [-1] * 3)
+
+
+class TestFeatureGroup(unittest.TestCase):
+
+    def test_paths(self):
+        features = [
+            Feature([(0, 10, 1), (20, 30, 1)], shape=new_shape(Rectangle)),
+            Feature([(5, 15, -1)], shape=new_shape(Triangle), offset=1),
+            ]
+        obj = FeatureGroup(features, offset=2)
+
+        self.assertEqual(len(obj.get_paths()), 3)
+        self.assertEqual(len(obj.get_facecolor()), 1)
+        self.assertEqual(
+            obj.shape_array.data["offset"].tolist(),
+            [0., 0., 1.]
+            )
+        self.assertEqual(obj.patches[2].offset, 3.)
+
+    def test_bytes(self):
+        child = FeatureGroup([Arrow(0, 4, name="arrow")], offset=3)
+        features = [
+            Feature([(0, 10, 1), (20, 30, 1)], shape=new_shape(Rectangle)),
+            Feature([(5, 15, -1)], shape=new_shape(Triangle), offset=1,
+                    name="triangle"),
+            child,
+            ]
+        obj = FeatureGroup(features, offset=2, name="group")
+        new = FeatureGroup.frombytes(obj.tobytes())
+
+        self.assertEqual(new.name, "group")
+        self.assertEqual(new.offset, 2)
+        self.assertEqual(
+            new.shape_array.data.tolist(),
+            obj.shape_array.data.tolist()
+            )
+        self.assertEqual(len(new.features), 3)
+        self.assertEqual(new.features[1].blocks, [(5, 15, -1)])
+        self.assertEqual(
+            new.features[1].get_paths()[0].vertices.tolist(),
+            features[1].get_paths()[0].vertices.tolist()
+            )
+        self.assertEqual(new.features[2].offset, 3)
+        self.assertEqual(new.features[2].features[0].name, "arrow")
+
+
+class TestStacking(unittest.TestCase):
+
+    def setUp(self):
+        self.features = [
+            Feature([(0, 100, 1)], shape=new_shape(Rectangle)),
+            Feature([(50, 150, 1)], shape=new_shape(Rectangle)),
+            Feature(
+                [(120, 200, 1), (210, 250, 1)],
+                shape=new_shape(Rectangle)
+                ),
+            Feature([(60, 80, -1)], shape=new_shape(Rectangle)),
+            ]
+
+    def offsets(self, obj):
+        return obj.shape_array.data["offset"].tolist()
+
+    def test_expanded(self):
+        obj = FeatureGroup(self.features, width=2, stack="expanded")
+
+        self.assertEqual(obj.rows.tolist(), [0, 1, 0, 2])
+        self.assertEqual(obj.nrows, 3)
+        self.assertEqual(self.offsets(obj), [0., 2., 0., 0., 4.])
+
+    def test_modes(self):
+        obj = FeatureGroup(self.features, width=2, stack="squished")
+        self.assertEqual(self.offsets(obj), [0., 0.5, 0., 0., 1.])
+        self.assertEqual(
+            obj.shape_array.data["width"].tolist(),
+            [0.25] * 5
+            )
+
+        obj.stack = "collapsed"
+        self.assertEqual(obj.rows.tolist(), [0, 0, 0, 0])
+        self.assertEqual(self.offsets(obj), [0.] * 5)
+
+        obj.stack = None
+        self.assertIsNone(obj.rows)
+        self.assertEqual(len(obj.get_paths()), 5)
+
+        with self.assertRaises(ValueError):
+            obj.stack = "stacked"
+
+    def test_overflow(self):
+        obj = FeatureGroup(self.features, stack="expanded", max_rows=2)
+
+        self.assertEqual(obj.rows.tolist(), [0, 1, 0, -1])
+        self.assertEqual(obj.overflow, [self.features[3]])
+        self.assertEqual(len(obj.get_paths()), 4)
+        self.assertEqual(obj.features_at(70, 1.5), [(self.features[1],
+                                                     (50, 150, 1))])
+
+    def test_stack_range(self):
+        obj = FeatureGroup(self.features, stack="expanded")
+        obj.stack_range = (160, 300)
+
+        self.assertEqual(obj.rows.tolist(), [-1, -1, 0, -1])
+        self.assertEqual(obj.overflow, [])
+        self.assertEqual(self.offsets(obj), [0., 0.])
+
+        obj.stack_range = (0, 55)
+        self.assertEqual(obj.rows.tolist(), [0, 1, -1, -1])
+
+    def test_stack_view(self):
+        obj = FeatureGroup(self.features, stack="expanded",
+                           stack_range="view")
+        # Every feature is stacked until the group is shown.
+        self.assertEqual(obj.rows.tolist(), [0, 1, 0, 2])
+
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        ax.add_collection(obj)
+        ax.set_xlim(160, 300)
+        fig.canvas.draw()
+        self.assertEqual(obj.rows.tolist(), [-1, -1, 0, -1])
+
+        # The features in view are packed again when the view changes.
+        ax.set_xlim(0, 55)
+        self.assertEqual(obj.rows.tolist(), [0, 1, -1, -1])
+        fig.canvas.draw()
+        self.assertEqual(len(obj.get_paths()), 2)
+
+    def test_bytes(self):
+        obj = FeatureGroup(self.features, width=2, stack="squished",
+                           max_rows=2)
+        new = FeatureGroup.frombytes(obj.tobytes())
+
+        self.assertEqual(new.stack, "squished")
+        self.assertEqual(new.rows.tolist(), [0, 1, 0, -1])
+        self.assertEqual(new.overflow, [new.features[3]])
+        self.assertEqual(self.offsets(new), self.offsets(obj))
+        self.assertEqual(
+            [f.shape_array.data["width"].tolist() for f in new.features],
+            [[1.], [1.], [1., 1.], [1.]]
+            )
+
+        new.stack = "expanded"
+        self.assertEqual(self.offsets(new), [0., 2., 0., 0.])
+        new.max_rows = None
+        self.assertEqual(self.offsets(new), [0., 2., 0., 0., 4.])
+
+    def test_bytes_stack_range(self):
+        obj = FeatureGroup(self.features, stack="expanded",
+                           stack_range=(160, 300))
+        new = FeatureGroup.frombytes(obj.tobytes())
+
+        self.assertEqual(len(new.features), 4)
+        self.assertEqual(new.rows.tolist(), [-1, -1, 0, -1])
+        self.assertEqual(self.offsets(new), [0., 0.])
+
+        new.stack_range = None
+        self.assertEqual(new.rows.tolist(), [0, 1, 0, 2])
+
+        # Nested stacked groups keep their features too.
+        parent = FeatureGroup([obj], offset=1)
+        new = FeatureGroup.frombytes(parent.tobytes())
+        self.assertEqual(len(new.features[0].features), 4)
+        self.assertEqual(
+            new.shape_array.data.tolist(),
+            parent.shape_array.data.tolist()
+            )
+
+
+class TestEditing(unittest.TestCase):
+
+    def setUp(self):
+        self.features = [
+            Feature([(0, 100, 1)], shape=new_shape(Rectangle), offset=1),
+            Feature([(50, 150, 1)], shape=new_shape(Rectangle)),
+            Feature([(120, 200, 1), (210, 250, 1)],
+                    shape=new_shape(Rectangle), offset=2),
+            ]
+        self.new = [
+            Feature([(60, 80, -1)], shape=new_shape(Rectangle)),
+            Feature([(300, 320, 1), (330, 400, 1)],
+                    shape=new_shape(Rectangle), offset=3),
+            ]
+
+    def assertRebuilt(self, obj, features):
+        rebuilt = FeatureGroup(features, stack=obj.stack)
+        self.assertEqual(
+            obj.shape_array.data.tolist(),
+            rebuilt.shape_array.data.tolist()
+            )
+        self.assertEqual(obj.features, features)
+        if obj.stack is not None:
+            self.assertEqual(obj.rows.tolist(), rebuilt.rows.tolist())
+
+    def test_add(self):
+        for stack in (None, "expanded"):
+            obj = FeatureGroup(self.features[:1], stack=stack)
+            obj.rows_at(50)
+            self.assertEqual(obj.add(self.features[1:]), [1, 2])
+            self.assertEqual(obj.add(self.new), [3, 4])
+            self.assertRebuilt(obj, self.features + self.new)
+            self.assertEqual(obj.ids, [0, 1, 2, 3, 4])
+            self.assertEqual(obj.rows_at(70).tolist(), [0, 1, 4])
+            self.assertEqual(obj.rows_at(310).tolist(), [5])
+
+    def test_remove(self):
+        features = self.features + self.new
+        for stack in (None, "expanded"):
+            obj = FeatureGroup(features, stack=stack)
+            obj.remove([0, 3])
+            self.assertRebuilt(obj, [features[i] for i in (1, 2, 4)])
+            self.assertEqual(obj.ids, [1, 2, 4])
+
+            # Ids are kept, not positions.
+            obj.remove(4)
+            self.assertRebuilt(obj, [features[i] for i in (1, 2)])
+            self.assertEqual(obj.rows_at(310).tolist(), [])
+            self.assertEqual(obj.add(self.new[:1]), [5])
+            with self.assertRaises(KeyError):
+                obj.remove(0)
+
+    def test_update(self):
+        for stack in (None, "expanded"):
+            obj = FeatureGroup(self.features, stack=stack)
+            obj.update_feature(1, blocks=[(5, 10, 1), (20, 40, -1)])
+            self.assertRebuilt(obj, self.features)
+            self.assertEqual(len(obj.get_paths()), 5)
+
+            obj.update_feature(2, offset=5)
+            self.assertRebuilt(obj, self.features)
+
+    def test_update_in_place(self):
+        obj = FeatureGroup(self.features + self.new)
+        paths = obj.get_paths()
+        vertices = [path.vertices.copy() for path in paths]
+        obj.rows_at(50)
+
+        # Rows keeping their number of vertices are written in place.
+        obj.update_feature(1, blocks=[(70, 170, 1)])
+        self.assertRebuilt(obj, self.features + self.new)
+        self.assertIs(obj.get_paths(), paths)
+        self.assertEqual(paths[1].vertices[:, 0].min(), 70.)
+        for i in (0, 2, 3, 4, 5):
+            self.assertTrue((paths[i].vertices == vertices[i]).all())
+        self.assertEqual(obj.rows_at(60).tolist(), [0, 4])
+
+        obj.update_feature(3, shape=new_shape(Arrow))
+        self.assertRebuilt(obj, self.features + self.new)
+        rebuilt = FeatureGroup(self.features + self.new)
+        self.assertTrue(np.allclose(obj.get_paths()[3].vertices,
+                                    rebuilt.get_paths()[3].vertices))
+
+    def test_artist_update(self):
+        obj = FeatureGroup(self.features)
+        obj.update({"alpha": 0.5})
+        setp(obj, alpha=0.3)
+        self.assertEqual(obj.get_alpha(), 0.3)
+
+
+class TestSceneGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.genes = [
+            [Feature([(10 * i, 10 * i + 5, 1)], shape=new_shape(Rectangle))
+             for i in range(j, j + 3)]
+            for j in range(0, 12, 3)
+            ]
+        self.loci = [FeatureGroup(genes, offset=1) for genes in self.genes]
+        self.chromosomes = [
+            FeatureGroup(self.loci[:2]),
+            FeatureGroup(self.loci[2:], offset=2)
+            ]
+        self.genome = FeatureGroup(self.chromosomes)
+
+    def rebuilt(self):
+        loci = [
+            FeatureGroup(locus.features, offset=locus.offset)
+            for locus in self.loci
+            ]
+        return FeatureGroup([
+            FeatureGroup(loci[:2]),
+            FeatureGroup(loci[2:], offset=2)
+            ]).shape_array.data.tolist()
+
+    def test_dirty(self):
+        gene = self.genes[2][1]
+        gene.blocks = [(70, 72, -1), (74, 78, -1)]
+
+        self.assertEqual(list(self.genome._dirty.values()),
+                         [self.chromosomes[1]])
+        self.assertEqual(list(self.chromosomes[1]._dirty.values()),
+                         [self.loci[2]])
+        self.assertEqual(self.chromosomes[0]._dirty, {})
+        self.assertEqual(self.loci[3]._dirty, {})
+        self.assertTrue(self.genome.stale)
+
+        self.assertEqual(self.genome.shape_array.data.tolist(),
+                         self.rebuilt())
+        self.assertEqual(self.genome._dirty, {})
+        self.assertEqual(self.loci[2]._dirty, {})
+
+    def test_offsets(self):
+        self.genes[0][0].offset = 3
+        self.loci[3].offset = 4
+        self.assertEqual(self.genome.shape_array.data.tolist(),
+                         self.rebuilt())
+        self.assertEqual(
+            self.genome.shape_array.data["offset"].tolist(),
+            [4., 1., 1., 1., 1., 1., 3., 3., 3., 6., 6., 6.]
+            )
+
+    def test_removed(self):
+        locus = self.loci[0]
+        self.chromosomes[0].remove(0)
+        locus.features[0].blocks = [(500, 510, 1)]
+
+        self.assertEqual(self.chromosomes[0]._dirty, {})
+        self.assertEqual(len(self.genome.shape_array), 9)
+
+
+class TestDensity(unittest.TestCase):
+
+    def setUp(self):
+        self.features = [
+            Feature([(s, s + 50, 1)], shape=new_shape(Rectangle))
+            for s in range(0, 100000, 100)
+            ]
+        self.fig = Figure(figsize=(4, 2), dpi=50)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_ylim(-1, 2)
+
+    def render(self):
+        self.fig.canvas.draw()
+        return np.asarray(self.fig.canvas.buffer_rgba()).copy()
+
+    def test_switch(self):
+        obj = FeatureGroup(self.features, density=10000)
+        self.ax.add_collection(obj)
+
+        self.ax.set_xlim(0, 1000)
+        self.render()
+        self.assertEqual(len(obj._cull_rows), 21)
+
+        self.ax.set_xlim(0, 100000)
+        image = self.render()
+        pyramid = obj.density_pyramid()
+        self.assertEqual(pyramid.bin_size, 2)
+        self.assertEqual(pyramid.bins(0)["coverage"].sum(), 50000)
+
+        # Bars in the colour of the features.
+        blue = image[:, :, 2].astype(int) - image[:, :, 0] > 100
+        self.assertGreater(blue.sum(), 1000)
+        obj.density_style = "heat"
+        self.assertFalse((self.render() == image).all())
+
+        with self.assertRaises(ValueError):
+            obj.density_style = "lines"
+
+    def test_changes(self):
+        obj = FeatureGroup(self.features[:10], density=500)
+        self.assertEqual(obj.density_pyramid().bins(0)["coverage"].sum(), 500)
+        obj.add(self.features[10:20])
+        self.assertEqual(obj.density_pyramid().bins(0)["coverage"].sum(),
+                         1000)
+
+        new = FeatureGroup.frombytes(obj.tobytes())
+        self.assertEqual(new.density, 500)
+        self.assertEqual(new.density_pyramid().bins(0)["count"].tolist(),
+                         obj.density_pyramid().bins(0)["count"].tolist())
+
+
+class TestBuildTracks(unittest.TestCase):
+
+    def setUp(self):
+        self.shape = [new_shape(Rectangle), new_shape(Arrow, head_length=2)]
+        self.between = new_shape(OpenTriangle, width=0.5)
+        self.tracks = {
+            "chr1": [[(0, 10, 1), (20, 30, 1)], [(40, 50, -1)], []],
+            "chr2": [[(5, 8, -1), (9, 12, -1), (15, 30, -1)]],
+            }
+
+    def test_build(self):
+        for processes in (0, 2):
+            groups = build_tracks(self.tracks, self.shape, self.between,
+                                  processes=processes, stack="expanded")
+            self.assertEqual(list(groups), ["chr1", "chr2"])
+
+            for name, features in self.tracks.items():
+                expected = FeatureGroup(
+                    [Feature(blocks, shape=self.shape,
+                             between_shape=self.between)
+                     for blocks in features],
+                    stack="expanded"
+                    )
+                group = groups[name]
+                self.assertEqual(group.name, name)
+                self.assertEqual(group.rows.tolist(), expected.rows.tolist())
+                self.assertEqual(
+                    group.shape_array.data.tolist(),
+                    expected.shape_array.data.tolist()
+                    )
+                self.assertEqual(
+                    [f.blocks for f in group.features],
+                    features
+                    )
+
+        # The features can still be redrawn from their blocks.
+        feature = groups["chr2"].features[0]
+        feature.blocks = [(0, 5, 1)]
+        self.assertEqual(len(groups["chr2"].shape_array), 1)
+
+    def test_lazy(self):
+        group = build_tracks(self.tracks, self.shape, self.between,
+                             processes=0)["chr1"]
+
+        # Features are made from their rows when needed, e.g. picking.
+        self.assertFalse(any(isinstance(f, Feature) for f in group._features))
+        (feature, block), = group.features_at(45, 0.5)
+        self.assertEqual(feature.blocks, [(40, 50, -1)])
+        self.assertEqual(block, (40, 50, -1))
+
+        feature.blocks = [(40, 60, -1)]
+        group.update_feature(0, blocks=[(0, 10, 1)])
+        group.remove(2)
+        expected = FeatureGroup([
+            Feature(blocks, shape=self.shape, between_shape=self.between)
+            for blocks in [[(0, 10, 1)], [(40, 60, -1)]]
+            ])
+        self.assertEqual(
+            [p.vertices.tolist() for p in group.get_paths()],
+            [p.vertices.tolist() for p in expected.get_paths()]
+            )
+        self.assertEqual(group.features[1], feature)
+
+    def test_pickle(self):
+        group = build_tracks(self.tracks, self.shape, processes=0)["chr1"]
+        new = pickle.loads(pickle.dumps(group))
+
+        self.assertEqual(new.shape_array.data.tolist(),
+                         group.shape_array.data.tolist())
+        new.features[0].offset = 2
+        self.assertEqual(new.shape_array.data["offset"].tolist(),
+                         [2., 2., 0.])
+
+
+class TestPicking(unittest.TestCase):
+
+    def setUp(self):
+        self.genes = [
+            Feature([(0, 10, 1), (20, 30, 1)], shape=new_shape(Rectangle),
+                    between_shape=new_shape(OpenTriangle)),
+            Feature([(5, 15, -1)], shape=new_shape(Triangle), offset=1),
+            ]
+        self.shape = Arrow(40, 50, offset=2)
+        self.nested = FeatureGroup([Feature([(60, 70)])], offset=3)
+        self.obj = FeatureGroup(
+            self.genes + [self.shape, self.nested],
+            offset=1
+            )
+
+    def test_features_at(self):
+        obj = self.obj
+        self.assertEqual(
+            obj.features_at(25, 1.5),
+            [(self.genes[0], (20, 30, 1))]
+            )
+        self.assertEqual(obj.features_at(15, 1.5), [(self.genes[0], None)])
+        self.assertEqual(
+            obj.features_at(7, 2.5),
+            [(self.genes[1], (5, 15, -1))]
+            )
+        self.assertEqual(obj.features_at(45, 3.5), [(self.shape, None)])
+        self.assertEqual(
+            obj.features_at(65, 4.5),
+            [(self.nested.features[0], (60, 70))]
+            )
+        self.assertEqual(obj.features_at(35, 1.5), [])
+
+        obj.by_axis = "y"
+        self.assertEqual(
+            obj.features_at(1.5, 25),
+            [(self.genes[0], (20, 30, 1))]
+            )
+
+    def test_contains(self):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        ax.add_collection(self.obj)
+        ax.set_xlim(0, 100)
+        ax.set_ylim(0, 5)
+
+        x, y = ax.transData.transform([25, 1.5])
+        event = MouseEvent("button_press_event", fig.canvas, x, y)
+        inside, info = self.obj.contains(event)
+        self.assertTrue(inside)
+        self.assertEqual(info["features"], [self.genes[0]])
+        self.assertEqual(info["blocks"], [(20, 30, 1)])
+
+        x, y = ax.transData.transform([35, 1.5])
+        event = MouseEvent("button_press_event", fig.canvas, x, y)
+        self.assertFalse(self.obj.contains(event)[0])
+
+    def test_rebuilt(self):
+        self.assertEqual(len(self.obj.features_at(25, 1.5)), 1)
+        self.obj.features = self.genes[1:]
+        self.assertEqual(self.obj.features_at(25, 1.5), [])
+        self.assertEqual(len(self.obj.features_at(7, 2.5)), 1)
+
+
+class TestShapeCollection(unittest.TestCase):
+
+    def test_paths(self):
+        shapes = ShapeArray()
+        shapes.extend([0, 10, 20], [5, 15, 25], shape=Triangle)
+        shapes.append(30, 40, shape=Rectangle, facecolor="red")
+        obj = ShapeCollection(shapes)
+
+        self.assertEqual(len(obj.get_paths()), 4)
+        self.assertEqual(obj.get_facecolor()[3].tolist(), [1., 0., 0., 1.])
+        self.assertEqual(len(obj.get_linewidth()), 1)
+
+    def test_styles(self):
+        shapes = ShapeArray()
+        for start, colour in zip([0, 10, 20, 30], ["red", "blue"] * 2):
+            shapes.append(start, start + 5, shape=Rectangle, facecolor=colour)
+        obj = ShapeCollection(shapes)
+
+        self.assertEqual(len(shapes.styles), 2)
+        self.assertEqual(
+            obj.get_facecolor()[:, 0].tolist(),
+            [1., 0., 1., 0.]
+            )
+        self.assertIs(shapes.palette(), shapes.palette())
+
+    def render(self, add):
+        fig = Figure(figsize=(4, 2), dpi=50)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        add(ax)
+        ax.set_xlim(0, 500)
+        ax.set_ylim(-1, 3)
+        fig.canvas.draw()
+        return np.asarray(fig.canvas.buffer_rgba()).copy()
+
+    def test_flat_draw(self):
+        shapes = ShapeArray()
+        shapes.extend(np.arange(0, 400, 25), np.arange(20, 420, 25),
+                      shape=Rectangle)
+        shapes.append(100, 200, offset=1.5, shape=Rectangle, facecolor="red")
+        obj = ShapeCollection(shapes)
+
+        def add_collection(ax):
+            ax.add_collection(obj)
+
+        def add_paths(ax):
+            ax.add_collection(PathCollection(
+                shapes.get_paths(),
+                facecolors=obj.get_facecolor(),
+                edgecolors=obj.get_edgecolor()
+                ))
+
+        self.assertTrue((
+            self.render(add_collection) == self.render(add_paths)
+            ).all())
+        # Drawn from the templates, the flat vertices aren't needed.
+        self.assertIsNotNone(obj._templates)
+        self.assertIsNone(obj._flat)
+
+    def test_templates(self):
+        shapes = ShapeArray()
+        shapes.extend(np.arange(0, 400, 25), np.arange(20, 420, 25),
+                      strands=[1, -1] * 8, shape=Triangle)
+        shapes.extend(np.arange(0, 400, 50), np.arange(30, 430, 50),
+                      offsets=1.5, shape=Arrow, head_length=10,
+                      facecolor="red")
+        obj = ShapeCollection(shapes, alpha=0.5)
+
+        fig = Figure(figsize=(4, 2), dpi=50)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        ax.add_collection(obj, autolim=False)
+        ax.set_xlim(0, 500)
+        ax.set_ylim(-1, 3)
+
+        def draw():
+            fig.canvas.draw()
+            return np.asarray(fig.canvas.buffer_rgba()).copy()
+
+        def add_paths(ax):
+            ax.add_collection(PathCollection(
+                shapes.get_paths(),
+                facecolors=obj.get_facecolor(),
+                edgecolors=obj.get_edgecolor(),
+                ))
+
+        # The rows are drawn as copies of a template per strand of the
+        # triangles and one for the arrows, without a path per row.
+        image = draw()
+        self.assertIsNone(obj._paths)
+        self.assertEqual(len(set(map(id, obj._templates[0]))), 3)
+        self.assertTrue((image == self.render(add_paths)).all())
+
+        # Rows rewritten in place get their own templates and transforms.
+        shapes.data["end"][[0, 20]] += 5.
+        obj._rows_changed(0, len(shapes))
+        self.assertIsNone(obj._paths)
+        self.assertTrue((draw() == self.render(add_paths)).all())
+
+        # Paths that are set are drawn instead.
+        obj.set_paths(shapes.get_paths()[:1])
+        self.assertFalse((draw() == self.render(add_paths)).all())
+
+    def test_flat_cache(self):
+        shapes = ShapeArray()
+        shapes.extend(np.arange(10, 400, 25), np.arange(30, 420, 25),
+                      shape=Rectangle)
+        obj = Feature([(10, 30, 1), (60, 80, 1)], shape=new_shape(Triangle))
+        group = FeatureGroup([obj, ShapeCollection(shapes)])
+
+        fig = Figure(figsize=(4, 2), dpi=50)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        ax.add_collection(group)
+        ax.set_xlim(0, 500)
+        ax.set_ylim(-1, 3)
+        fig.canvas.draw()
+        paths = group.get_paths()
+
+        # Redrawing, zooming and changing colours reuse the paths, which
+        # view the flat vertices.
+        fig.canvas.draw()
+        ax.set_xlim(0, 450)
+        group.set_facecolor("red")
+        fig.canvas.draw()
+        self.assertIs(group.get_paths(), paths)
+        self.assertIs(group.get_transform(), group.get_transform())
+        self.assertIs(paths[0].vertices.base, group._flat_paths()[0])
+
+        # Non-affine transforms are applied once, and again after the
+        # geometry changes.
+        ax.set_xscale("log")
+        fig.canvas.draw()
+        transformed = group._transformed
+        ax.set_xlim(1, 450)
+        fig.canvas.draw()
+        self.assertIs(group._transformed[3], transformed[3])
+
+        obj.offset = 1
+        fig.canvas.draw()
+        self.assertIsNot(group._transformed, transformed)
+
+        # The cached paths draw the same as new ones.
+        image = np.asarray(fig.canvas.buffer_rgba()).copy()
+        group._invalidate(geometry=False)
+        fig.canvas.draw()
+        self.assertTrue(
+            (np.asarray(fig.canvas.buffer_rgba()) == image).all()
+            )
+
+    def test_instanced(self):
+        shapes = ShapeArray()
+        shapes.extend(np.arange(0, 400, 25), np.arange(10, 410, 25) +
+                      np.arange(16) % 4, strands=[1, -1] * 8, shape=Triangle)
+        shapes.extend(np.arange(0, 400, 50), np.arange(5, 405, 50),
+                      offsets=1.5, shape=Arrow, head_length=2,
+                      facecolor="red")
+
+        images = list()
+        for instanced in (False, True):
+            obj = ShapeCollection(shapes, instanced=instanced)
+            images.append(self.render(lambda ax: ax.add_collection(obj)))
+
+        # Equal arrows share a template, scaled triangles a template per
+        # strand.
+        self.assertEqual(len(obj._instances[1]), 3)
+        self.assertEqual(len(obj._instance_collections()[2].get_offsets()),
+                         8)
+        self.assertTrue((images[0] == images[1]).all())
+
+    def test_path_collection(self):
+        shapes = ShapeArray()
+        shapes.extend(np.arange(10, 400, 25), np.arange(60, 450, 25),
+                      shape=Rectangle)
+        shapes.extend(np.arange(10, 400, 50), np.arange(30, 420, 50),
+                      offsets=0.5, shape=Triangle, edgecolor="black")
+        props = dict(alpha=0.5, linewidths=2)
+
+        # Drawn as matplotlib draws the paths, with transparency and
+        # overlapping edges, with affine and non-affine transforms.
+        for scale in ("linear", "symlog"):
+            def add_collection(ax):
+                ax.add_collection(ShapeCollection(shapes, **props))
+                ax.set_xscale(scale)
+
+            def add_paths(ax):
+                obj = ShapeCollection(shapes, **props)
+                ax.add_collection(PathCollection(
+                    shapes.get_paths(),
+                    facecolors=obj.get_facecolor(),
+                    edgecolors=obj.get_edgecolor(),
+                    linewidths=obj.get_linewidth(),
+                    alpha=0.5
+                    ))
+                ax.set_xscale(scale)
+
+            self.assertTrue((
+                self.render(add_collection) == self.render(add_paths)
+                ).all())
+
+    def test_lod(self):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+
+        shapes = ShapeArray()
+        shapes.extend(np.arange(0, 1e6, 100), np.arange(10, 1e6 + 10, 100))
+        obj = ShapeCollection(shapes, lod=True, cull=False)
+        ax.add_collection(obj)
+
+        ax.set_xlim(0, 1e6)
+        fig.canvas.draw()
+        self.assertEqual(len(obj.get_paths()), 1)
+
+        ax.set_xlim(0, 1e3)
+        fig.canvas.draw()
+        self.assertEqual(len(obj.get_paths()), len(shapes))
+        self.assertEqual(len(obj.get_facecolor()), 1)
+
+
+class TestCulling(unittest.TestCase):
+
+    def setUp(self):
+        self.fig = Figure(figsize=(4, 2), dpi=50)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_ylim(-1, 2)
+
+        self.shapes = ShapeArray()
+        self.shapes.extend(np.arange(0, 1e6, 100), np.arange(50, 1e6, 100),
+                           shape=Rectangle)
+
+    def starts(self, obj):
+        return obj.shape_array.data["start"][obj._cull_rows]
+
+    def test_cull(self):
+        obj = ShapeCollection(self.shapes)
+        self.ax.add_collection(obj)
+        self.ax.set_xlim(1000, 2000)
+        self.fig.canvas.draw()
+
+        # The view and a view width either side.
+        starts = self.starts(obj)
+        self.assertEqual(min(starts), 0.)
+        self.assertEqual(max(starts), 3000.)
+
+        # Limits outside of the culled range cull again, without a draw.
+        self.ax.set_xlim(5e5, 5e5 + 1000)
+        self.assertEqual(min(self.starts(obj)), 5e5 - 1000)
+
+        obj.set_cull(False)
+        self.assertIsNone(obj._cull_rows)
+
+    def test_paths(self):
+        obj = ShapeCollection(self.shapes)
+        self.ax.add_collection(obj)
+        self.ax.set_xlim(1000, 2000)
+        self.fig.canvas.draw()
+
+        # The paths, data limits and hit rows are of every shape.
+        paths = obj.get_paths()
+        self.assertEqual(len(paths), len(self.shapes))
+        self.assertEqual(
+            obj.get_datalim(self.ax.transData).intervalx.tolist(),
+            [0., 999950.]
+            )
+
+        x, y = self.ax.transData.transform([1520, 0.5])
+        event = MouseEvent("button_press_event", self.fig.canvas, x, y)
+        hit, info = obj.contains(event)
+        self.assertTrue(hit)
+        self.assertEqual(info["ind"].tolist(), [15])
+        self.assertEqual(paths[15].vertices[0, 0], 1500.)
+
+    def test_by_axis(self):
+        features = [
+            Feature([(s, s + 50, 1)], shape=new_shape(Rectangle))
+            for s in range(0, 100000, 100)
+            ]
+        obj = FeatureGroup(features, by_axis="y")
+        self.ax.add_collection(obj)
+        self.ax.set_xlim(-1, 2)
+        self.ax.set_ylim(1000, 2000)
+        self.fig.canvas.draw()
+
+        self.assertEqual(len(obj._cull_rows), 31)
+
+    def test_pixels(self):
+        styled = ShapeArray()
+        styled.extend(np.arange(0, 1e6, 200), np.arange(50, 1e6, 200),
+                      shape=Rectangle)
+        styled.extend(np.arange(100, 1e6, 200), np.arange(150, 1e6, 200),
+                      shape=Rectangle, facecolor="red", linewidth=3)
+        dashed = styled.take(np.arange(len(styled)))
+        dashed.extend([1500], [1550], shape=Rectangle, linestyle="--")
+
+        # Styles of each row, mapped colours and dashes are drawn the same.
+        for shapes, kwargs in [
+                (self.shapes, {}),
+                (styled, {}),
+                (self.shapes, dict(array=np.arange(len(self.shapes)))),
+                (dashed, {}),
+                ]:
+            images = list()
+            for cull in [True, False]:
+                self.ax.cla()
+                obj = ShapeCollection(shapes, cull=cull, **kwargs)
+                self.ax.add_collection(obj)
+                self.ax.set_xlim(1000, 3000)
+                self.ax.set_ylim(-1, 2)
+                self.fig.canvas.draw()
+                images.append(
+                    np.asarray(self.fig.canvas.buffer_rgba()).copy()
+                    )
+
+            self.assertTrue((images[0] == images[1]).all())
+
+
+class TestLinkCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.fig = Figure(figsize=(4, 4), dpi=50)
+        FigureCanvasAgg(self.fig)
+        self.ax1 = self.fig.add_subplot(211)
+        self.ax2 = self.fig.add_subplot(212)
+        for ax in (self.ax1, self.ax2):
+            ax.set_xlim(0, 100)
+        self.obj = LinkCollection(
+            partial(CrossLink, self.ax1, self.ax2, alpha=0.5),
+            add_to_fig=True,
+            cmap="viridis"
+            )
+
+    def test_add(self):
+        new = self.obj.add([[10, 20], [30, 40]])
+        self.assertEqual([link.ax2_xrange for link in new], [[30., 40.]])
+        self.assertEqual(self.obj.links[0].ax2_xrange, [30., 40.])
+        self.assertEqual(self.obj.add([]), [])
+
+        self.obj.add([[[10, 20], [30, 40]], [[50, 60], [70, 80]]],
+                     facecolor="red")
+        links = self.obj.links
+        self.assertEqual(links[2].ax1_xrange, [50., 60.])
+        self.assertEqual(links[2].properties["facecolor"], "red")
+        self.assertEqual(links[2].properties["alpha"], 0.5)
+
+        self.obj.add([[[[10, 20], [1, 0]], [[30, 40], [0, 1]]]])
+        links = self.obj.links
+        self.assertEqual(links[3].ax1_yrange, [1., 0.])
+        self.assertEqual(len(links), 4)
+
+        # Links are styled from an interned palette.
+        self.assertEqual(self.obj._data["style"].tolist(), [0, 1, 1, 0])
+
+        # The links are copies of the rows, so they can't be changed.
+        self.assertIsInstance(links, tuple)
+
+    def test_call(self):
+        self.obj.add([[[10, 20], [30, 40]], [[150, 160], [70, 80]]],
+                     facecolor="red")
+        with self.assertWarns(DeprecationWarning):
+            patches = self.obj()
+        self.assertEqual(len(patches), 1)
+        self.assertTrue(np.allclose(
+            patches[0].get_path().vertices,
+            self.obj.links[0].draw().vertices
+            ))
+        self.assertEqual(patches[0].get_facecolor(), (1., 0., 0., 0.5))
+        self.assertNotIn(patches[0], self.fig.patches)
+
+    def test_draw(self):
+        self.obj.add([[[10, 20], [30, 40]], [[50, 60], [70, 80]]],
+                     facecolor="red")
+        self.obj.add([[[10, 20], [30, 40]], [[50, 60], [70, 80]]],
+                     values=[1, 2])
+        # Out of view.
+        self.obj.add([[[150, 160], [30, 40]]])
+        self.assertIn(self.obj, self.fig.artists)
+
+        self.fig.canvas.draw()
+        self.assertEqual(len(self.obj.get_paths()), 4)
+        faces = self.obj.get_facecolor()
+        self.assertEqual(faces[0].tolist(), [1., 0., 0., 0.5])
+        self.assertEqual(faces[2, :3].tolist(),
+                         list(self.obj.get_cmap()(0.)[:3]))
+        self.assertEqual(faces[3, 3], 0.5)
+        # Links have the edge a PathPatch draws by default.
+        self.assertEqual(
+            self.obj.get_edgecolor()[0].tolist(),
+            list(PathPatch(None, alpha=0.5).get_edgecolor())
+            )
+        self.assertEqual(self.obj.get_linewidth()[0], 1.)
+
+        # Links in view are found again when the limits change.
+        in_view = self.obj._links_in_view()
+        self.assertIs(self.obj._links_in_view(), in_view)
+        self.ax2.set_xlim(0, 200)
+        self.fig.canvas.draw()
+        self.assertEqual(len(self.obj.get_paths()), 4)
+        self.ax1.set_xlim(100, 200)
+        self.fig.canvas.draw()
+        self.assertEqual(self.obj._links_in_view().tolist(), [4])
+
+        # The paths are those of each CrossLink.
+        self.ax1.set_xlim(0, 100)
+        self.fig.canvas.draw()
+        path = self.obj.get_paths()[0]
+        self.assertTrue(np.allclose(
+            path.vertices,
+            self.obj.links[0].draw().vertices
+            ))
+
+    def test_draw_order(self):
+        self.obj.add([[10, 20], [30, 40]])
+        drawn = list()
+        for artist in (self.ax1, self.ax2, self.obj):
+            artist.draw = partial(
+                lambda artist, draw, renderer: (
+                    drawn.append(artist), draw(renderer)),
+                artist,
+                artist.draw
+                )
+
+        # Links are drawn over the axes they join.
+        self.fig.canvas.draw()
+        self.assertEqual(drawn, [self.ax1, self.ax2, self.obj])
+
+    def test_add_stream(self):
+        lines = [
+            "10\t20\t30\t40\t11\t11\t99.5\tchr1\tchr2\n",
+            "50\t55\t60\t65\t6\t6\t90.0\tchr1\tchr2\n",
+            "70\t80\t90\t80\t11\t11\t80.0\tchr1\tchr2\n",
+            ] * 3
+        added = self.obj.add_stream(
+            iter(lines), identity=6, min_identity=85, min_length=8,
+            values="identity", chunk_size=2, facecolor="red"
+            )
+        self.assertEqual(added, 3)
+        self.assertEqual(self.obj._data["along2"].tolist(), [[30., 40.]] * 3)
+        self.assertEqual(self.obj._data["value"].tolist(), [99.5] * 3)
+        self.assertEqual(self.obj._styles,
+                         [{"alpha": 0.5, "facecolor": "red"}])
+
+        # Records may also be numbers, and are added to the same rows.
+        added = self.obj.add_stream(
+            [(1, 2, 3, 4), (5, 6, 7, 8)],
+            chunk_size=1,
+            )
+        self.assertEqual(added, 2)
+        self.assertEqual(len(self.obj.links), 5)
+        self.assertEqual(self.obj.links[4].ax1_xrange, [5., 6.])
+        self.assertTrue(np.isnan(self.obj._data["value"][3]))
+
+        with self.assertRaises(ValueError):
+            self.obj.add_stream(lines, min_identity=90)
+
+        # Lines of files opened in binary mode are decoded.
+        added = self.obj.add_stream(
+            BytesIO("".join(lines).encode()),
+            identity=6,
+            min_identity=85
+            )
+        self.assertEqual(added, 6)
+        self.assertEqual(self.obj._data["along1"][-1].tolist(), [50., 55.])
+
+    def test_in_view(self):
+        random = np.random.RandomState(0)
+        starts = random.uniform(-50, 150, size=(500, 2))
+        blocks = np.stack([starts, starts + random.uniform(0, 20, (500, 2))],
+                          axis=2)
+        self.obj.add(blocks)
+        self.ax1.set_xlim(100, 20)
+
+        for xlim in [(0, 100), (-100, 0), (30, 60), (200, 300)]:
+            self.ax2.set_xlim(*xlim)
+            expected = [
+                i for i, link in enumerate(self.obj.links)
+                if link.in_limits()
+                ]
+            self.assertEqual(self.obj._links_in_view().tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,14 @@ Unit tests for feature_shapes.py.
 
 """
 
+import sys
 import unittest
+
+# Import the axes before bioplotlib, whose Rectangle shares a name with
+# matplotlib's and confuses its docstring interpolation.
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
 from bioplotlib.feature_shapes import *
 import numpy as np
 
@@ -510,6 +517,519 @@ class TestOpenSemicircle(unittest.TestCase):
 
         self.assertIsInstance(obj.path, Path)
 
+class TestBatch(unittest.TestCase):
+
+    shapes = [
+        Rectangle,
+        Triangle,
+        Arrow,
+        OpenTriangle,
+        OpenRectangle,
+        OpenSemicircle
+        ]
+
+    starts = [1, 10, 20, 5]
+    ends = [3, 4, 21, 5]
+    strands = [1, -1, None, -1]
+
+    def test_matches_single(self):
+        for shape in self.shapes:
+            verts, codes = shape.batch(
+                self.starts,
+                self.ends,
+                self.strands,
+                widths=[1, 2, 0.5, 1],
+                offsets=0.5,
+                by_axis="y"
+                )
+
+            self.assertEqual(verts.shape, (4, len(shape._codes), 2))
+            self.assertEqual(codes.tolist(), shape._codes)
+
+            for i, (s, e, st, w) in enumerate(zip(
+                    self.starts, self.ends, self.strands, [1, 2, 0.5, 1])):
+                obj = shape(
+                    start=s,
+                    end=e,
+                    strand=st,
+                    width=w,
+                    offset=0.5,
+                    by_axis="y"
+                    )
+                np.testing.assert_allclose(verts[i], obj.vertices)
+
+    def test_arrow_head_length(self):
+        verts, codes = Arrow.batch(
+            [0, 10, 0, 2],
+            [2, 0, 2, 0],
+            [None, None, -1, None],
+            head_length=[1.5, 1, 1, 5],
+            tail_width=0.5
+            )
+
+        self.assertEqual(verts[0, 2].tolist(), [0.5, 0.75])
+        self.assertEqual(verts[1, 2].tolist(), [1., 0.75])
+        self.assertEqual(verts[2, :, 0].tolist(),
+                         [2., 2., 1., 1., 0., 1., 1., 2.])
+        self.assertEqual(verts[3, 2].tolist(), [2., 0.75])
+        self.assertEqual(verts[3, 4].tolist(), [0., 0.5])
+
+    def test_arrow_negative_head_length(self):
+        verts, codes = Arrow.batch(
+            [0, 0, 4, 4],
+            [4, 4, 0, 0],
+            head_length=[-1, -6, -1, -6]
+            )
+
+        # Negative heads that fit point back from the end, longer heads
+        # are clamped to the whole arrow, pointing towards the end.
+        self.assertEqual(verts[:, 2, 0].tolist(), [5., 0., -1., 4.])
+        self.assertEqual(verts[:, 4, 0].tolist(), [4., 4., 0., 0.])
+
+        for start, end, head_length, expected in zip(
+                [0, 0, 4, 4], [4, 4, 0, 0], [-1, -6, -1, -6], verts):
+            arrow = Arrow(start, end, head_length=head_length)
+            vertices = arrow.get_transform().transform(
+                arrow.get_path().vertices
+                )
+            self.assertTrue(np.allclose(vertices, expected))
+
+
+class TestDeferredPath(unittest.TestCase):
+
+    def counted(self, obj):
+        calls = []
+        draw_transform = obj._draw_transform
+
+        def wrapper():
+            calls.append(1)
+            draw_transform()
+
+        obj._draw_transform = wrapper
+        return calls
+
+    def test_setters_are_lazy(self):
+        obj = Arrow(start=0, end=2, offset=0, width=1)
+        obj.get_path()
+        calls = self.counted(obj)
+
+        obj.start = 1
+        obj.end = 3
+        obj.offset = 1
+        self.assertEqual(len(calls), 0)
+
+        obj.get_path()
+        self.assertEqual(len(calls), 1)
+
+        vertices = obj.vertices
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(vertices[0].tolist(), [1., 1.])
+        self.assertEqual(vertices[4].tolist(), [3., 1.5])
+
+    def test_update(self):
+        obj = Rectangle(start=0, end=2, offset=0, width=1)
+        obj.get_path()
+        calls = self.counted(obj)
+
+        invalidated = list()
+        invalidate = obj._invalidate
+        obj._invalidate = lambda **kwargs: (
+            invalidated.append(kwargs), invalidate(**kwargs))
+
+        # The path is invalidated once, not by each setter.
+        obj.update(start=1, end=3, offset=1, facecolor="red")
+        self.assertEqual(invalidated, [{"template": True}])
+        self.assertEqual(obj.get_facecolor(), (1., 0., 0., 1.))
+        self.assertEqual(len(calls), 0)
+        self.assertEqual(obj.vertices.tolist(), [
+            [1., 1.],
+            [1., 2.],
+            [3., 2.],
+            [3., 1.],
+            [1., 1.]
+            ])
+        self.assertEqual(len(calls), 1)
+
+        # Moving the shape keeps its template.
+        obj.update(offset=2, by_axis="y")
+        self.assertEqual(invalidated[-1], {"template": False})
+        self.assertEqual(obj.get_patch_transform().get_matrix()[0, 2], 2.)
+
+    def test_head_length_updates_path(self):
+        obj = Arrow(start=0, end=2, head_length=1)
+        obj.head_length = 1.5
+        self.assertEqual(obj.vertices[2].tolist(), [0.5, 1.])
+
+
+class TestBuffers(unittest.TestCase):
+
+    def test_transform_in_place(self):
+        obj = Rectangle(start=0, end=2, width=1)
+        transform = obj.get_patch_transform()
+        matrix = transform.get_matrix()
+
+        obj.update(start=1, end=4, offset=2, by_axis="y")
+        self.assertIs(obj.get_patch_transform(), transform)
+        self.assertIs(transform.get_matrix(), matrix)
+        self.assertEqual(
+            matrix.tolist(),
+            [[0., 1., 2.], [3., 0., 1.], [0., 0., 1.]]
+            )
+
+    def test_vertices_in_place(self):
+        obj = Arrow(start=0, end=2)
+        vertices = obj.vertices
+        obj.start = 1
+        self.assertIs(obj.vertices, vertices)
+        self.assertEqual(vertices[0].tolist(), [1., 0.])
+
+    def test_explicit_vertices(self):
+        obj = OpenTriangle(start=0, end=2)
+        obj.vertices = [[0, 0], [1, 1], [2, 0]]
+        path = obj.path
+
+        obj.vertices = [[0, 0], [1, 2], [2, 0]]
+        self.assertIs(obj.path, path)
+        self.assertEqual(path.vertices[1].tolist(), [1., 2.])
+
+    def test_shared_codes(self):
+        _, codes = Arrow.batch([0], [1])
+        _, other = Arrow.batch([0, 5], [1, 6])
+        self.assertIs(codes, other)
+        self.assertFalse(codes.flags.writeable)
+        self.assertIs(Arrow(0, 1).path.codes, Arrow(3, 9).path.codes)
+
+
+class TestShapeArray(unittest.TestCase):
+
+    def setUp(self):
+        self.obj = ShapeArray()
+        self.obj.append(0, 10, 1, Arrow, head_length=2, facecolor="red")
+        self.obj.extend(
+            [20, 30],
+            [25, 40],
+            [-1, None],
+            offsets=[1, 2],
+            shape=Triangle
+            )
+
+    def test_columns(self):
+        data = self.obj.data
+        self.assertEqual(len(self.obj), 3)
+        self.assertEqual(data["start"].tolist(), [0., 20., 30.])
+        self.assertEqual(data["strand"].tolist(), [1, -1, 0])
+        self.assertEqual(data["offset"].tolist(), [0., 1., 2.])
+        self.assertEqual(data["kind"].tolist(), [0, 1, 1])
+        self.assertEqual(data["style"].tolist(), [0, 1, 1])
+        self.assertEqual(len(self.obj.kinds), 2)
+
+    def test_paths_match_shapes(self):
+        paths = self.obj.get_paths()
+        expected = [
+            Arrow(start=0, end=10, strand=1, head_length=2),
+            Triangle(start=20, end=25, strand=-1, offset=1),
+            Triangle(start=30, end=40, offset=2),
+            ]
+        for path, shape in zip(paths, expected):
+            self.assertEqual(path.vertices.tolist(), shape.vertices.tolist())
+            self.assertEqual(path.codes.tolist(), shape.codes)
+
+    def test_flat_paths(self):
+        vertices, codes, offsets = self.obj.flat_paths()
+        paths = self.obj.get_paths()
+
+        self.assertEqual(len(offsets), 4)
+        self.assertEqual(len(vertices), offsets[-1])
+        for i, path in enumerate(paths):
+            rows = slice(offsets[i], offsets[i + 1])
+            self.assertEqual(vertices[rows].tolist(), path.vertices.tolist())
+            self.assertEqual(codes[rows].tolist(), path.codes.tolist())
+
+    def test_instances(self):
+        self.obj.extend([20, 30, 40], [22, 32, 44], strands=-1,
+                        shape=Arrow, head_length=1)
+        vertices, _, offsets = self.obj.flat_paths()
+
+        rows = list()
+        for index, template, starts, scales in self.obj.instances():
+            rows.extend(index)
+            for i, start, scale in zip(index, starts, scales):
+                self.assertTrue(np.allclose(
+                    template.vertices * scale + start,
+                    vertices[offsets[i]:offsets[i + 1]]
+                    ))
+        self.assertEqual(sorted(rows), list(range(len(self.obj))))
+
+        # Arrows don't stretch evenly, so each length has a template.
+        self.assertEqual(
+            [len(i) for i, _, _, _ in self.obj.instances() if 4 in i],
+            [2]
+            )
+
+    def test_getitem(self):
+        shape = self.obj[0]
+        self.assertIsInstance(shape, Arrow)
+        self.assertEqual(shape.head_length, 2)
+        self.assertEqual(shape.get_facecolor(), (1., 0., 0., 1.))
+
+        shape = self.obj[-1]
+        self.assertIsInstance(shape, Triangle)
+        self.assertIsNone(shape.strand)
+
+    def test_setitem(self):
+        shape = self.obj[1]
+        shape.update(start=15, offset=3)
+        self.obj[1] = shape
+        self.assertEqual(self.obj.data[1]["start"], 15.)
+        self.assertEqual(self.obj.data[1]["offset"], 3.)
+
+    def test_concatenate(self):
+        other = ShapeArray.from_shapes([Rectangle(start=0, end=1)])
+        obj = ShapeArray.concatenate([self.obj, other], offsets=[0, 5])
+
+        self.assertEqual(len(obj), 4)
+        self.assertEqual(obj.data["offset"].tolist(), [0., 1., 2., 5.])
+        self.assertIsInstance(obj[3], Rectangle)
+
+
+class TestBytes(unittest.TestCase):
+
+    def test_shape_array(self):
+        obj = ShapeArray()
+        obj.extend([0, 5], [3, 9], [1, -1], shape=Arrow, head_length=0.5,
+                   facecolor="red")
+        obj.append(1, 2, shape=SineWave, period=0.3, linestyle=(0, (1, 2)))
+        buffer = obj.tobytes()
+        new = ShapeArray.frombytes(buffer)
+
+        self.assertEqual(new.data.tolist(), obj.data.tolist())
+        self.assertEqual(new.kinds, obj.kinds)
+        self.assertEqual(new.styles[1]["linestyle"], (0, (1, 2)))
+        self.assertTrue(np.shares_memory(
+            new.data,
+            np.frombuffer(buffer, dtype=np.uint8)
+            ))
+
+        new[0] = Rectangle(0, 1)
+        self.assertTrue(new.data.flags.writeable)
+        self.assertEqual(obj.data["start"][0], 0.)
+
+    def test_shape(self):
+        obj = Arrow(0, 5, strand=-1, head_length=2, name="gene",
+                    facecolor="blue")
+        new = Shape.frombytes(obj.tobytes())
+
+        self.assertIsInstance(new, Arrow)
+        self.assertEqual(new.name, "gene")
+        self.assertEqual(new.head_length, 2)
+        self.assertEqual(new.vertices.tolist(), obj.vertices.tolist())
+        self.assertEqual(new.get_facecolor(), obj.get_facecolor())
+
+    def test_bad_buffer(self):
+        with self.assertRaises(ValueError):
+            ShapeArray.frombytes(b"not a shape array")
+
+        # Only the Shape classes already defined are loaded, without
+        # importing the module named in the buffer.
+        name = b'"bioplotlib.feature_shapes.Rectangle"'
+        buffer = Rectangle(0, 1).tobytes()
+        self.assertIn(name, buffer)
+        buffer = buffer.replace(name, b'"tabnanny.check"'.ljust(len(name)))
+        with self.assertRaises(ValueError):
+            Shape.frombytes(buffer)
+        self.assertNotIn("tabnanny", sys.modules)
+
+
+class TestTemplate(unittest.TestCase):
+
+    def test_shared(self):
+        first = Triangle(start=1, end=3, offset=1)
+        second = Triangle(start=10, end=2, strand=-1, width=3)
+        self.assertIs(first.get_path(), second.get_path())
+        self.assertTrue(first.get_path().readonly)
+
+    def test_offset_only_moves_transform(self):
+        obj = Arrow(start=0, end=4, head_length=1)
+        path = obj.get_path()
+
+        obj.offset = 2
+        obj.by_axis = "y"
+        self.assertIs(obj.get_path(), path)
+        self.assertEqual(obj.vertices[4].tolist(), [2.5, 4.])
+
+    def test_explicit_vertices(self):
+        obj = Rectangle(start=0, end=1)
+        obj.vertices = [[0, 0], [0, 2], [3, 2], [3, 0], [0, 0]]
+        self.assertEqual(obj.vertices[2].tolist(), [3., 2.])
+
+        obj.start = 0.5
+        self.assertEqual(obj.vertices[0].tolist(), [0.5, 0.])
+
+
+class TestLevelOfDetail(unittest.TestCase):
+
+    def setUp(self):
+        self.obj = ShapeArray()
+        self.obj.extend([0, 100], [50, 200], shape=Arrow, facecolor="red")
+        self.obj.extend([300, 310, 320, 1000], [305, 315, 325, 1005])
+
+    def test_full_detail(self):
+        obj = self.obj.level_of_detail(10.)
+        self.assertEqual(obj.data.tolist(), self.obj.data.tolist())
+
+    def test_levels(self):
+        obj = self.obj.level_of_detail(0.05)
+        kinds = [obj.kinds[k][0] for k in obj.data["kind"]]
+
+        self.assertEqual(kinds, [Arrow, Rectangle, Rectangle, Tick])
+        self.assertEqual(obj.data["start"].tolist(), [100., 0., 300., 1000.])
+        self.assertEqual(obj.data["end"].tolist(), [200., 50., 325., 1005.])
+
+        tick_style = obj.styles[obj.data["style"][-1]]
+        self.assertFalse(tick_style["fill"])
+        self.assertEqual(len(obj.get_paths()[-1].vertices), 2)
+
+    def test_shape(self):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        ax.set_xlim(0, 1e6)
+
+        obj = Arrow(start=0, end=1000, lod=True, edgecolor="black")
+        ax.add_patch(obj)
+        self.assertIs(obj._level_of_detail(), Tick._template())
+
+        ax.set_xlim(0, 2e5)
+        self.assertIs(obj._level_of_detail(), Rectangle._template())
+
+        ax.set_xlim(0, 2e3)
+        self.assertIsNone(obj._level_of_detail())
+        fig.canvas.draw()
+
+
+class TestCurves(unittest.TestCase):
+
+    def test_batch(self):
+        shapes = [
+            (Hexagon, {}),
+            (Ellipse, {"resolution": 16}),
+            (Trapeziod, {}),
+            (SineWave, {"period": 5}),
+            (SawtoothWave, {"period": 5}),
+            (SquareWave, {"period": 5}),
+            (TriangleWave, {"period": 5}),
+            (Helix, {"period": 5}),
+            (DoubleHelix, {"period": 5}),
+            (OpenSemicircle, {"resolution": 16}),
+            ]
+        for shape, kwargs in shapes:
+            obj = shape(start=2, end=22, width=2, offset=1, **kwargs)
+            array = ShapeArray.from_shapes([obj])
+            np.testing.assert_allclose(
+                array.get_paths()[0].vertices,
+                obj.vertices
+                )
+            self.assertEqual(array.get_paths()[0].codes.tolist(), obj.codes)
+        return
+
+    def test_batch_period(self):
+        for shape in (SineWave, SquareWave, Helix):
+            obj = shape(start=10, end=30, width=2, offset=1, period=5)
+            verts, codes = shape.batch([10], [30], widths=2, offsets=1,
+                                       period=5)
+            np.testing.assert_allclose(verts[0], obj.vertices)
+            self.assertEqual(codes.tolist(), obj.codes)
+
+            # Waves of one batch share their number of cycles.
+            verts, _ = shape.batch([10, 40], [30, 60], period=5)
+            self.assertEqual(verts.shape[1], len(obj.vertices))
+            with self.assertRaises(ValueError):
+                shape.batch([10, 40], [30, 50], period=5)
+        return
+
+    def test_hexagon(self):
+        obj = Hexagon(start=0, end=10, point_length=2)
+        self.assertEqual(
+            obj.vertices.tolist(),
+            [[0, 0.5], [2, 1], [8, 1], [10, 0.5], [8, 0], [2, 0], [0, 0.5]]
+            )
+
+        # Points are clamped to half of the length.
+        obj.end = 2
+        self.assertEqual(obj.vertices[1].tolist(), [1, 1])
+        return
+
+    def test_cycles(self):
+        obj = SquareWave(start=0, end=4, period=2)
+        self.assertEqual(
+            obj.vertices.tolist(),
+            [[0, 0], [0, 1], [1, 1], [1, 0],
+             [2, 0], [2, 1], [3, 1], [3, 0], [4, 0]]
+            )
+
+        obj = SineWave(start=0, end=10, period=3, resolution=4)
+        self.assertEqual(len(obj.vertices), 3 * 4 + 1)
+        np.testing.assert_allclose(obj.vertices[[0, -1], 0], [0, 10])
+        return
+
+    def test_double_helix(self):
+        obj = DoubleHelix(start=0, end=10, resolution=4)
+        codes = obj.codes
+        self.assertEqual(codes.count(Path.MOVETO), 2)
+        np.testing.assert_allclose(
+            obj.vertices[:5, 1],
+            1 - obj.vertices[5:, 1]
+            )
+        return
+
+    def test_semicircle(self):
+        obj = OpenSemicircle(start=0, end=10, resolution=8)
+        self.assertEqual(len(obj.vertices), 9)
+        np.testing.assert_allclose(obj.vertices[[0, 4, 8]],
+                                   [[0, 0], [5, 0.75], [10, 0]])
+        return
+
+    def test_template_cache(self):
+        one = SineWave(start=0, end=10, period=5, resolution=8)
+        two = SineWave(start=100, end=110, period=5, resolution=8)
+        self.assertIs(one.path, two.path)
+
+        three = SineWave(start=0, end=10, period=5, resolution=16)
+        self.assertIsNot(one.path, three.path)
+        return
+
+    def test_adaptive(self):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+
+        obj = SineWave(start=0, end=100, period=10)
+        ax.add_patch(obj)
+
+        ax.set_xlim(0, 1e4)
+        zoomed_out = obj._draw_template()
+        ax.set_xlim(0, 100)
+        zoomed_in = obj._draw_template()
+
+        self.assertEqual(len(zoomed_out.vertices), 10 * RESOLUTION_MIN + 1)
+        self.assertGreater(len(zoomed_in.vertices), len(zoomed_out.vertices))
+        fig.canvas.draw()
+
+        obj.resolution = 4
+        self.assertIsNone(obj._draw_template())
+        return
+
+    def test_adaptive_array(self):
+        obj = ShapeArray()
+        obj.extend([0, 0], [100, 200], shape=SineWave, period=10)
+        low = obj.get_paths(scale=0.1)
+        high = obj.get_paths(scale=100.)
+
+        self.assertEqual(len(low[0].vertices), 10 * RESOLUTION_MIN + 1)
+        self.assertEqual(len(low[1].vertices), 20 * RESOLUTION_MIN + 1)
+        self.assertEqual(len(high[0].vertices), 10 * RESOLUTION_MAX + 1)
+        return
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,155 @@
+"""
+Unit tests for intervals.py.
+
+"""
+
+import unittest
+
+from bioplotlib.intervals import DensityPyramid
+from bioplotlib.intervals import IntervalIndex
+from bioplotlib.intervals import pack_intervals
+import numpy as np
+
+
+class TestIntervalIndex(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.starts = random.uniform(0, 1000, size=500)
+        self.ends = self.starts + random.exponential(20, size=500)
+        # A long interval that covers most of the others.
+        self.starts[10] = 0
+        self.ends[10] = 900
+        self.obj = IntervalIndex(self.starts, self.ends)
+
+    def expected(self, low, high):
+        hits = (self.starts <= high) & (self.ends >= low)
+        return np.flatnonzero(hits).tolist()
+
+    def test_point(self):
+        for point in [-1, 0, 450.5, 899, 950, 2000]:
+            self.assertEqual(
+                sorted(self.obj.overlap(point).tolist()),
+                self.expected(point, point)
+                )
+
+    def test_range(self):
+        self.assertEqual(
+            sorted(self.obj.overlap(100, 200).tolist()),
+            self.expected(100, 200)
+            )
+
+    def test_empty(self):
+        obj = IntervalIndex()
+        self.assertEqual(obj.overlap(5).tolist(), [])
+        obj.insert([0, 10], [5, 20])
+        self.assertEqual(obj.overlap(5).tolist(), [0])
+
+    def test_insert_remove(self):
+        self.obj.insert([2000, 2005], [2010, 2006], ids=[1000, 1001])
+        self.assertEqual(sorted(self.obj.overlap(2005).tolist()), [1000, 1001])
+
+        self.obj.remove([1000, 10])
+        self.assertEqual(self.obj.overlap(2005).tolist(), [1001])
+        self.assertNotIn(10, self.obj.overlap(450).tolist())
+        self.assertEqual(len(self.obj), 500)
+
+
+
+class TestPackIntervals(unittest.TestCase):
+
+    def first_fit(self, starts, ends, max_rows=None, gap=0.):
+        """ Put each interval in the lowest row whose last one ended. """
+        last = list()
+        rows = np.full(len(starts), -1)
+        for i in np.argsort(starts, kind="mergesort"):
+            for row, end in enumerate(last):
+                if end + gap < starts[i]:
+                    break
+            else:
+                if max_rows is not None and len(last) >= max_rows:
+                    continue
+                row = len(last)
+                last.append(None)
+            last[row] = ends[i]
+            rows[i] = row
+        return rows.tolist()
+
+    def test_first_fit(self):
+        random = np.random.RandomState(1)
+        for density in [10, 1000, 100000]:
+            starts = random.randint(0, density, size=300).astype(float)
+            ends = starts + random.randint(0, 50, size=300)
+            for max_rows in [None, 1, 3]:
+                self.assertEqual(
+                    pack_intervals(starts, ends, max_rows).tolist(),
+                    self.first_fit(starts, ends, max_rows)
+                    )
+
+    def test_gap(self):
+        starts = [0, 10, 12]
+        ends = [9, 11, 20]
+        self.assertEqual(pack_intervals(starts, ends).tolist(), [0, 0, 0])
+        # Intervals are closed, so touching intervals overlap.
+        self.assertEqual(pack_intervals([0, 9], [9, 20]).tolist(), [0, 1])
+        self.assertEqual(
+            pack_intervals(starts, ends, gap=2).tolist(),
+            [0, 1, 0]
+            )
+
+    def test_empty(self):
+        self.assertEqual(pack_intervals([], []).tolist(), [])
+        self.assertEqual(
+            pack_intervals([0, 5], [10, 15], max_rows=0).tolist(),
+            [-1, -1]
+            )
+
+
+class TestDensityPyramid(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(2)
+        self.starts = random.randint(100, 5000, size=200).astype(float)
+        self.ends = self.starts + random.randint(0, 300, size=200)
+        self.strands = random.choice([-1, 0, 1], size=200)
+        self.obj = DensityPyramid(self.starts, self.ends, self.strands,
+                                  bin_size=64)
+
+    def test_bins(self):
+        self.assertEqual(self.obj.origin, 64.)
+        for level in range(len(self.obj)):
+            bins = self.obj.bins(level)
+            self.assertEqual(bins["end"][-1] - bins["start"][-1],
+                             64 * 2 ** level)
+            for i, (low, high) in enumerate(zip(bins["start"], bins["end"])):
+                hits = (self.starts < high) & (self.ends >= low)
+                self.assertEqual(bins["count"][i], hits.sum())
+                self.assertEqual(bins["plus"][i],
+                                 (hits & (self.strands > 0)).sum())
+                self.assertEqual(bins["minus"][i],
+                                 (hits & (self.strands < 0)).sum())
+
+                covered = np.zeros(int(high - low), dtype=bool)
+                for start, end in zip(self.starts[hits], self.ends[hits]):
+                    covered[int(max(start, low) - low):
+                            int(min(end, high) - low)] = True
+                self.assertEqual(bins["coverage"][i], covered.sum())
+
+        self.assertEqual(len(self.obj.bins(len(self.obj) - 1)["count"]), 1)
+
+    def test_level(self):
+        self.assertEqual(self.obj.level(1), 0)
+        self.assertEqual(self.obj.level(65), 1)
+        self.assertEqual(self.obj.level(1e9), len(self.obj) - 1)
+
+        bins = self.obj.bins(1, 1000, 1300)
+        self.assertEqual(bins["start"].tolist(), [960., 1088., 1216.])
+
+    def test_empty(self):
+        obj = DensityPyramid()
+        self.assertEqual(len(obj), 0)
+        self.assertIsNone(obj.level(100))
+
+
+if __name__ == '__main__':
+    unittest.main()
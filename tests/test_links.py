@@ -0,0 +1,131 @@
+"""
+Unit tests for links.py.
+
+"""
+
+import unittest
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from bioplotlib.links import CrossLink
+from bioplotlib.links import LINK_CODES
+from bioplotlib.links import crosslink_paths
+from bioplotlib.links import link_paths
+import numpy as np
+
+
+class TestLinkPaths(unittest.TestCase):
+
+    def setUp(self):
+        fig = Figure(figsize=(4, 4), dpi=50)
+        FigureCanvasAgg(fig)
+        self.fig = fig
+        self.ax1 = fig.add_subplot(211)
+        self.ax2 = fig.add_subplot(212)
+        self.ax1.set_xlim(0, 100)
+        self.ax2.set_xlim(0, 1000)
+        self.ax1.set_ylim(0, 100)
+
+    def to_figure(self, ax, x, y):
+        """ Figure coordinates of data x and axes y. """
+        pixels = [
+            ax.transData.transform([x, 0])[0],
+            ax.transAxes.transform([0, y])[1],
+            ]
+        return self.fig.transFigure.inverted().transform(pixels)
+
+    def test_batch(self):
+        along1 = [[10, 20], [30, 50], [60, 70]]
+        along2 = [[100, 300], [700, 500], [800, 900]]
+        across2 = [[1, 0], [0, 1], [1, 0.5]]
+        vertices, codes = link_paths(
+            self.ax1, self.ax2, along1, along2, ax2_across=across2,
+            cpoint_offset=0.2
+            )
+        self.assertEqual(vertices.shape, (3, 14, 2))
+        self.assertEqual(codes.tolist(), LINK_CODES.tolist())
+
+        # The ribbons cover the ranges of each axes.
+        for (s1, e1), (s2, e2), (low, high), path in zip(
+                along1, along2, across2, vertices):
+            self.assertTrue(np.allclose(
+                path[[0, 11, 10, 9]],
+                [self.to_figure(self.ax1, x, y)
+                 for x, y in [(s1, 1), (s1, 0), (e1, 0), (e1, 1)]]
+                ))
+            ends = [(e2, high), (e2, low), (s2, low), (s2, high)]
+            if low > high:
+                ends = ends[::-1]
+            self.assertTrue(np.allclose(
+                path[[3, 4, 5, 6]],
+                [self.to_figure(self.ax2, x, y) for x, y in ends]
+                ))
+
+        # Each link is drawn the same on its own, or by a CrossLink.
+        for i in range(3):
+            link = CrossLink(
+                self.ax1,
+                self.ax2,
+                ax1_xrange=along1[i],
+                ax2_xrange=along2[i],
+                ax2_yrange=across2[i],
+                cpoint_offset=0.2
+                )
+            self.assertTrue(np.allclose(link.draw().vertices, vertices[i]))
+
+    def test_cpoints(self):
+        straight, _ = link_paths(
+            self.ax1, self.ax2, [[10, 20]], [[20, 10]],
+            ax2_across=[1, 0]
+            )
+        # Inverted links are straight by default.
+        self.assertTrue(np.allclose(straight[0, 1], straight[0, 0]))
+
+        curved, _ = link_paths(
+            self.ax1, self.ax2, [[10, 20]], [[20, 10]],
+            ax2_across=[1, 0], ax1_cpoint=[0.5]
+            )
+        self.assertFalse(np.allclose(curved[0, 1], curved[0, 0]))
+        self.assertTrue(np.allclose(curved[0, [0, 9]], straight[0, [0, 9]]))
+
+    def test_by_y(self):
+        self.ax1.set_ylim(0, 100)
+        self.ax2.set_ylim(0, 100)
+        link = CrossLink(
+            self.ax1,
+            self.ax2,
+            ax1_yrange=[10, 20],
+            ax2_yrange=[30, 40],
+            by="y"
+            )
+        path = link.draw()
+
+        # Ranges are along y, and the ribbon leaves ax1 at its right.
+        pixels = self.fig.transFigure.transform(path.vertices)
+        self.assertTrue(np.allclose(pixels[[0, 11], 0], [
+            self.ax1.transAxes.transform([1, 0])[0],
+            self.ax1.transAxes.transform([0, 0])[0],
+            ]))
+        self.assertTrue(np.allclose(
+            pixels[[0, 11], 1],
+            self.ax1.transData.transform([0, 10])[1]
+            ))
+
+        other = CrossLink(
+            self.ax1, self.ax1, ax1_yrange=[0, 1], ax2_yrange=[5, 6],
+            by="y"
+            )
+        paths = crosslink_paths([link, other, link])
+        self.assertTrue(np.allclose(paths[0].vertices, path.vertices))
+        self.assertTrue(np.allclose(paths[2].vertices, path.vertices))
+        self.assertTrue(np.allclose(paths[1].vertices,
+                                    other.draw().vertices))
+
+    def test_empty(self):
+        vertices, codes = link_paths(self.ax1, self.ax2, [], [])
+        self.assertEqual(vertices.shape, (0, 14, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()